@@ -1,8 +1,21 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, g, Response
+import hmac
+import os
+import time
 from flask_cors import CORS
-from services.scraper_service import ScraperService
+from services.scraper_service import ScraperService, DEFAULT_DEADLINE_SECONDS
 from services.data_collection_service import dataset_builder
+from services.comparison_service import ComparisonService
+from services.entity_resolution_service import tile_of
+from services.menu_service import MenuCrawler
+from services import history_service
 from models.ScrapeRequest import ScrapeRequest
+from utils.tracing import tracer
+from utils.metrics import metrics
+from utils.log import get_logger, set_verbose, reset_verbose
+from utils.responses import api_response, conditional_response, requested_fields, shape_rows, shape_dict
+
+logger = get_logger('app')
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": [
@@ -10,6 +23,66 @@ CORS(app, resources={r"/*": {"origins": [
     "http://localhost:3000"
 ]}})
 scraper_service = ScraperService()
+comparison_service = ComparisonService(dataset_builder)
+menu_crawler = MenuCrawler(scraper_service.scrapers, dataset_builder.menu_store,
+                           scheduler=scraper_service.scheduler, breakers=scraper_service.breakers)
+metrics.gauge_callback('dataset_queue_depth', dataset_builder.data_queue.qsize)
+
+# How long clients and CDNs may reuse /dataset/stats (Cache-Control max-age)
+STATS_TTL_SECONDS = int(os.environ.get('STATS_TTL_SECONDS', '60'))
+
+# Shared secret for X-Verbose-Logs; without it the header is ignored
+VERBOSE_LOGS_KEY = os.environ.get('VERBOSE_LOGS_KEY', '')
+# Shared secret (X-Admin-Key) for maintenance endpoints; without it they are disabled
+ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY', '')
+
+# Scrapers load on first use; PRELOAD_SCRAPERS=1 imports them up front instead,
+# e.g. in a gunicorn --preload master so workers share those pages
+if os.environ.get('PRELOAD_SCRAPERS') == '1':
+    scraper_service.scrapers.load_all()
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.before_request
+def enable_verbose_logging():
+    # DEBUG logs for this request only, for callers that know VERBOSE_LOGS_KEY
+    header = request.headers.get('X-Verbose-Logs', '')
+    if VERBOSE_LOGS_KEY and hmac.compare_digest(header.encode(), VERBOSE_LOGS_KEY.encode()):
+        g.verbose_token = set_verbose(True)
+
+
+def admin_key_valid() -> bool:
+    """Whether the request carries ADMIN_API_KEY (never, when none is configured)"""
+    header = request.headers.get('X-Admin-Key', '')
+    return bool(ADMIN_API_KEY) and hmac.compare_digest(header.encode(), ADMIN_API_KEY.encode())
+
+
+@app.before_request
+def ensure_database():
+    # Schema setup happens in the first request of each worker, not at import
+    dataset_builder.ensure_database()
+
+
+@app.teardown_request
+def disable_verbose_logging(exc=None):
+    if 'verbose_token' in g:
+        reset_verbose(g.verbose_token)
+
+
+@app.after_request
+def record_request_metrics(response):
+    # Route templates, not raw paths, keep label cardinality bounded
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.inc('http_requests_total', endpoint=endpoint,
+                method=request.method, status=str(response.status_code))
+    if 'request_start' in g:
+        metrics.observe('http_request_duration_seconds',
+                        time.perf_counter() - g.request_start, endpoint=endpoint)
+    return response
 
 
 @app.route('/', methods=['GET'])
@@ -19,8 +92,18 @@ def index():
         "message": "Khabo ki? Web Scraper API is running",
         "endpoints": {
             "/scrape": "POST - Scrape food delivery platforms",
+            "/compare": "GET - Compare restaurants across platforms for an area",
+            "/search": "GET - Search restaurants and dishes by keyword",
+            "/debug/phases": "GET - Per-phase scrape timing histograms",
+            "/metrics": "GET - Prometheus metrics",
+            "/platforms/status": "GET - Circuit breaker state per platform",
             "/dataset/export": "GET - Export dataset",
-            "/dataset/stats": "GET - Get dataset statistics"
+            "/dataset/stats": "GET - Get dataset statistics",
+            "/dataset/resolve-groups": "POST - Match restaurants across platforms",
+            "/dataset/crawl-menus": "POST - Crawl menus of stored restaurants",
+            "/dataset/menu": "GET - Stored menu of a restaurant",
+            "/dataset/trends": "GET - Rating, fee, ETA or offer history of a restaurant or area",
+            "/dataset/compact-history": "POST - Fold old observations into rollups (X-Admin-Key)"
         }
     })
 
@@ -35,29 +118,42 @@ def scrape():
         "lat": 23.82257,
         "lng": 90.39329,
         "text": "location name",
+        "deadline_seconds": 60,
         "filters": {
             "cuisine": "...",
             "price_range": "...",
             "dietary": "...",
+            "harvest": true,            # scroll until no new restaurants appear
+            "max_restaurants": 300,     # harvest limit
             ...
         }
     }
+
+    Optional query param fields=name,rating,... projects each restaurant.
+    Responses are gzip/brotli compressed per Accept-Encoding, and sent as
+    MessagePack for Accept: application/msgpack.
     """
     if not request.json:
         return jsonify({"error": "Invalid request format"}), 400
 
     try:
         # Parse the request data
-        print("Received request data:", request.json)
+        logger.debug("Received request data: %s", request.json)
         data = request.json
         if 'lat' not in data or 'lng' not in data:
             return jsonify({"error": "Missing required location parameters (lat, lng)"}), 400
 
         # Create scrape request object
         scrape_request = ScrapeRequest.from_dict(data)
+        # The client may shorten the budget, never extend it
+        try:
+            scrape_request.deadline_seconds = ScrapeRequest.parse_deadline(
+                scrape_request.deadline_seconds, DEFAULT_DEADLINE_SECONDS)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         # # Execute the scrape
-        results = scraper_service.scrape(scrape_request)
+        results, platform_status = scraper_service.scrape_with_status(scrape_request)
 
         # response_data = {
         #     "results": {
@@ -958,9 +1054,15 @@ def scrape():
         #     # "re": results
         # }
 
+        # ?fields=name,rating,... trims every restaurant; empty menu_items are dropped
+        fields = requested_fields()
         response_data = {
             "success": True,
-            "results": results
+            # Failed platforms carry an {"error": ...} payload, passed through as is
+            "results": {platform: shape_rows(rows, fields) if isinstance(rows, list) else rows
+                        for platform, rows in results.items()},
+            "platform_status": platform_status,
+            "truncated": any(status.get("truncated") for status in platform_status.values())
         }
 
         # Add to dataset in background (non-blocking)
@@ -972,8 +1074,39 @@ def scrape():
         # except Exception as dataset_error:
         #     print(f"[DATASET] Error queuing data: {dataset_error}")
 
-        return jsonify(response_data)
+        return api_response(response_data)
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 
+@app.route('/compare', methods=['GET'])
+def compare():
+    """
+    Compare the same restaurants across platforms for an area
+
+    Query params: lat, lng, radius_km (optional, default 2)
+    Served from the stored dataset, never from a live scrape. Responses carry
+    a per-tile ETag; If-None-Match is answered with 304 while it is current.
+    """
+    try:
+        lat = float(request.args['lat'])
+        lng = float(request.args['lng'])
+        radius_km = float(request.args.get('radius_km', 2))
+    except (KeyError, ValueError):
+        return jsonify({"error": "Missing or invalid location parameters (lat, lng)"}), 400
+
+    try:
+        # Read once: the ETag and the tile cache must agree on the version
+        version = dataset_builder.data_version
+        return conditional_response(
+            ('compare', tile_of(lat, lng), radius_km),
+            version,
+            comparison_service.ttl_seconds,
+            lambda: {"success": True, **comparison_service.compare_area(lat, lng, radius_km, version)})
     except Exception as e:
         return jsonify({
             "success": False,
@@ -981,6 +1114,63 @@ def scrape():
         }), 500
 
 
+@app.route('/search', methods=['GET'])
+def search():
+    """
+    Search stored restaurants and dishes by keyword
+
+    Query params: q, lat and lng (optional), radius_km (default 5), limit (default 20),
+    fields (optional, comma separated)
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing required parameter (q)"}), 400
+
+    try:
+        lat = request.args.get('lat', type=float)
+        lng = request.args.get('lng', type=float)
+        radius_km = request.args.get('radius_km', 5, type=float)
+        limit = min(request.args.get('limit', 20, type=int), 100)
+
+        results = dataset_builder.search_index.search(
+            query, lat, lng, radius_km, limit)
+        return api_response({
+            "success": True,
+            "query": query,
+            "count": len(results),
+            "results": shape_rows(results, requested_fields())
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/platforms/status', methods=['GET'])
+def platform_status():
+    """Circuit breaker state, failure rate, adaptive timeout, rate limits and selector stats per platform"""
+    return jsonify({
+        "success": True,
+        "platforms": scraper_service.get_platform_status()
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition, summed across gunicorn workers when METRICS_DIR is set"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/debug/phases', methods=['GET'])
+def phase_timings():
+    """Per-platform, per-phase timing histograms collected by the tracer"""
+    return jsonify({
+        "success": True,
+        "phases": tracer.phase_summary()
+    })
+
+
 @app.route('/dataset/export', methods=['GET'])
 def export_dataset():
     """Export the dataset"""
@@ -994,19 +1184,179 @@ def export_dataset():
 
 @app.route('/dataset/stats', methods=['GET'])
 def dataset_stats():
-    """Get dataset statistics"""
-    try:
-        print("[DEBUG] dataset_stats endpoint called")
+    """Get dataset statistics (optional ?fields= to select top-level keys), with an ETag"""
+    def build():
         stats = dataset_builder.get_stats()
-        print(f"[DEBUG] Stats result: {stats}")
-        return jsonify(stats)
+        logger.debug("Stats result: %s", stats)
+        return shape_dict(stats, requested_fields())
+
+    try:
+        logger.debug("dataset_stats endpoint called")
+        return conditional_response(
+            'dataset_stats', dataset_builder.data_version, STATS_TTL_SECONDS, build)
     except Exception as e:
-        print(f"[ERROR] Error in dataset_stats: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in dataset_stats: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/dataset/resolve-groups', methods=['POST'])
+def resolve_groups():
+    """Match stored listings of the same restaurant across platforms"""
+    try:
+        result = dataset_builder.resolve_restaurant_groups()
+        return jsonify({
+            "success": True,
+            "message": "Restaurant groups resolved",
+            "result": result
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/dataset/crawl-menus', methods=['POST'])
+def crawl_menus():
+    """
+    Start an opt-in menu crawl in the background
+
+    Optional POST data:
+    {
+        "platform": "foodpanda",
+        "limit": 50,
+        "max_age_hours": 24
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        targets = dataset_builder.menu_store.get_crawl_targets(
+            platform=data.get('platform'),
+            limit=int(data.get('limit', 50)),
+            max_age_hours=float(data.get('max_age_hours', 24))
+        )
+        if not targets:
+            return jsonify({
+                "success": True,
+                "message": "All menus are up to date",
+                "queued": 0
+            })
+
+        if not menu_crawler.crawl_in_background(targets):
+            return jsonify({
+                "success": False,
+                "error": "A menu crawl is already running",
+                "last_stats": menu_crawler.last_stats
+            }), 409
+
+        return jsonify({
+            "success": True,
+            "message": "Menu crawl started",
+            "queued": len(targets)
+        }), 202
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/dataset/menu', methods=['GET'])
+def restaurant_menu():
+    """Get the stored menu of a restaurant by its platform URL"""
+    url = request.args.get('url')
+    if not url:
+        return jsonify({"error": "Missing required parameter (url)"}), 400
+
+    try:
+        items = dataset_builder.menu_store.get_menu(url)
+        return api_response({
+            "success": True,
+            "url": url,
+            "menu_items": shape_rows(items, requested_fields())
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/dataset/trends', methods=['GET'])
+def trends():
+    """
+    History of one value for a restaurant or a service area
+
+    Query params: metric (rating, review_count, fee, eta_min, eta_max, offers),
+    restaurant_id or lat and lng, days (default 30)
+    With restaurant_id, lat/lng narrow it to one service area; without it the
+    daily mean over the area's restaurants is returned.
+    """
+    metric = request.args.get('metric', 'fee')
+    restaurant_id = request.args.get('restaurant_id', type=int)
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    days = min(request.args.get('days', 30, type=int), 366)
+    if restaurant_id is None and (lat is None or lng is None):
+        return jsonify({"error": "Missing required parameters (restaurant_id or lat, lng)"}), 400
+
+    try:
+        observations = dataset_builder.observations
+        if restaurant_id is not None:
+            series = observations.restaurant_trend(restaurant_id, metric, days, lat, lng)
+        else:
+            series = observations.tile_trend(lat, lng, metric, days)
+        return api_response({
+            "success": True,
+            "metric": metric,
+            "count": len(series),
+            "series": series
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/dataset/compact-history', methods=['POST'])
+def compact_history():
+    """
+    Fold raw observations older than raw_days into rollups, drop expired rollups
+
+    Optional POST data:
+    {
+        "raw_days": 7,
+        "resolution": "hour",       # or "day"
+        "retention_days": 365
+    }
+
+    Requires the X-Admin-Key header. Ingestion already compacts every
+    OBSERVATION_COMPACT_HOURS; this runs it now, with other settings.
+    """
+    if not admin_key_valid():
+        return jsonify({"error": "Forbidden"}), 403
+
+    try:
+        data = request.get_json(silent=True) or {}
+        observations = dataset_builder.observations
+        result = observations.compact(
+            raw_days=int(data.get('raw_days', history_service.RAW_DAYS)),
+            resolution=data.get('resolution', history_service.ROLLUP_RESOLUTION),
+            retention_days=int(data.get('retention_days', history_service.RETENTION_DAYS))
+        )
+        return jsonify({"success": True, **result})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
 @app.route('/migrate-database', methods=['GET'])
 def migrate_database():
     """Migrate existing database to new quality standards"""
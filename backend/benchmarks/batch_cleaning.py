@@ -0,0 +1,145 @@
+"""
+Throughput benchmark for the batch cleaning stage.
+
+Compares the original per-record cleaning rules (clean_record, kept here
+as the reference BatchCleaner is tested against) with BatchCleaner
+(pure-Python columns, and pandas when installed) over synthetic scrape
+results.
+
+Usage (from backend/):
+    python -m benchmarks.batch_cleaning --records 100000
+"""
+import argparse
+import random
+import time
+
+from utils.BatchCleaner import BatchCleaner, load_pandas
+
+CUISINES = ['Pizza', 'burger', 'Biryani', 'Chinese', 'Fast Food', 'Not specified', 'unknown', '']
+RATINGS = ['4.2(96)', '3.1(15)', '0', 'No rating', '4.8(5000+)', '']
+TIMES = ['5 - 15 min', '30-45 min', 'Unknown', '']
+FEES = ['Tk78', '37 tk', 'Unknown', '৳40', '']
+
+
+def make_results(count, seed=42):
+    """Build a {platform: [restaurant dicts]} scrape result with ~15% bad rows"""
+    rng = random.Random(seed)
+    results = {'foodpanda': [], 'foodi': []}
+
+    for index in range(count):
+        platform = 'foodpanda' if index % 2 else 'foodi'
+        roll = rng.random()
+        results[platform].append({
+            'name': 'Unknown Restaurant' if roll < 0.03 else f"  Restaurant {index} - Mirpur  ",
+            'url': 'null' if 0.03 <= roll < 0.06 else f"https://example.com/restaurant/{index}",
+            'image_url': ('https://via.placeholder.com/300x200' if 0.06 <= roll < 0.10
+                          else f"https://images.example.com/{index}.jpg"),
+            'cuisine_type': rng.choice(CUISINES),
+            'rating': rng.choice(RATINGS),
+            'delivery_time': rng.choice(TIMES),
+            'delivery_fee': rng.choice(FEES),
+            'platform': platform,
+            'offers': [],
+            'menu_items': []
+        })
+
+    return results
+
+
+def clean_record(restaurant, platform, lat, lng):
+    """One restaurant dict cleaned the original way, or None if it is rejected"""
+    name = restaurant.get('name', '').strip()
+    if not name or name == "Unknown Restaurant" or "unknown" in name.lower():
+        return None
+
+    url = restaurant.get('url', '').strip()
+    if not url or url.lower() in ['null', 'none', '', 'not available']:
+        return None
+
+    image_url = restaurant.get('image_url', '').strip()
+    if (not image_url or
+        image_url.lower() in ['null', 'none', '', 'not available'] or
+        'placeholder' in image_url.lower() or
+            image_url == 'https://'):
+        return None
+
+    cuisine_type = restaurant.get('cuisine_type', '').strip()
+    if not cuisine_type or cuisine_type.lower() in ['not specified', 'unknown', '', 'null']:
+        return None
+    cuisine_type = cuisine_type.title()
+
+    rating = restaurant.get('rating', '').strip()
+    if not rating or rating.lower() in ['no rating', '0', 'unknown', '', 'null']:
+        rating = 'Not Reviewed'
+
+    delivery_time = restaurant.get('delivery_time', '').strip()
+    delivery_fee = restaurant.get('delivery_fee', '').strip()
+    if delivery_time.lower() in ['unknown', 'not specified', '', 'null']:
+        delivery_time = ''
+    if delivery_fee.lower() in ['unknown', 'not specified', '', 'null']:
+        delivery_fee = ''
+
+    return {
+        'name': name,
+        'cuisine_type': cuisine_type,
+        'image_url': image_url,
+        'url': url,
+        'platform': platform.lower(),
+        'rating': rating,
+        'restaurant_lat': round(lat, 6),
+        'restaurant_lng': round(lng, 6),
+        'delivery_time': delivery_time,
+        'delivery_fee': delivery_fee,
+        'offers': list(restaurant.get('offers') or []),
+        'service_area_lat': round(lat, 4),
+        'service_area_lng': round(lng, 4)
+    }
+
+
+def clean_per_record(results, lat, lng):
+    """The original one-dict-at-a-time path"""
+    cleaned = []
+    for platform, restaurants in results.items():
+        for restaurant in restaurants:
+            row = clean_record(restaurant, platform, lat, lng)
+            if row:
+                cleaned.append(row)
+    return cleaned
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    output = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {count / elapsed:>12,.0f} records/s")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+
+    lat, lng = 23.82257, 90.39329
+    results = make_results(args.records)
+
+    print(f"Cleaning {args.records:,} synthetic records")
+    legacy = timed('per-record (legacy)', args.records,
+                   lambda: clean_per_record(results, lat, lng))
+
+    columnar, rejected = timed('batch (python columns)', args.records,
+                               lambda: BatchCleaner(use_pandas=False).clean(results, lat, lng))
+
+    if load_pandas() is not None:
+        vectorized, _ = timed('batch (pandas)', args.records,
+                              lambda: BatchCleaner(use_pandas=True).clean(results, lat, lng))
+        assert vectorized == columnar, "pandas and python paths disagree"
+    else:
+        print(f"{'batch (pandas)':<28} skipped, pandas not installed")
+
+    assert columnar == legacy, "batch cleaning disagrees with the per-record path"
+    print(f"Kept {len(columnar):,} records, rejected: {rejected}")
+
+
+if __name__ == '__main__':
+    main()
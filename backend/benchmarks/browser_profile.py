@@ -0,0 +1,123 @@
+"""
+Page-weight benchmark for the lean browser profile.
+
+Loads each platform's listing page with the lean profile off and on and
+reports bytes transferred (sum of encodedDataLength from Chrome's
+performance log), page load time (navigation timing) and the RSS of the
+whole chromedriver/Chrome process tree right after the load.
+
+Needs Chrome and network access; RSS is read from /proc, so Linux only.
+
+Usage (from backend/):
+    python -m benchmarks.browser_profile --runs 3 --platforms foodpanda foodi
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from utils.FoodPandaScraper import FoodPandaScraper
+from utils.FoodiScraper import FoodiScraper
+
+SCRAPERS = {'foodpanda': FoodPandaScraper, 'foodi': FoodiScraper}
+LISTING_URLS = {
+    'foodpanda': 'https://www.foodpanda.com.bd/restaurants/new?lng={lng}&lat={lat}&vertical=restaurants',
+    'foodi': 'https://foodibd.com/restaurants?type=delivery',
+}
+
+
+def process_tree(pid):
+    """pid plus all its descendants, from /proc/<pid>/task/*/children"""
+    pids = [pid]
+    for current in pids:
+        task_dir = f"/proc/{current}/task"
+        try:
+            tasks = os.listdir(task_dir)
+        except OSError:
+            continue
+        for task in tasks:
+            try:
+                with open(f"{task_dir}/{task}/children") as handle:
+                    pids.extend(int(child) for child in handle.read().split())
+            except OSError:
+                pass
+    return pids
+
+
+def rss_bytes(pid):
+    total = 0
+    for current in process_tree(pid):
+        try:
+            with open(f"/proc/{current}/status") as handle:
+                for line in handle:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            pass
+    return total
+
+
+def transferred_bytes(driver):
+    """Bytes received over the network for every finished request"""
+    total = 0
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        if message.get('method') == 'Network.loadingFinished':
+            total += message['params'].get('encodedDataLength', 0)
+    return total
+
+
+def load_once(platform, lean, url, settle_seconds):
+    scraper = SCRAPERS[platform]()
+    scraper.lean_browser = lean
+    scraper.browser_capabilities = {'goog:loggingPrefs': {'performance': 'ALL'}}
+
+    driver = scraper._create_driver()
+    try:
+        start = time.perf_counter()
+        driver.get(url)
+        wall = time.perf_counter() - start
+        # Give client-side rendering time to pull the restaurant list
+        time.sleep(settle_seconds)
+
+        timing = driver.execute_script(
+            "const nav = performance.getEntriesByType('navigation')[0];"
+            "return nav ? nav.loadEventEnd - nav.startTime : null;"
+        )
+        return {
+            'bytes': transferred_bytes(driver),
+            'load_seconds': timing / 1000 if timing else wall,
+            'rss': rss_bytes(driver.service.process.pid),
+        }
+    finally:
+        driver.quit()
+
+
+def report(platform, label, samples):
+    median = lambda key: statistics.median(sample[key] for sample in samples)
+    print(f"{platform:<10} {label:<5} {median('bytes') / 1024:>12,.0f} KiB"
+          f"  {median('load_seconds'):>7.2f}s  {median('rss') / 2 ** 20:>8,.0f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--platforms', nargs='+', default=list(SCRAPERS), choices=list(SCRAPERS))
+    parser.add_argument('--lat', type=float, default=23.82257)
+    parser.add_argument('--lng', type=float, default=90.39329)
+    parser.add_argument('--settle', type=float, default=5.0,
+                        help="seconds to wait after load before measuring")
+    args = parser.parse_args()
+
+    print(f"{'platform':<10} {'lean':<5} {'transferred':>16}  {'load':>8}  {'rss':>12}  (median of {args.runs})")
+    for platform in args.platforms:
+        url = LISTING_URLS[platform].format(lat=args.lat, lng=args.lng)
+        for lean in (False, True):
+            samples = [load_once(platform, lean, url, args.settle) for _ in range(args.runs)]
+            report(platform, 'on' if lean else 'off', samples)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Memory and serialization benchmark for the restaurant models.
+
+Compares the previous plain-class Restaurant/MenuItem (per-instance
+__dict__, to_dict() then json.dumps) with the slotted dataclasses
+serialized directly through utils.fastjson, and with RestaurantBatch.
+
+Usage (from backend/):
+    python -m benchmarks.models --records 100000
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from models.MenuItem import MenuItem
+from models.Restaurant import Restaurant
+from models.RestaurantBatch import RestaurantBatch
+from utils import fastjson
+
+
+class LegacyMenuItem:
+    def __init__(self, name, description, price, image_url=None, category=None):
+        self.name = name
+        self.description = description
+        self.price = price
+        self.image_url = image_url
+        self.category = category
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "description": self.description,
+            "price": self.price,
+            "image_url": self.image_url,
+            "category": self.category
+        }
+
+
+class LegacyRestaurant:
+    def __init__(self, name, cuisine_type, rating, delivery_time, delivery_fee, platform, offers=[], image_url=None, url=None):
+        self.name = name
+        self.cuisine_type = cuisine_type
+        self.rating = rating
+        self.delivery_time = delivery_time
+        self.delivery_fee = delivery_fee
+        self.platform = platform
+        self.image_url = image_url
+        self.url = url
+        self.offers = offers
+        self.menu_items = []
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "cuisine_type": self.cuisine_type,
+            "rating": self.rating,
+            "delivery_time": self.delivery_time,
+            "delivery_fee": self.delivery_fee,
+            "platform": self.platform,
+            "image_url": self.image_url,
+            "url": self.url,
+            "offers": self.offers,
+            "menu_items": [item.to_dict() for item in self.menu_items]
+        }
+
+
+def make_rows(count, seed=42):
+    """Scraped-looking field values; strings are rebuilt per row like a parser would"""
+    rng = random.Random(seed)
+    cuisines = ['Pizza', 'Burger', 'Biryani', 'Chinese', 'Fast Food', 'Bangladeshi']
+    rows = []
+    for index in range(count):
+        rows.append((
+            f"Restaurant {index} - Mirpur",
+            ''.join(rng.choice(cuisines)),
+            f"4.{rng.randint(0, 9)}({rng.randint(1, 50) * 100}+)",
+            f"{rng.choice([25, 30, 40])}-{rng.choice([45, 55, 60])} min",
+            f"Tk{rng.choice([29, 49, 78])}",
+            ''.join(rng.choice(['FoodPanda', 'Foodi'])),
+            [f"{rng.choice([10, 15, 20])}% off"] if rng.random() < 0.4 else [],
+            f"https://images.example.com/{index}.jpg",
+            f"https://example.com/restaurant/{index}",
+        ))
+    return rows
+
+
+def build_legacy(rows):
+    return [LegacyRestaurant(*row) for row in rows]
+
+
+def build_slotted(rows):
+    return [Restaurant(*row) for row in rows]
+
+
+def build_batch(rows):
+    return RestaurantBatch.from_restaurants(Restaurant(*row) for row in rows)
+
+
+def measure_memory(label, build, rows):
+    gc.collect()
+    tracemalloc.start()
+    objects = build(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {current / 2 ** 20:8.1f} MiB  {current / len(rows):8.0f} B/record")
+    return objects
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    output = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {count / elapsed:>12,.0f} records/s  {len(output) / 2 ** 20:6.1f} MiB")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.records)
+    print(f"Memory for {args.records:,} restaurants (objects only, field values excluded)")
+    legacy = measure_memory('legacy classes', build_legacy, rows)
+    slotted = measure_memory('slotted dataclasses', build_slotted, rows)
+    batch = measure_memory('RestaurantBatch', build_batch, rows)
+
+    # Menus are serialized too; give a few restaurants one so that path is exercised
+    for index in range(0, args.records, 50):
+        legacy[index].menu_items = [LegacyMenuItem('Kacchi', 'Mutton', 'Tk 350', category='Rice')]
+        slotted[index].menu_items = [MenuItem('Kacchi', 'Mutton', 'Tk 350', category='Rice')]
+    batch = RestaurantBatch.from_restaurants(slotted)
+
+    print(f"\nSerialization (orjson {'installed' if fastjson.orjson else 'not installed'})")
+    reference = timed('legacy to_dict + json', args.records,
+                      lambda: json.dumps([r.to_dict() for r in legacy], ensure_ascii=False).encode('utf-8'))
+    direct = timed('slotted via fastjson', args.records, lambda: fastjson.dumps(slotted))
+    records = timed('batch records via fastjson', args.records, lambda: fastjson.dumps(batch.to_dicts()))
+    timed('batch columns via fastjson', args.records, lambda: fastjson.dumps(batch.to_columns()))
+
+    expected = json.loads(reference)
+    for label, output in (('slotted', direct), ('batch', records)):
+        assert json.loads(output) == expected, f"{label} output differs from the legacy models"
+
+
+if __name__ == '__main__':
+    main()
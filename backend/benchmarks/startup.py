@@ -0,0 +1,148 @@
+"""
+Import and worker boot time benchmark for app.py.
+
+Every measurement runs in a fresh interpreter, against a copy of
+dataset/ in a temporary directory so the real database is untouched:
+
+- import: time to `import app`
+- first boot: interpreter start to first /dataset/stats response, on a
+  database that still needs its schema set up
+- warm boot: the same once the schema version is recorded
+- gunicorn (if installed): master start to first response, with and
+  without --preload
+
+Usage (from backend/):
+    python -m benchmarks.startup --runs 5 --importtime
+"""
+import argparse
+import os
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start)
+"""
+
+BOOT_SCRIPT = """
+import app
+response = app.app.test_client().get('/dataset/stats')
+assert response.status_code == 200, response.status_code
+"""
+
+
+def run_python(script, cwd, extra_args=()):
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, LOG_LEVEL='WARNING')
+    return subprocess.run([sys.executable, *extra_args, '-c', script], cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def fresh_workdir(root, reset_schema):
+    """Copy of dataset/ to run in; reset_schema forces setup_database() on first use"""
+    workdir = tempfile.mkdtemp(dir=root)
+    shutil.copytree(os.path.join(BACKEND_DIR, 'dataset'), os.path.join(workdir, 'dataset'))
+    if reset_schema:
+        with sqlite3.connect(os.path.join(workdir, 'dataset', 'restaurants.db')) as conn:
+            conn.execute('PRAGMA user_version = 0')
+    return workdir
+
+
+def time_boot(workdir):
+    start = time.perf_counter()
+    run_python(BOOT_SCRIPT, workdir)
+    return time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def time_gunicorn(workdir, workers, preload, timeout=60):
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}']
+    if preload:
+        command.append('--preload')
+    command.append('app:app')
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, LOG_LEVEL='WARNING')
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=workdir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/dataset/stats', timeout=1):
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError('gunicorn did not answer in time')
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def report(label, samples):
+    print(f"{label:<26} median {statistics.median(samples) * 1000:8.1f} ms"
+          f"   min {min(samples) * 1000:8.1f} ms")
+
+
+def print_importtime(workdir, top=12):
+    """Slowest modules by cumulative import time (python -X importtime)"""
+    output = run_python('import app', workdir, ('-X', 'importtime')).stderr
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), name.strip()))
+    print("\nSlowest imports (cumulative):")
+    for cumulative_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--importtime', action='store_true',
+                        help="also list the slowest imports")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        workdir = fresh_workdir(root, reset_schema=False)
+        report('import app', [float(run_python(IMPORT_SCRIPT, workdir).stdout)
+                              for _ in range(args.runs)])
+
+        report('first boot (schema setup)',
+               [time_boot(fresh_workdir(root, reset_schema=True)) for _ in range(args.runs)])
+        time_boot(workdir)
+        report('warm boot', [time_boot(workdir) for _ in range(args.runs)])
+
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            print(f"{'gunicorn':<26} skipped, gunicorn not installed")
+        else:
+            for preload in (False, True):
+                label = f"gunicorn -w {args.workers}" + (' --preload' if preload else '')
+                report(label, [time_gunicorn(workdir, args.workers, preload) for _ in range(args.runs)])
+
+        if args.importtime:
+            print_importtime(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""
+Grid crawler: scrape every tile of a bounding box into the dataset.
+
+Tiles of --step-km are laid over the box and scraped --concurrency at a
+time through ScraperService; results are written through DatasetBuilder
+like a /scrape would be. Progress is checkpointed per tile in SQLite, so
+rerunning the same command after a crash or Ctrl-C resumes where it
+stopped. Tiles/hour and restaurants/hour are logged as it goes. Request
+rates per platform are paced by the politeness scheduler, whose budget is
+shared with the API workers (see utils/PolitenessScheduler.py), so a
+higher --concurrency only helps up to the platforms' limits.
+
+With --adaptive the box starts as coarse tiles and a tile is split into
+four (down to --min-step-km) when its listing looks truncated: a platform
+returned as many cards as it shows, or the tile had --split-at or more
+restaurants. Tiles that found no vendor new to the run are not split.
+
+Usage (from backend/):
+    python -m crawler --bbox 23.70,90.33,23.90,90.45 --step-km 1 --concurrency 2
+    python -m crawler --bbox ... --step-km 1 --harvest --max-restaurants 300
+    python -m crawler --bbox ... --step-km 4 --adaptive --min-step-km 0.5
+"""
+import argparse
+import os
+import threading
+import time
+
+from crawler.checkpoint import CrawlCheckpoint
+from crawler.grid import grid_tiles, parse_bbox
+from crawler.planner import QuadtreePlanner
+from models.ScrapeRequest import ScrapeRequest
+from services.data_collection_service import dataset_builder
+from services.scraper_service import SCRAPER_CLASSES, ScraperService
+from utils.log import get_logger
+
+logger = get_logger('crawler')
+
+CHECKPOINT_DB = os.environ.get('CRAWL_CHECKPOINT_DB', 'dataset/crawl_checkpoint.db')
+# How often an idle worker looks for tiles queued by a split still in flight
+IDLE_POLL_SECONDS = 2.0
+
+
+class CrawlStats:
+    """Tiles and restaurants done by this process, for throughput reporting"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.claimed = 0
+        self.tiles = 0
+        self.failed = 0
+        self.split = 0
+        self.restaurants = 0
+
+    def reserve(self, limit: int) -> bool:
+        """Count a tile about to be claimed; False once `limit` (0: none) is reached"""
+        with self.lock:
+            if limit and self.claimed >= limit:
+                return False
+            self.claimed += 1
+            return True
+
+    def unreserve(self):
+        """Give back a reservation that did not turn into a tile"""
+        with self.lock:
+            self.claimed -= 1
+
+    def add(self, restaurants: int, failed: bool, split: bool = False):
+        with self.lock:
+            self.tiles += 1
+            self.failed += failed
+            self.split += split
+            self.restaurants += restaurants
+
+    def rates(self):
+        hours = max(time.monotonic() - self.started, 1e-9) / 3600
+        return self.tiles / hours, self.restaurants / hours
+
+
+def card_cap(scraper_service, platform, args):
+    """Most cards a scrape of `platform` can return with these args (None: unknown)"""
+    if args.harvest:
+        return args.max_restaurants
+    return getattr(scraper_service.scrapers[platform], 'card_cap', None)
+
+
+def crawl_tile(scraper_service, lat, lng, args, ingest_lock):
+    """
+    (restaurants per platform, capped, error or None) for one tile, ingested
+    into the dataset. capped is True when some platform's listing was cut
+    short: it hit the card cap or the scrape ran out of time.
+    """
+    filters = {}
+    if args.harvest:
+        filters.update(harvest=True, max_restaurants=args.max_restaurants)
+    scrape_request = ScrapeRequest(lat, lng, '', filters, args.deadline_seconds)
+
+    results, platform_status = scraper_service.scrape_with_status(scrape_request)
+    # A platform stopped before it returned anything (deadline, rate limit) is
+    # a failure to retry, not an empty tile
+    stopped = {platform: status.get('reason', 'stopped') for platform, status in platform_status.items()
+               if status.get('truncated') and not results.get(platform)}
+    found = {platform: rows for platform, rows in results.items()
+             if isinstance(rows, list) and platform not in stopped}
+    errors = {platform: rows['error'] for platform, rows in results.items()
+              if isinstance(rows, dict) and 'error' in rows}
+    errors.update(stopped)
+    if not found:
+        error = '; '.join(f"{platform}: {error}" for platform, error in errors.items())
+        return {}, False, error or 'no results'
+
+    capped = False
+    for platform, rows in found.items():
+        cap = card_cap(scraper_service, platform, args)
+        if (cap and len(rows) >= cap) or platform_status.get(platform, {}).get('truncated'):
+            capped = True
+
+    # Scrapes overlap, writes go one at a time
+    with ingest_lock:
+        dataset_builder.ingest({'success': True, 'results': found}, lat, lng)
+    return found, capped, None
+
+
+def vendor_keys(found):
+    """(platform, url) of every restaurant in a tile's results, name when there is no url"""
+    return [(platform, restaurant.get('url') or restaurant.get('name') or '')
+            for platform, rows in found.items() for restaurant in rows]
+
+
+def worker(scraper_service, checkpoint, run, args, stats, stop, ingest_lock, planner=None):
+    while not stop.is_set():
+        if not stats.reserve(args.limit):
+            return
+        tile = checkpoint.claim(run, args.max_attempts)
+        if tile is None:
+            stats.unreserve()
+            # Tiles still being crawled may be split into new ones; only stop
+            # once nothing is pending or running
+            if not checkpoint.progress(run).get('running'):
+                return
+            stop.wait(IDLE_POLL_SECONDS)
+            continue
+        position, lat, lng, step_km = tile
+        step_km = step_km or args.step_km
+        try:
+            found, capped, error = crawl_tile(scraper_service, lat, lng, args, ingest_lock)
+        except Exception as e:
+            found, capped, error = {}, False, str(e)
+        restaurants = sum(len(rows) for rows in found.values())
+
+        new_vendors = None
+        split = False
+        if not error:
+            new_vendors = checkpoint.record_vendors(run, vendor_keys(found))
+            if planner and planner.should_split(step_km, restaurants, new_vendors, capped):
+                # Queue the quadrants before marking the tile done, so a crash
+                # in between re-crawls the tile instead of losing them
+                checkpoint.add_children(run, position, planner.children(lat, lng, step_km), step_km / 2)
+                split = True
+        checkpoint.finish(run, position, restaurants, error, new_vendors)
+        stats.add(restaurants, bool(error), split)
+
+        tiles_per_hour, restaurants_per_hour = stats.rates()
+        if error:
+            logger.warning("Tile %s (%.4f, %.4f) failed: %s", position, lat, lng, error)
+        else:
+            logger.info("Tile %s (%.4f, %.4f, %gkm): %s restaurants, %s new%s", position, lat, lng,
+                        step_km, restaurants, new_vendors, ', split' if split else '')
+        if stats.tiles % args.report_every == 0:
+            logger.info("%s tiles this run, %.0f tiles/hour, %.0f restaurants/hour",
+                        stats.tiles, tiles_per_hour, restaurants_per_hour)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bbox', required=True, help="min_lat,min_lng,max_lat,max_lng")
+    parser.add_argument('--step-km', type=float, default=1.0)
+    parser.add_argument('--concurrency', type=int, default=2, help="tiles scraped at once")
+    parser.add_argument('--max-attempts', type=int, default=3, help="tries per tile before giving up")
+    parser.add_argument('--limit', type=int, default=0, help="stop after this many tiles (0: all)")
+    parser.add_argument('--deadline-seconds', type=float, default=None)
+    parser.add_argument('--harvest', action='store_true', help="scroll until no new restaurants load")
+    parser.add_argument('--max-restaurants', type=int, default=300, help="harvest limit per tile")
+    parser.add_argument('--report-every', type=int, default=10, help="log throughput every N tiles")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="split tiles whose listing looks truncated into quadrants")
+    parser.add_argument('--min-step-km', type=float, default=0.5, help="smallest adaptive tile")
+    parser.add_argument('--split-at', type=int, default=40,
+                        help="adaptive: split tiles with at least this many restaurants")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_DB)
+    parser.add_argument('--dry-run', action='store_true', help="only print the tile plan")
+    args = parser.parse_args()
+
+    bbox = parse_bbox(args.bbox)
+    tiles = grid_tiles(bbox, args.step_km)
+    if args.dry_run:
+        for lat, lng in tiles:
+            print(f"{lat:.4f},{lng:.4f}")
+        print(f"{len(tiles)} tiles")
+        return
+
+    checkpoint = CrawlCheckpoint(args.checkpoint)
+    run = checkpoint.run_key(bbox, args.step_km, args.adaptive)
+    progress = checkpoint.start(run, tiles, args.step_km)
+    planner = QuadtreePlanner(bbox, args.min_step_km, args.split_at) if args.adaptive else None
+    logger.info("Run %s: %s tiles, %s done, %s failed", run, progress['total'],
+                progress.get('done', 0), progress.get('failed', 0))
+
+    dataset_builder.ensure_database()
+    # Every tile scrapes all platforms at once
+    scraper_service = ScraperService(max_workers=args.concurrency * len(SCRAPER_CLASSES))
+    stats = CrawlStats()
+    stop = threading.Event()
+    ingest_lock = threading.Lock()
+    threads = [threading.Thread(target=worker, daemon=True,
+                                args=(scraper_service, checkpoint, run, args, stats, stop, ingest_lock,
+                                      planner))
+               for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        # In-flight tiles stay 'running' and are requeued on the next start
+        logger.warning("Interrupted; rerun the same command to resume")
+        stop.set()
+
+    tiles_per_hour, restaurants_per_hour = stats.rates()
+    progress = checkpoint.progress(run)
+    logger.info("Crawled %s tiles (%s failed, %s split) and %s restaurants: "
+                "%.0f tiles/hour, %.0f restaurants/hour", stats.tiles, stats.failed, stats.split,
+                stats.restaurants, tiles_per_hour, restaurants_per_hour)
+    logger.info("Run %s: %s of %s tiles done", run, progress.get('done', 0), progress['total'])
+
+
+if __name__ == '__main__':
+    main()
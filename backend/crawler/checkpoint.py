@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils.log import get_logger
+
+logger = get_logger('crawler')
+
+
+class CrawlCheckpoint:
+    """
+    Per-tile progress of grid crawls, in SQLite.
+
+    A run is identified by its bbox, step and tiling mode, so running the
+    same command again resumes it: tiles already done are skipped, tiles
+    that were in flight when the process died go back to pending, and
+    failed tiles are retried until they reach max_attempts. Adaptive runs
+    append the quadrants of split tiles to the same queue.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_tiles (
+                    run TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    lat REAL NOT NULL,
+                    lng REAL NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    restaurants INTEGER,
+                    error TEXT,
+                    started_at REAL,
+                    finished_at REAL,
+                    PRIMARY KEY (run, position)
+                )
+            ''')
+            # Columns added with adaptive (quadtree) runs
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(crawl_tiles)')]
+            for column, definition in (('step_km', 'REAL'), ('parent', 'INTEGER'),
+                                       ('new_vendors', 'INTEGER')):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE crawl_tiles ADD COLUMN {column} {definition}')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_crawl_status ON crawl_tiles(run, status)')
+            # Vendors seen per run, to tell whether a tile found anything new
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_vendors (
+                    run TEXT NOT NULL,
+                    platform TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    PRIMARY KEY (run, platform, url)
+                ) WITHOUT ROWID
+            ''')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def run_key(bbox, step_km: float, adaptive: bool = False) -> str:
+        key = f"{','.join(f'{value:.4f}' for value in bbox)}@{step_km:g}km"
+        return key + '/quadtree' if adaptive else key
+
+    def start(self, run: str, tiles: List[Tuple[float, float]], step_km: float) -> Dict[str, int]:
+        """Register the run's tiles (once) and requeue tiles left running by a crash"""
+        with self.lock, self._connect() as conn:
+            conn.executemany('''
+                INSERT OR IGNORE INTO crawl_tiles (run, position, lat, lng, step_km)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(run, position, lat, lng, step_km) for position, (lat, lng) in enumerate(tiles)])
+            resumed = conn.execute('''
+                UPDATE crawl_tiles SET status = 'pending' WHERE run = ? AND status = 'running'
+            ''', (run,)).rowcount
+        if resumed:
+            logger.info("Requeued %s tiles interrupted in a previous run", resumed)
+        return self.progress(run)
+
+    def claim(self, run: str, max_attempts: int) -> Optional[Tuple[int, float, float, float]]:
+        """Next tile to crawl as (position, lat, lng, step_km), or None when nothing is left"""
+        with self.lock, self._connect() as conn:
+            row = conn.execute('''
+                SELECT position, lat, lng, step_km FROM crawl_tiles
+                WHERE run = ? AND (status = 'pending' OR (status = 'failed' AND attempts < ?))
+                ORDER BY status = 'failed', position
+                LIMIT 1
+            ''', (run, max_attempts)).fetchone()
+            if row is None:
+                return None
+            conn.execute('''
+                UPDATE crawl_tiles SET status = 'running', attempts = attempts + 1, started_at = ?
+                WHERE run = ? AND position = ?
+            ''', (time.time(), run, row[0]))
+        return row
+
+    def record_vendors(self, run: str, vendors: List[Tuple[str, str]]) -> int:
+        """Remember (platform, url) pairs for the run; returns how many were new"""
+        with self.lock, self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT OR IGNORE INTO crawl_vendors (run, platform, url) VALUES (?, ?, ?)
+            ''', [(run, platform, url) for platform, url in vendors])
+            return conn.total_changes - before
+
+    def finish(self, run: str, position: int, restaurants: int, error: Optional[str] = None,
+               new_vendors: Optional[int] = None):
+        with self.lock, self._connect() as conn:
+            conn.execute('''
+                UPDATE crawl_tiles
+                SET status = ?, restaurants = ?, error = ?, new_vendors = ?, finished_at = ?
+                WHERE run = ? AND position = ?
+            ''', ('failed' if error else 'done', restaurants, error, new_vendors, time.time(),
+                  run, position))
+
+    def add_children(self, run: str, parent: int, tiles: List[Tuple[float, float]], step_km: float):
+        """Queue the quadrants of a split tile, after everything already queued"""
+        with self.lock, self._connect() as conn:
+            # A parent is only split once, even if it is crawled again after a crash
+            if conn.execute('SELECT 1 FROM crawl_tiles WHERE run = ? AND parent = ?',
+                            (run, parent)).fetchone():
+                return
+            start = conn.execute('SELECT MAX(position) + 1 FROM crawl_tiles WHERE run = ?',
+                                 (run,)).fetchone()[0]
+            conn.executemany('''
+                INSERT INTO crawl_tiles (run, position, lat, lng, step_km, parent)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(run, start + index, lat, lng, step_km, parent)
+                  for index, (lat, lng) in enumerate(tiles)])
+
+    def progress(self, run: str) -> Dict[str, Any]:
+        with self._connect() as conn:
+            counts = dict(conn.execute('''
+                SELECT status, COUNT(*) FROM crawl_tiles WHERE run = ? GROUP BY status
+            ''', (run,)).fetchall())
+            restaurants = conn.execute('''
+                SELECT coalesce(SUM(restaurants), 0) FROM crawl_tiles WHERE run = ? AND status = 'done'
+            ''', (run,)).fetchone()[0]
+        counts['total'] = sum(counts.values())
+        counts['restaurants'] = restaurants
+        return counts
@@ -0,0 +1,52 @@
+import math
+from typing import List, Tuple
+
+from utils.Geocoder import KM_PER_DEGREE
+
+BBox = Tuple[float, float, float, float]
+
+
+def parse_bbox(text: str) -> BBox:
+    """'min_lat,min_lng,max_lat,max_lng' -> tuple, corners in either order"""
+    try:
+        lat1, lng1, lat2, lng2 = (float(part) for part in text.split(','))
+    except ValueError:
+        raise ValueError(f"Invalid bbox {text!r}, expected min_lat,min_lng,max_lat,max_lng")
+    return min(lat1, lat2), min(lng1, lng2), max(lat1, lat2), max(lng1, lng2)
+
+
+def grid_tiles(bbox: BBox, step_km: float) -> List[Tuple[float, float]]:
+    """
+    Centres of step_km x step_km tiles covering the box, row by row.
+
+    The longitude step widens with latitude so tiles stay roughly square on
+    the ground; centres are rounded to 4 decimals like stored service areas.
+    """
+    if step_km <= 0:
+        raise ValueError("step_km must be positive")
+    min_lat, min_lng, max_lat, max_lng = bbox
+    lat_step = step_km / KM_PER_DEGREE
+
+    tiles = []
+    lat = min_lat + lat_step / 2
+    while lat - lat_step / 2 < max_lat:
+        lng_step = step_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        lng = min_lng + lng_step / 2
+        while lng - lng_step / 2 < max_lng:
+            tiles.append((round(lat, 4), round(lng, 4)))
+            lng += lng_step
+        lat += lat_step
+    return tiles
+
+
+def split_tile(lat: float, lng: float, step_km: float) -> List[Tuple[float, float]]:
+    """Centres of the four step_km / 2 quadrants of a tile"""
+    lat_offset = step_km / 4 / KM_PER_DEGREE
+    lng_offset = step_km / 4 / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return [(round(lat + d_lat, 4), round(lng + d_lng, 4))
+            for d_lat in (-lat_offset, lat_offset) for d_lng in (-lng_offset, lng_offset)]
+
+
+def in_bbox(lat: float, lng: float, bbox: BBox) -> bool:
+    min_lat, min_lng, max_lat, max_lng = bbox
+    return min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
@@ -0,0 +1,31 @@
+from typing import List, Tuple
+
+from crawler.grid import BBox, in_bbox, split_tile
+
+
+class QuadtreePlanner:
+    """
+    Adaptive tiling: start coarse, split where the listing is dense.
+
+    A crawled tile is split into four half-size tiles when a platform
+    returned as many cards as it can show (its card cap, or the harvest
+    limit) or the tile had at least `split_at` restaurants, since the
+    listing there is probably truncated. Tiles that brought no vendor new
+    to the run are never split, so sparse outskirts and areas already
+    covered by neighbours cost one coarse scrape.
+    """
+
+    def __init__(self, bbox: BBox, min_step_km: float = 0.5, split_at: int = 40):
+        self.bbox = bbox
+        self.min_step_km = min_step_km
+        self.split_at = split_at
+
+    def should_split(self, step_km: float, found: int, new_vendors: int, capped: bool) -> bool:
+        if step_km / 2 < self.min_step_km or not new_vendors:
+            return False
+        return capped or found >= self.split_at
+
+    def children(self, lat: float, lng: float, step_km: float) -> List[Tuple[float, float]]:
+        """Quadrant centres inside the crawl box"""
+        return [(child_lat, child_lng) for child_lat, child_lng in split_tile(lat, lng, step_km)
+                if in_bbox(child_lat, child_lng, self.bbox)]
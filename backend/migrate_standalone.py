@@ -1,6 +1,7 @@
 import sqlite3
 import os
 from datetime import datetime
+from services.data_collection_service import DatasetBuilder
 
 def migrate_database_standalone():
     """Standalone migration without Flask dependencies"""
@@ -13,6 +14,9 @@ def migrate_database_standalone():
     print("[MIGRATION] Starting standalone database migration...")
     
     try:
+        # Bring the file to the current schema (per-area delivery table) first
+        DatasetBuilder(db_path).ensure_database()
+
         # Use a longer timeout and different connection settings
         conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
         conn.execute('PRAGMA journal_mode=WAL')  # Better for concurrent access
@@ -56,7 +60,7 @@ def migrate_database_standalone():
         backup_table = f"restaurants_backup_{timestamp}"
         
         print(f"[MIGRATION] Creating backup table: {backup_table}")
-        conn.execute(f'CREATE TABLE {backup_table} AS SELECT * FROM restaurants')
+        conn.execute(f'CREATE TABLE {backup_table} AS SELECT * FROM restaurant_listings')
         
         backup_count = conn.execute(f'SELECT COUNT(*) FROM {backup_table}').fetchone()[0]
         print(f"[MIGRATION] Backed up {backup_count} records")
@@ -74,13 +78,13 @@ def migrate_database_standalone():
         # Step 2: Clean delivery info
         print("[MIGRATION] Cleaning delivery info...")
         conn.execute('''
-            UPDATE restaurants 
+            UPDATE restaurant_area_delivery
             SET delivery_time = ''
             WHERE delivery_time IN ('unknown', 'not specified', 'null', 'not available')
         ''')
         
         conn.execute('''
-            UPDATE restaurants 
+            UPDATE restaurant_area_delivery
             SET delivery_fee = ''
             WHERE delivery_fee IN ('unknown', 'not specified', 'null', 'not available')
         ''')
@@ -1,14 +1,20 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(slots=True)
 class MenuItem:
-    def __init__(self, name, description, price, image_url=None):
-        self.name = name
-        self.description = description
-        self.price = price
-        self.image_url = image_url
+    name: str
+    description: str
+    price: str
+    image_url: Optional[str] = None
+    category: Optional[str] = None
 
     def to_dict(self):
         return {
             "name": self.name,
             "description": self.description,
             "price": self.price,
-            "image_url": self.image_url
-        }
\ No newline at end of file
+            "image_url": self.image_url,
+            "category": self.category
+        }
@@ -1,15 +1,21 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from models.MenuItem import MenuItem
+
+
+@dataclass(slots=True)
 class Restaurant:
-    def __init__(self, name, cuisine_type, rating, delivery_time, delivery_fee, platform, offers=[], image_url=None, url=None):
-        self.name = name
-        self.cuisine_type = cuisine_type
-        self.rating = rating
-        self.delivery_time = delivery_time
-        self.delivery_fee = delivery_fee
-        self.platform = platform
-        self.image_url = image_url
-        self.url = url
-        self.offers = offers
-        self.menu_items = []
+    name: str
+    cuisine_type: str
+    rating: str
+    delivery_time: str
+    delivery_fee: str
+    platform: str
+    offers: List[str] = field(default_factory=list)
+    image_url: Optional[str] = None
+    url: Optional[str] = None
+    menu_items: List[MenuItem] = field(default_factory=list)
 
     def to_dict(self):
         return {
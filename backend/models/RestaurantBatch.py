@@ -0,0 +1,80 @@
+import sys
+from dataclasses import fields
+from typing import Iterable, Iterator, List, Dict, Any
+
+from models.Restaurant import Restaurant
+
+FIELDS = tuple(f.name for f in fields(Restaurant))
+# Low-cardinality columns whose strings are interned so rows share them
+INTERNED = frozenset(('cuisine_type', 'delivery_time', 'delivery_fee', 'platform'))
+
+
+class RestaurantBatch:
+    """
+    Column-per-field container for many restaurants.
+
+    Holds one list per Restaurant field instead of one object per row, which
+    is what bulk crawls and exports pass around. Repeated strings (platform,
+    cuisine, delivery time/fee) are interned. Rows are materialized on demand.
+    """
+
+    __slots__ = ('columns',)
+
+    def __init__(self):
+        self.columns = {name: [] for name in FIELDS}
+
+    @classmethod
+    def from_restaurants(cls, restaurants: Iterable[Restaurant]) -> 'RestaurantBatch':
+        batch = cls()
+        for restaurant in restaurants:
+            batch.append(restaurant)
+        return batch
+
+    @classmethod
+    def from_dicts(cls, rows: Iterable[Dict[str, Any]]) -> 'RestaurantBatch':
+        batch = cls()
+        columns = batch.columns
+        for row in rows:
+            for name in FIELDS:
+                value = row.get(name)
+                if name in INTERNED and isinstance(value, str):
+                    value = sys.intern(value)
+                elif value is None and name in ('offers', 'menu_items'):
+                    value = []
+                columns[name].append(value)
+        return batch
+
+    def append(self, restaurant: Restaurant):
+        columns = self.columns
+        for name in FIELDS:
+            value = getattr(restaurant, name)
+            if name in INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            columns[name].append(value)
+
+    def __len__(self) -> int:
+        return len(self.columns['name'])
+
+    def __getitem__(self, index: int) -> Restaurant:
+        return Restaurant(**{name: self.columns[name][index] for name in FIELDS})
+
+    def __iter__(self) -> Iterator[Restaurant]:
+        for values in zip(*(self.columns[name] for name in FIELDS)):
+            yield Restaurant(*values)
+
+    def column(self, name: str) -> List[Any]:
+        return self.columns[name]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Rows in the same shape as Restaurant.to_dict()"""
+        rows = []
+        for values in zip(*(self.columns[name] for name in FIELDS)):
+            row = dict(zip(FIELDS, values))
+            row['menu_items'] = [
+                item if isinstance(item, dict) else item.to_dict() for item in row['menu_items']]
+            rows.append(row)
+        return rows
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        """Columnar form, e.g. {"name": [...], "platform": [...]}; cheapest to serialize"""
+        return self.columns
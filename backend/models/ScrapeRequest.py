@@ -1,9 +1,14 @@
+import math
+
+
 class ScrapeRequest:
-    def __init__(self, lat, lng, text, filters=None):
+    def __init__(self, lat, lng, text, filters=None, deadline_seconds=None):
         self.lat = lat
         self.lng = lng
         self.text = text
         self.filters = filters or {}
+        # Overall time budget; scrapers still running past it are cancelled
+        self.deadline_seconds = deadline_seconds
 
     @classmethod
     def from_dict(cls, data):
@@ -11,5 +16,24 @@ class ScrapeRequest:
             lat=data.get('lat'),
             lng=data.get('lng'),
             text=data.get('text', ''),
-            filters=data.get('filters', {})
+            filters=data.get('filters', {}),
+            deadline_seconds=data.get('deadline_seconds')
         )
+
+    @staticmethod
+    def parse_deadline(value, maximum):
+        """
+        Client-supplied deadline_seconds as a float capped at `maximum`,
+        None when absent. Raises ValueError unless it is a positive number.
+        """
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            raise ValueError("deadline_seconds must be a number")
+        try:
+            seconds = float(value)
+        except (TypeError, ValueError):
+            raise ValueError("deadline_seconds must be a number")
+        if not math.isfinite(seconds) or seconds <= 0:
+            raise ValueError("deadline_seconds must be greater than 0")
+        return min(seconds, maximum)
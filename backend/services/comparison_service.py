@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from services.entity_resolution_service import TILE_DEGREES, tile_of
+from utils.parsing import parse_amount, parse_eta, parse_rating
+
+
+class ComparisonService:
+    """
+    Cross-platform comparison of the restaurant groups around a location.
+
+    Built from stored, already matched listings (never a live scrape) and
+    cached per blocking tile until the dataset changes or the TTL expires.
+    """
+
+    def __init__(self, dataset_builder, ttl_seconds: int = 300, max_entries: int = 512):
+        self.dataset_builder = dataset_builder
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self._cache: Dict[tuple, Dict[str, Any]] = {}
+
+    def compare_area(self, lat: float, lng: float, radius_km: float = 2,
+                     version: Optional[int] = None) -> Dict[str, Any]:
+        """Comparison for the tile containing (lat, lng), at data `version` if already known"""
+        tile = tile_of(lat, lng)
+        key = (tile, radius_km)
+        if version is None:
+            version = self.dataset_builder.data_version
+        now = time.time()
+
+        with self.lock:
+            entry = self._cache.get(key)
+            if entry and entry['version'] == version and entry['expires_at'] > now:
+                return entry['payload']
+
+        # Query around the tile centre so every point in a tile shares one view
+        center_lat = (tile[0] + 0.5) * TILE_DEGREES
+        center_lng = (tile[1] + 0.5) * TILE_DEGREES
+        rows = self.dataset_builder.get_group_listings_by_area(
+            center_lat, center_lng, radius_km)
+
+        payload = self._build_comparison(rows)
+        payload['tile'] = {'lat': round(center_lat, 4), 'lng': round(center_lng, 4)}
+        payload['radius_km'] = radius_km
+
+        with self.lock:
+            if len(self._cache) >= self.max_entries:
+                self._evict(now)
+            self._cache[key] = {
+                'version': version,
+                'expires_at': now + self.ttl_seconds,
+                'payload': payload
+            }
+
+        return payload
+
+    def invalidate(self):
+        """Drop every cached tile"""
+        with self.lock:
+            self._cache.clear()
+
+    def _evict(self, now: float):
+        expired = [key for key, entry in self._cache.items()
+                   if entry['expires_at'] <= now]
+        for key in expired or list(self._cache)[:len(self._cache) // 2]:
+            del self._cache[key]
+
+    def _build_comparison(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        groups: Dict[int, Dict[str, Any]] = {}
+
+        for row in rows:
+            group = groups.setdefault(row['restaurant_group_id'], {
+                'group_id': row['restaurant_group_id'],
+                'name': row['canonical_name'],
+                'cuisine_type': row['cuisine_type'],
+                'platforms': {}
+            })
+            # Rows are sorted by distance, keep the closest listing per platform
+            if row['platform'] in group['platforms']:
+                continue
+            group['platforms'][row['platform']] = self._platform_entry(row)
+
+        results = []
+        for group in groups.values():
+            platforms = group['platforms']
+            group['platform_count'] = len(platforms)
+            group['cheapest'] = self._pick(platforms, 'fee_value')
+            group['fastest'] = self._pick(platforms, 'eta_max')
+            results.append(group)
+
+        # Restaurants available on several platforms are the ones worth comparing
+        results.sort(key=lambda group: (-group['platform_count'], group['name'].lower()))
+
+        return {
+            'total_groups': len(results),
+            'multi_platform_groups': sum(1 for group in results if group['platform_count'] > 1),
+            'groups': results,
+            'generated_at': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _platform_entry(row: Dict[str, Any]) -> Dict[str, Any]:
+        rating_value, review_count = parse_rating(row['rating'])
+        eta_min, eta_max = parse_eta(row['delivery_time'])
+        try:
+            offers = json.loads(row['offers']) if row['offers'] else []
+        except ValueError:
+            offers = []
+
+        return {
+            'name': row['name'],
+            'url': row['url'],
+            'image_url': row['image_url'],
+            'rating': row['rating'],
+            'rating_value': rating_value,
+            'review_count': review_count,
+            'delivery_time': row['delivery_time'],
+            'eta_min': eta_min,
+            'eta_max': eta_max,
+            'delivery_fee': row['delivery_fee'],
+            'fee_value': parse_amount(row['delivery_fee']),
+            'offers': offers
+        }
+
+    @staticmethod
+    def _pick(platforms: Dict[str, Dict[str, Any]], field: str) -> Optional[str]:
+        """Platform with the lowest known value for field"""
+        known = [(entry[field], platform)
+                 for platform, entry in platforms.items() if entry[field] is not None]
+        return min(known)[1] if known else None
@@ -1,10 +1,28 @@
 import json
+import math
 import os
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set, Tuple
 import sqlite3
 import threading
 from queue import Queue
+from utils.BatchCleaner import BatchCleaner
+from utils.ChangeDetector import ChangeDetector, card_key
+from utils import fastjson
+from utils.tracing import tracer, tile_tag
+from utils.metrics import metrics
+from services.entity_resolution_service import EntityResolver
+from services.menu_service import MenuStore
+from services.search_service import SearchIndex
+from services.history_service import ObservationStore
+from utils.log import get_logger
+
+logger = get_logger('dataset')
+
+# Bump when setup_database() changes; stored in PRAGMA user_version so the
+# schema setup runs once per deployment rather than in every worker
+SCHEMA_VERSION = 6
 
 
 class DatasetBuilder:
@@ -12,43 +30,241 @@ class DatasetBuilder:
         self.db_path = db_path
         self.data_queue = Queue()
         self.processing_thread = None
-        self.setup_database()
+        self.batch_cleaner = BatchCleaner()
+        # Hashes of what was last ingested per tile, to skip unchanged cards
+        self.change_detector = ChangeDetector()
+        self.entity_resolver = EntityResolver()
+        self.menu_store = MenuStore(db_path)
+        self.search_index = SearchIndex(db_path)
+        self.observations = ObservationStore(db_path)
+        # See data_version: (stat of the version file, value read from it)
+        self.version_path = db_path + '.version'
+        self._version_cache = (None, 0)
+        # Schema setup is deferred to first use, so importing this module is cheap
+        self.database_ready = False
+        self.setup_lock = threading.Lock()
+
+    def ensure_database(self):
+        """Run setup_database() once, unless the file already has the current schema"""
+        if self.database_ready:
+            return
+        with self.setup_lock:
+            if self.database_ready:
+                return
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            with sqlite3.connect(self.db_path) as conn:
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version < SCHEMA_VERSION:
+                self.setup_database()
+                with sqlite3.connect(self.db_path) as conn:
+                    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+                logger.info("Database schema set up (version %s)", SCHEMA_VERSION)
+            self.database_ready = True
+
+    def _connect(self) -> sqlite3.Connection:
+        """New connection to the dataset, schema guaranteed (one per call, never shared)"""
+        self.ensure_database()
+        return sqlite3.connect(self.db_path)
+
+    @property
+    def data_version(self) -> int:
+        """
+        Bumped whenever stored listings change, read by response caches.
+
+        The counter lives in the database; after each write commits it is
+        also published to a small file next to it (db_path + '.version'),
+        so writes from another gunicorn worker or the crawler are seen here
+        too. Reading it is a stat() of that file, and a read only when the
+        file changed: no SQLite on the conditional-GET path.
+        """
+        try:
+            stat = os.stat(self.version_path)
+        except FileNotFoundError:
+            return 0
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._version_cache
+        if cached[0] != key:
+            try:
+                with open(self.version_path, encoding='ascii') as handle:
+                    cached = (key, int(handle.read()))
+            except (OSError, ValueError) as e:
+                logger.warning("Could not read %s: %s", self.version_path, e)
+                return cached[1]
+            self._version_cache = cached
+        return cached[1]
+
+    @staticmethod
+    def _bump_data_version(conn: sqlite3.Connection) -> int:
+        """
+        Increment data_version in the caller's transaction, so it commits with
+        the write; pass the result to _publish_data_version() after commit.
+        """
+        conn.execute('''
+            INSERT INTO dataset_meta (key, value) VALUES ('data_version', 1)
+            ON CONFLICT (key) DO UPDATE SET value = value + 1
+        ''')
+        return conn.execute("SELECT value FROM dataset_meta WHERE key = 'data_version'").fetchone()[0]
+
+    def _publish_data_version(self, version):
+        """Make a committed data_version visible to every process"""
+        if version is None:
+            return
+        temporary = f"{self.version_path}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(temporary, 'w', encoding='ascii') as handle:
+                handle.write(str(version))
+            # Atomic, so readers never see a half-written file
+            os.replace(temporary, self.version_path)
+        except OSError as e:
+            logger.warning("Could not publish data version %s: %s", version, e)
 
     def setup_database(self):
-        """Initialize SQLite database for dataset with location-aware delivery info"""
+        """
+        Initialize the SQLite dataset.
+
+        A restaurant is stored once per platform listing in `restaurants`
+        (name, URL, image, cuisine, rating, offers); what differs per service
+        area (delivery time and fee) lives in `restaurant_area_delivery`. The
+        `restaurant_listings` view joins them back into one row per
+        (restaurant, service area), the shape the old single table had.
+        """
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
 
         with sqlite3.connect(self.db_path) as conn:
-            # Check if table exists before dropping
-            table_exists = conn.execute('''
-                SELECT name FROM sqlite_master WHERE type='table' AND name='restaurants'
-            ''').fetchone()
-
-            if not table_exists:
-                # Only create table if it doesn't exist
-                conn.execute('''
-                    CREATE TABLE restaurants (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name TEXT NOT NULL,
-                        cuisine_type TEXT,
-                        image_url TEXT,
-                        url TEXT,
-                        platform TEXT NOT NULL,
-                        rating TEXT,
-                        restaurant_lat REAL,
-                        restaurant_lng REAL,
-                        delivery_time TEXT,
-                        delivery_fee TEXT,
-                        service_area_lat REAL,
-                        service_area_lng REAL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(name, platform, service_area_lat, service_area_lng)
-                    )
-                ''')
-                print("[DATASET] Created new restaurants table")
-            else:
-                print("[DATASET] Using existing restaurants table")
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(restaurants)')]
+            legacy = 'service_area_lat' in columns
+            if legacy:
+                self._move_legacy_table(conn)
+
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS restaurants (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    platform TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    cuisine_type TEXT,
+                    image_url TEXT,
+                    rating TEXT,
+                    offers TEXT,
+                    restaurant_lat REAL,
+                    restaurant_lng REAL,
+                    restaurant_group_id INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(platform, url, name)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS restaurant_area_delivery (
+                    restaurant_id INTEGER NOT NULL REFERENCES restaurants(id),
+                    service_area_lat REAL NOT NULL,
+                    service_area_lng REAL NOT NULL,
+                    delivery_time TEXT,
+                    delivery_fee TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (restaurant_id, service_area_lat, service_area_lng)
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_area_delivery_area
+                ON restaurant_area_delivery(service_area_lat, service_area_lng)
+            ''')
+            # Deleting a restaurant takes its per-area rows with it
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS restaurants_area_delete
+                AFTER DELETE ON restaurants BEGIN
+                    DELETE FROM restaurant_area_delivery WHERE restaurant_id = old.id;
+                END
+            ''')
+            # When each (platform, service area) was last scraped, whether or
+            # not anything changed; kept out of the listings' updated_at
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS tile_seen (
+                    platform TEXT NOT NULL,
+                    service_area_lat REAL NOT NULL,
+                    service_area_lng REAL NOT NULL,
+                    seen_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (platform, service_area_lat, service_area_lng)
+                ) WITHOUT ROWID
+            ''')
+            # Dataset-wide counters shared by every process using the file
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS dataset_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('''
+                CREATE VIEW IF NOT EXISTS restaurant_listings AS
+                SELECT r.id, r.name, r.cuisine_type, r.image_url, r.url, r.platform, r.rating,
+                       r.restaurant_lat, r.restaurant_lng, d.delivery_time, d.delivery_fee,
+                       d.service_area_lat, d.service_area_lng, r.offers, r.restaurant_group_id,
+                       d.created_at, max(r.updated_at, d.seen_at) AS updated_at, d.seen_at
+                FROM restaurant_area_delivery d
+                JOIN restaurants r ON r.id = d.restaurant_id
+            ''')
+
+            if legacy:
+                self._copy_legacy_rows(conn)
+
+            # Cross-platform "same restaurant" links
+            self.entity_resolver.setup(conn)
+            # Menus crawled per restaurant URL
+            self.menu_store.setup(conn)
+            # Full-text search, kept in sync by triggers
+            self.search_index.setup(conn)
+            # Rating, fee, ETA and offers history
+            self.observations.setup(conn)
+
+    @staticmethod
+    def _move_legacy_table(conn: sqlite3.Connection):
+        """Set the one-row-per-listing table aside so the split tables can be filled from it"""
+        logger.info("[MIGRATION] Splitting restaurants into identities and per-area delivery")
+        # Triggers and the search index are keyed by the old row ids; setup recreates them
+        for (trigger,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+            conn.execute(f'DROP TRIGGER {trigger}')
+        conn.execute('DROP TABLE IF EXISTS restaurant_search')
+        conn.execute('DROP INDEX IF EXISTS idx_restaurant_group')
+        conn.execute('DROP INDEX IF EXISTS idx_url')
+        conn.execute('ALTER TABLE restaurants RENAME TO restaurants_legacy')
+
+    @staticmethod
+    def _copy_legacy_rows(conn: sqlite3.Connection):
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(restaurants_legacy)')]
+        offers = 'offers' if 'offers' in columns else 'NULL'
+        group = 'restaurant_group_id' if 'restaurant_group_id' in columns else 'NULL'
+
+        # One identity per (platform, url, name), with the values of its latest row
+        conn.execute(f'''
+            INSERT INTO restaurants
+            (platform, url, name, cuisine_type, image_url, rating, offers,
+             restaurant_lat, restaurant_lng, restaurant_group_id, created_at, updated_at)
+            SELECT platform, listing_url, name, cuisine_type, image_url, rating, {offers},
+                   restaurant_lat, restaurant_lng, {group}, first_created_at, updated_at
+            FROM (
+                SELECT *, coalesce(url, '') AS listing_url,
+                       min(created_at) OVER listing AS first_created_at,
+                       row_number() OVER (listing ORDER BY updated_at DESC, id DESC) AS position
+                FROM restaurants_legacy
+                WINDOW listing AS (PARTITION BY platform, coalesce(url, ''), name)
+            )
+            WHERE position = 1
+        ''')
+        moved = conn.execute('''
+            INSERT OR REPLACE INTO restaurant_area_delivery
+            (restaurant_id, service_area_lat, service_area_lng, delivery_time, delivery_fee,
+             created_at, seen_at)
+            SELECT r.id, l.service_area_lat, l.service_area_lng, l.delivery_time, l.delivery_fee,
+                   l.created_at, l.updated_at
+            FROM restaurants_legacy l
+            JOIN restaurants r ON r.platform = l.platform AND r.url = coalesce(l.url, '')
+                              AND r.name = l.name
+            ORDER BY l.updated_at
+        ''').rowcount
+        identities = conn.execute('SELECT COUNT(*) FROM restaurants').fetchone()[0]
+        conn.execute('DROP TABLE restaurants_legacy')
+        logger.info("[MIGRATION] Stored %s listings as %s restaurants", moved, identities)
 
     def add_scraped_data(self, data: Dict[str, Any], lat: float, lng: float):
         """Add scraped data to processing queue (non-blocking)"""
@@ -65,6 +281,10 @@ class DatasetBuilder:
             self.processing_thread.daemon = True
             self.processing_thread.start()
 
+    def ingest(self, data: Dict[str, Any], lat: float, lng: float):
+        """Process a scrape result now, in the calling thread (add_scraped_data queues it)"""
+        self._process_restaurants(data, lat, lng)
+
     def _process_queue(self):
         """Process queued data in background"""
         while not self.data_queue.empty():
@@ -73,208 +293,216 @@ class DatasetBuilder:
                 self._process_restaurants(
                     item['data'], item['lat'], item['lng'])
             except Exception as e:
-                print(f"[DATASET] Error processing item: {e}")
+                logger.error("Error processing item: %s", e)
 
     def _process_restaurants(self, data: Dict[str, Any], lat: float, lng: float):
         """Process and clean restaurant data"""
         if not data.get('success') or not data.get('results'):
-            print("[DATASET] No valid data to process")
+            logger.info("No valid data to process")
             return
 
-        restaurants_to_add = []
-
         for platform, restaurants in data['results'].items():
-            if not restaurants:
-                continue
+            if restaurants and isinstance(restaurants, list):
+                logger.info("Processing %s restaurants from %s", len(restaurants), platform)
+
+        # Only new or changed cards go on to cleaning and the database
+        results, pending, unchanged = self.change_detector.diff(data['results'], lat, lng)
+        seen = self.change_detector.seen_due(data['results'], lat, lng)
+        if seen:
+            self._mark_tiles_seen(seen)
+        if unchanged:
+            metrics.inc('dataset_rows_unchanged_total', len(unchanged))
+            logger.info("Skipped %s unchanged restaurants", len(unchanged))
+
+        # Clean all platforms in one columnar pass
+        restaurants_to_add, rejected = self.batch_cleaner.clean(
+            results, lat, lng)
+
+        rejected_total = sum(rejected.values())
+        if rejected_total:
+            logger.info("Rejected %s restaurants: %s", rejected_total, rejected)
+
+        failed = set()
+        if restaurants_to_add:
+            write_start = time.perf_counter()
+            with tracer.span('db_write', tile=tile_tag(lat, lng), rows=len(restaurants_to_add)):
+                written = self._batch_insert_restaurants(restaurants_to_add)
+            failed = {(restaurant['platform'], card_key(restaurant))
+                      for restaurant in restaurants_to_add} - written
+            metrics.observe('db_write_duration_seconds', time.perf_counter() - write_start)
+            metrics.inc('db_rows_written_total', len(restaurants_to_add))
+            logger.info("Successfully processed %s restaurants", len(restaurants_to_add))
+        else:
+            logger.info("No valid restaurants to add after cleaning")
 
-            print(
-                f"[DATASET] Processing {len(restaurants)} restaurants from {platform}")
+        # Rejected cards are remembered too: cleaning them again gives the same
+        # answer. Cards whose write failed are not, so they are retried
+        self.change_detector.commit(pending, failed)
 
-            for restaurant in restaurants:
-                cleaned_restaurant = self._clean_restaurant_data(
-                    restaurant, platform, lat, lng)
-                if cleaned_restaurant:
-                    restaurants_to_add.append(cleaned_restaurant)
+        # Keep history storage bounded while scraping continuously
+        try:
+            self.observations.maybe_compact()
+        except sqlite3.Error as e:
+            logger.warning("History compaction failed: %s", e)
 
-        if restaurants_to_add:
-            self._batch_insert_restaurants(restaurants_to_add)
-            print(
-                f"[DATASET] Successfully processed {len(restaurants_to_add)} restaurants")
-        else:
-            print("[DATASET] No valid restaurants to add after cleaning")
-
-    def _clean_restaurant_data(self, restaurant: Dict[str, Any], platform: str, lat: float, lng: float) -> Dict[str, Any]:
-        """Clean and validate restaurant data with strict quality requirements"""
-        name = restaurant.get('name', '').strip()
-
-        # Skip unknown restaurants
-        if not name or name == "Unknown Restaurant" or "unknown" in name.lower():
-            print(f"[DATASET] Skipping unknown restaurant: {name}")
-            return None
-
-        # Skip if no valid URL (REQUIRED)
-        url = restaurant.get('url', '').strip()
-        if not url or url.lower() in ['null', 'none', '', 'not available']:
-            print(f"[DATASET] Skipping restaurant without URL: {name}")
-            return None
-
-        # Skip if no image URL (REQUIRED for quality dataset)
-        image_url = restaurant.get('image_url', '').strip()
-        if (not image_url or
-            image_url.lower() in ['null', 'none', '', 'not available'] or
-            'placeholder' in image_url.lower() or
-                image_url == 'https://'):
-            print(f"[DATASET] Skipping restaurant without valid image: {name}")
-            return None
-
-        # Clean cuisine type (REQUIRED)
-        cuisine_type = restaurant.get('cuisine_type', '').strip()
-        if not cuisine_type or cuisine_type.lower() in ['not specified', 'unknown', '', 'null']:
-            print(
-                f"[DATASET] Skipping restaurant without cuisine type: {name}")
-            return None
-        else:
-            cuisine_type = cuisine_type.title()
-
-        # Handle rating - replace empty with "Not Reviewed"
-        rating = restaurant.get('rating', '').strip()
-        if not rating or rating.lower() in ['no rating', '0', 'unknown', '', 'null']:
-            rating = 'Not Reviewed'
-
-        # Clean delivery info - these can be empty for now
-        delivery_time = restaurant.get('delivery_time', '').strip()
-        delivery_fee = restaurant.get('delivery_fee', '').strip()
-
-        if delivery_time.lower() in ['unknown', 'not specified', '', 'null']:
-            delivery_time = ''
-        if delivery_fee.lower() in ['unknown', 'not specified', '', 'null']:
-            delivery_fee = ''
-
-        # Only proceed if we have ALL required fields
-        required_fields = [name, url, image_url, cuisine_type]
-        if not all(required_fields):
-            print(
-                f"[DATASET] Skipping restaurant missing required fields: {name}")
-            return None
-
-        cleaned = {
-            'name': name,
-            'cuisine_type': cuisine_type,
-            'image_url': image_url,
-            'url': url,
-            'platform': platform.lower(),
-            'rating': rating,  # This will be "Not Reviewed" if empty
-            # Restaurant's location (same as service area for now)
-            'restaurant_lat': round(lat, 6),
-            'restaurant_lng': round(lng, 6),
-            'delivery_time': delivery_time,  # Can be empty
-            'delivery_fee': delivery_fee,    # Can be empty
-            # Area where this delivery info applies
-            'service_area_lat': round(lat, 4),
-            'service_area_lng': round(lng, 4)
-        }
-
-        print(f"[DATASET] ✅ Cleaned restaurant: {name} - {cuisine_type}")
-        return cleaned
-
-    def _batch_insert_restaurants(self, restaurants: List[Dict[str, Any]]):
-        """Insert restaurants into database with smart conflict resolution"""
-        with sqlite3.connect(self.db_path) as conn:
+    def _mark_tiles_seen(self, tiles: List[Tuple[str, Tuple[float, float]]]):
+        """Record when (platform, service area) tiles were last scraped, changed or not"""
+        try:
+            with self._connect() as conn:
+                conn.executemany('''
+                    INSERT INTO tile_seen (platform, service_area_lat, service_area_lng, seen_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT (platform, service_area_lat, service_area_lng)
+                    DO UPDATE SET seen_at = excluded.seen_at
+                ''', [(platform, area_lat, area_lng) for platform, (area_lat, area_lng) in tiles])
+        except sqlite3.Error as e:
+            logger.warning("Could not record when tiles were last seen: %s", e)
+
+    def _batch_insert_restaurants(self, restaurants: List[Dict[str, Any]]) -> Set[Tuple[str, str]]:
+        """
+        Store cleaned listings with smart conflict resolution.
+
+        Restaurant details are written once per restaurant, however many
+        service areas list it; each area only adds or refreshes a row of
+        delivery time and fee. Returns the (platform, card key) of every
+        listing that was written without error.
+        """
+        written = set()
+        version = None
+        with self._connect() as conn:
             inserted_count = 0
             updated_count = 0
             skipped_count = 0
+            inserted_rows = []
 
             for restaurant in restaurants:
                 try:
-                    # Check if restaurant already exists for this service area
-                    existing = conn.execute('''
-                        SELECT id, rating, delivery_time, delivery_fee, image_url 
-                        FROM restaurants 
-                        WHERE name = ? AND platform = ? AND service_area_lat = ? AND service_area_lng = ?
-                    ''', (
-                        restaurant['name'],
-                        restaurant['platform'],
-                        restaurant['service_area_lat'],
-                        restaurant['service_area_lng']
-                    )).fetchone()
-
-                    if existing:
-                        # Update existing record only if we have BETTER data
-                        should_update = False
-                        update_fields = []
-                        update_values = []
-
-                        # Update rating if current is "Not Reviewed" and we have a real rating
-                        if (restaurant['rating'] != 'Not Reviewed' and
-                                (not existing[1] or existing[1] == 'Not Reviewed')):
-                            update_fields.append('rating = ?')
-                            update_values.append(restaurant['rating'])
-                            should_update = True
-                            print(
-                                f"[DATASET] Updating rating for {restaurant['name']}: {existing[1]} -> {restaurant['rating']}")
-
-                        # Update delivery info if we have new data and existing is empty
-                        if restaurant['delivery_time'] and not existing[2]:
-                            update_fields.append('delivery_time = ?')
-                            update_values.append(restaurant['delivery_time'])
-                            should_update = True
-
-                        if restaurant['delivery_fee'] and not existing[3]:
-                            update_fields.append('delivery_fee = ?')
-                            update_values.append(restaurant['delivery_fee'])
-                            should_update = True
-
-                        # Update image_url only if existing is empty and we have a valid one
-                        if restaurant['image_url'] and not existing[4]:
-                            update_fields.append('image_url = ?')
-                            update_values.append(restaurant['image_url'])
-                            should_update = True
-
-                        if should_update:
-                            update_fields.append(
-                                'updated_at = CURRENT_TIMESTAMP')
-                            # id for WHERE clause
-                            update_values.append(existing[0])
-
-                            query = f"UPDATE restaurants SET {', '.join(update_fields)} WHERE id = ?"
-                            conn.execute(query, update_values)
-                            updated_count += 1
-                        else:
-                            skipped_count += 1
-                            print(
-                                f"[DATASET] Skipping update for {restaurant['name']} - no better data")
-                    else:
-                        # Insert new record (we already validated all required fields exist)
-                        conn.execute('''
-                            INSERT INTO restaurants 
-                            (name, cuisine_type, image_url, url, platform, rating, 
-                             restaurant_lat, restaurant_lng, delivery_time, delivery_fee,
-                             service_area_lat, service_area_lng)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            restaurant['name'],
-                            restaurant['cuisine_type'],
-                            restaurant['image_url'],
-                            restaurant['url'],
-                            restaurant['platform'],
-                            restaurant['rating'],
-                            restaurant['restaurant_lat'],
-                            restaurant['restaurant_lng'],
-                            restaurant['delivery_time'],
-                            restaurant['delivery_fee'],
-                            restaurant['service_area_lat'],
-                            restaurant['service_area_lng']
-                        ))
+                    restaurant_id, new_restaurant, restaurant_updated = self._upsert_restaurant(
+                        conn, restaurant)
+                    area_inserted, area_updated = self._upsert_area_delivery(
+                        conn, restaurant_id, restaurant)
+                    # Everything seen goes into history, even values not kept above
+                    self.observations.record(conn, restaurant_id, restaurant)
+
+                    if area_inserted:
                         inserted_count += 1
-                        print(
-                            f"[DATASET] ✅ Inserted new restaurant: {restaurant['name']}")
+                        logger.debug("✅ Inserted new listing: %s", restaurant['name'])
+                    elif restaurant_updated or area_updated:
+                        updated_count += 1
+                    else:
+                        skipped_count += 1
+                        logger.debug(
+                            "Skipping update for %s - no better data", restaurant['name'])
 
-                except Exception as e:
-                    print(
-                        f"[DATASET] Error processing {restaurant['name']}: {e}")
+                    if new_restaurant:
+                        inserted_rows.append(dict(restaurant, id=restaurant_id))
+                    written.add((restaurant['platform'], card_key(restaurant)))
 
-            print(
-                f"[DATASET] Database updated: {inserted_count} new, {updated_count} updated, {skipped_count} skipped")
+                except Exception as e:
+                    logger.error("Error processing %s: %s", restaurant['name'], e)
+
+            if inserted_count or updated_count:
+                version = self._bump_data_version(conn)
+
+            # Link new restaurants to the same restaurant on other platforms
+            if inserted_rows:
+                new_groups = self.entity_resolver.assign_groups(
+                    conn, inserted_rows)
+                logger.info(
+                    "Matched %s new restaurants, %s new restaurant groups", len(inserted_rows), new_groups)
+
+            logger.info(
+                "Database updated: %s new, %s updated, %s skipped", inserted_count, updated_count, skipped_count)
+        self._publish_data_version(version)
+        return written
+
+    @staticmethod
+    def _upsert_restaurant(conn: sqlite3.Connection, restaurant: Dict[str, Any]):
+        """(id, created, updated) of the restaurants row for this listing"""
+        existing = conn.execute('''
+            SELECT id, rating, image_url, offers
+            FROM restaurants
+            WHERE platform = ? AND url = ? AND name = ?
+        ''', (restaurant['platform'], restaurant['url'], restaurant['name'])).fetchone()
+
+        offers = json.dumps(restaurant['offers'], ensure_ascii=False)
+        if not existing:
+            cursor = conn.execute('''
+                INSERT INTO restaurants
+                (name, cuisine_type, image_url, url, platform, rating,
+                 restaurant_lat, restaurant_lng, offers)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                restaurant['name'],
+                restaurant['cuisine_type'],
+                restaurant['image_url'],
+                restaurant['url'],
+                restaurant['platform'],
+                restaurant['rating'],
+                restaurant['restaurant_lat'],
+                restaurant['restaurant_lng'],
+                offers
+            ))
+            return cursor.lastrowid, True, False
+
+        # Update the existing record only if we have BETTER data
+        update_fields = []
+        update_values = []
+
+        # Update rating if current is "Not Reviewed" and we have a real rating
+        if (restaurant['rating'] != 'Not Reviewed' and
+                (not existing[1] or existing[1] == 'Not Reviewed')):
+            update_fields.append('rating = ?')
+            update_values.append(restaurant['rating'])
+            logger.debug(
+                "Updating rating for %s: %s -> %s", restaurant['name'], existing[1], restaurant['rating'])
+
+        # Update image_url only if existing is empty and we have a valid one
+        if restaurant['image_url'] and not existing[2]:
+            update_fields.append('image_url = ?')
+            update_values.append(restaurant['image_url'])
+
+        # Offers are promotions that come and go, keep the latest
+        if offers != (existing[3] or '[]'):
+            update_fields.append('offers = ?')
+            update_values.append(offers)
+
+        if not update_fields:
+            return existing[0], False, False
+
+        update_fields.append('updated_at = CURRENT_TIMESTAMP')
+        conn.execute(f"UPDATE restaurants SET {', '.join(update_fields)} WHERE id = ?",
+                     update_values + [existing[0]])
+        return existing[0], False, True
+
+    @staticmethod
+    def _upsert_area_delivery(conn: sqlite3.Connection, restaurant_id: int, restaurant: Dict[str, Any]):
+        """(inserted, updated) for the delivery row of this listing's service area"""
+        key = (restaurant_id, restaurant['service_area_lat'], restaurant['service_area_lng'])
+        existing = conn.execute('''
+            SELECT delivery_time, delivery_fee
+            FROM restaurant_area_delivery
+            WHERE restaurant_id = ? AND service_area_lat = ? AND service_area_lng = ?
+        ''', key).fetchone()
+
+        if not existing:
+            conn.execute('''
+                INSERT INTO restaurant_area_delivery
+                (restaurant_id, service_area_lat, service_area_lng, delivery_time, delivery_fee)
+                VALUES (?, ?, ?, ?, ?)
+            ''', key + (restaurant['delivery_time'], restaurant['delivery_fee']))
+            return True, False
+
+        # Fill in delivery info we did not have yet
+        delivery_time = existing[0] or restaurant['delivery_time']
+        delivery_fee = existing[1] or restaurant['delivery_fee']
+        updated = (delivery_time, delivery_fee) != existing
+        conn.execute('''
+            UPDATE restaurant_area_delivery
+            SET delivery_time = ?, delivery_fee = ?, seen_at = CURRENT_TIMESTAMP
+            WHERE restaurant_id = ? AND service_area_lat = ? AND service_area_lng = ?
+        ''', (delivery_time, delivery_fee) + key)
+        return False, updated
 
     def export_dataset(self, format_type='json', output_path=None):
         """Export dataset with improved metadata"""
@@ -282,13 +510,13 @@ class DatasetBuilder:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_path = f"dataset/khabo_ki_dataset_{timestamp}.{format_type}"
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute('''
                 SELECT name, cuisine_type, image_url, url, platform, rating,
                        restaurant_lat, restaurant_lng, delivery_time, delivery_fee,
                        service_area_lat, service_area_lng, created_at, updated_at
-                FROM restaurants 
+                FROM restaurant_listings
                 WHERE name != 'Unknown Restaurant' 
                   AND url IS NOT NULL 
                   AND url != ''
@@ -311,53 +539,51 @@ class DatasetBuilder:
             service_areas = list(
                 set((r['service_area_lat'], r['service_area_lng']) for r in restaurants))
 
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'metadata': {
-                        'dataset_name': 'Khabo Ki Restaurant Dataset',
-                        'description': 'High-quality food delivery restaurants dataset for Bangladesh with complete information',
-                        'version': '2.1',
-                        'total_restaurants': len(restaurants),
-                        'platforms': platforms,
-                        'unique_cuisines': len(cuisines),
-                        'service_areas_covered': len(service_areas),
-                        'generated_at': datetime.now().isoformat(),
-                        'quality_requirements': [
-                            'All restaurants have valid URLs',
-                            'All restaurants have image URLs',
-                            'All restaurants have cuisine types specified',
-                            'Ratings marked as "Not Reviewed" if unavailable'
-                        ],
-                        'data_structure': {
-                            'name': 'Restaurant name',
-                            'cuisine_type': 'Type of cuisine offered',
-                            'platform': 'Delivery platform (foodpanda, foodi)',
-                            'rating': 'Customer rating with review count or "Not Reviewed"',
-                            'restaurant_lat/lng': 'Restaurant physical location',
-                            'service_area_lat/lng': 'Area where delivery info applies',
-                            'delivery_time': 'Estimated delivery time to service area',
-                            'delivery_fee': 'Delivery cost to service area',
-                            'url': 'Direct link to restaurant page',
-                            'image_url': 'Restaurant image URL'
-                        }
-                    },
-                    'restaurants': restaurants
-                }, f, indent=2, ensure_ascii=False)
+            fastjson.dump({
+                'metadata': {
+                    'dataset_name': 'Khabo Ki Restaurant Dataset',
+                    'description': 'High-quality food delivery restaurants dataset for Bangladesh with complete information',
+                    'version': '2.1',
+                    'total_restaurants': len(restaurants),
+                    'platforms': platforms,
+                    'unique_cuisines': len(cuisines),
+                    'service_areas_covered': len(service_areas),
+                    'generated_at': datetime.now().isoformat(),
+                    'quality_requirements': [
+                        'All restaurants have valid URLs',
+                        'All restaurants have image URLs',
+                        'All restaurants have cuisine types specified',
+                        'Ratings marked as "Not Reviewed" if unavailable'
+                    ],
+                    'data_structure': {
+                        'name': 'Restaurant name',
+                        'cuisine_type': 'Type of cuisine offered',
+                        'platform': 'Delivery platform (foodpanda, foodi)',
+                        'rating': 'Customer rating with review count or "Not Reviewed"',
+                        'restaurant_lat/lng': 'Restaurant physical location',
+                        'service_area_lat/lng': 'Area where delivery info applies',
+                        'delivery_time': 'Estimated delivery time to service area',
+                        'delivery_fee': 'Delivery cost to service area',
+                        'url': 'Direct link to restaurant page',
+                        'image_url': 'Restaurant image URL'
+                    }
+                },
+                'restaurants': restaurants
+            }, output_path, indent=True)
 
-        print(
-            f"[DATASET] Exported {len(restaurants)} high-quality restaurants to {output_path}")
+        logger.info("Exported %s high-quality restaurants to %s", len(restaurants), output_path)
         return output_path
 
     def get_stats(self) -> Dict[str, Any]:
         """Get comprehensive dataset statistics"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                print(f"[DEBUG] Connected to database: {self.db_path}")
+            with self._connect() as conn:
+                logger.debug("Connected to database: %s", self.db_path)
 
                 # Test basic connection
-                cursor = conn.execute('SELECT COUNT(*) FROM restaurants')
+                cursor = conn.execute('SELECT COUNT(*) FROM restaurant_listings')
                 total = cursor.fetchone()[0]
-                print(f"[DEBUG] Total restaurants found: {total}")
+                logger.debug("Total restaurants found: %s", total)
 
                 if total == 0:
                     return {
@@ -379,7 +605,7 @@ class DatasetBuilder:
 
                 # Count complete records (all required fields present)
                 cursor = conn.execute('''
-                    SELECT COUNT(*) FROM restaurants 
+                    SELECT COUNT(*) FROM restaurant_listings
                     WHERE name IS NOT NULL AND name != '' 
                       AND url IS NOT NULL AND url != ''
                       AND image_url IS NOT NULL AND image_url != ''
@@ -390,7 +616,7 @@ class DatasetBuilder:
                 # Platform breakdown
                 cursor = conn.execute('''
                     SELECT platform, COUNT(*) as count
-                    FROM restaurants 
+                    FROM restaurant_listings
                     GROUP BY platform
                     ORDER BY count DESC
                 ''')
@@ -399,7 +625,7 @@ class DatasetBuilder:
                 # Cuisine breakdown
                 cursor = conn.execute('''
                     SELECT cuisine_type, COUNT(*) as count
-                    FROM restaurants 
+                    FROM restaurant_listings
                     WHERE cuisine_type IS NOT NULL AND cuisine_type != ''
                     GROUP BY cuisine_type 
                     ORDER BY count DESC
@@ -413,7 +639,7 @@ class DatasetBuilder:
                         ROUND(service_area_lat, 2) as lat_area,
                         ROUND(service_area_lng, 2) as lng_area,
                         COUNT(*) as count
-                    FROM restaurants 
+                    FROM restaurant_listings
                     GROUP BY lat_area, lng_area
                     ORDER BY count DESC
                     LIMIT 10
@@ -433,7 +659,7 @@ class DatasetBuilder:
                             ELSE 'Other'
                         END as rating_range,
                         COUNT(*) as count
-                    FROM restaurants 
+                    FROM restaurant_listings
                     GROUP BY rating_range
                     ORDER BY count DESC
                 ''')
@@ -441,13 +667,17 @@ class DatasetBuilder:
 
                 # Count with delivery info
                 delivery_info_cursor = conn.execute('''
-                    SELECT COUNT(*) FROM restaurants 
+                    SELECT COUNT(*) FROM restaurant_listings
                     WHERE delivery_time != '' OR delivery_fee != ''
                 ''')
                 with_delivery_info = delivery_info_cursor.fetchone()[0]
 
+                # The same restaurant listed for many service areas is one of these
+                unique_restaurants = conn.execute('SELECT COUNT(*) FROM restaurants').fetchone()[0]
+
                 result = {
                     'total_restaurants': total,
+                    'unique_restaurants': unique_restaurants,
                     'restaurants_with_delivery_info': with_delivery_info,
                     'platform_breakdown': platform_stats,
                     'top_cuisines': cuisine_stats,
@@ -466,14 +696,13 @@ class DatasetBuilder:
                 return result
 
         except Exception as e:
-            print(f"[ERROR] Error in get_stats: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in get_stats: %s", e)
             raise e
 
     def clean_database(self):
         """Clean invalid and duplicate entries with stricter criteria"""
-        with sqlite3.connect(self.db_path) as conn:
+        self.change_detector.clear()
+        with self._connect() as conn:
             # Remove entries with no URL
             removed_no_url = conn.execute('''
                 DELETE FROM restaurants 
@@ -503,16 +732,17 @@ class DatasetBuilder:
                    OR cuisine_type = 'not specified' OR cuisine_type = 'unknown'
             ''').rowcount
 
-            print(f"[DATASET] Cleaned database:")
-            print(f"  - Removed {removed_no_url} entries without URL")
-            print(f"  - Removed {removed_no_image} entries without image")
-            print(f"  - Removed {removed_unknown} unknown restaurants")
-            print(
-                f"  - Removed {removed_no_cuisine} entries without cuisine type")
+            logger.info("Cleaned database:")
+            logger.info("  - Removed %s entries without URL", removed_no_url)
+            logger.info("  - Removed %s entries without image", removed_no_image)
+            logger.info("  - Removed %s unknown restaurants", removed_unknown)
+            logger.info("  - Removed %s entries without cuisine type", removed_no_cuisine)
+            version = self._bump_data_version(conn)
+        self._publish_data_version(version)
 
     def get_restaurants_by_area(self, lat: float, lng: float, radius_km: float = 5) -> List[Dict]:
         """Get restaurants that serve a specific area"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
 
             # Simple bounding box search (can be improved with proper distance calculation)
@@ -520,7 +750,7 @@ class DatasetBuilder:
             lng_margin = radius_km / (111.0 * abs(lat))
 
             cursor = conn.execute('''
-                SELECT * FROM restaurants 
+                SELECT * FROM restaurant_listings
                 WHERE service_area_lat BETWEEN ? AND ?
                   AND service_area_lng BETWEEN ? AND ?
                   AND name IS NOT NULL AND name != ''
@@ -535,18 +765,58 @@ class DatasetBuilder:
 
             return [dict(row) for row in cursor.fetchall()]
 
+    def resolve_restaurant_groups(self) -> Dict[str, int]:
+        """Assign restaurant groups to listings stored before matching existed"""
+        with self._connect() as conn:
+            result = self.entity_resolver.resolve_ungrouped(conn)
+            version = self._bump_data_version(conn)
+        self._publish_data_version(version)
+        return result
+
+    def get_group_listings_by_area(self, lat: float, lng: float, radius_km: float = 2) -> List[Dict]:
+        """
+        Grouped listings around a point, one indexed query.
+
+        Rows come ordered by group, platform and distance from the point,
+        so the first row of each (group, platform) is the closest listing.
+        """
+        lat_margin = radius_km / 111.0
+        lng_margin = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute('''
+                SELECT r.restaurant_group_id, g.canonical_name, r.platform, r.name,
+                       r.url, r.image_url, r.cuisine_type, r.rating,
+                       r.delivery_time, r.delivery_fee, r.offers,
+                       r.service_area_lat, r.service_area_lng
+                FROM restaurant_listings r
+                JOIN restaurant_groups g ON g.id = r.restaurant_group_id
+                WHERE r.service_area_lat BETWEEN ? AND ?
+                  AND r.service_area_lng BETWEEN ? AND ?
+                ORDER BY r.restaurant_group_id, r.platform,
+                         (r.service_area_lat - ?) * (r.service_area_lat - ?) +
+                         (r.service_area_lng - ?) * (r.service_area_lng - ?)
+            ''', (
+                lat - lat_margin, lat + lat_margin,
+                lng - lng_margin, lng + lng_margin,
+                lat, lat, lng, lng
+            ))
+
+            return [dict(row) for row in cursor.fetchall()]
+
     def migrate_existing_database(self):
         """Migrate existing database to new quality standards without dropping table"""
-        print("[MIGRATION] Starting database migration to new quality standards...")
+        logger.info("[MIGRATION] Starting database migration to new quality standards...")
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             # First, let's see what we have
             cursor = conn.execute('SELECT COUNT(*) FROM restaurants')
             total_before = cursor.fetchone()[0]
-            print(f"[MIGRATION] Found {total_before} existing records")
+            logger.info("[MIGRATION] Found %s existing records", total_before)
 
             if total_before == 0:
-                print("[MIGRATION] Database is empty, no migration needed")
+                logger.info("[MIGRATION] Database is empty, no migration needed")
                 return
 
             # Step 1: Update empty ratings to "Not Reviewed"
@@ -556,27 +826,27 @@ class DatasetBuilder:
                 WHERE rating IS NULL OR rating = '' OR rating = 'null' 
                 OR rating = 'unknown' OR rating = 'no rating' OR rating = '0'
             ''').rowcount
-            print(
-                f"[MIGRATION] Updated {updated_ratings} empty ratings to 'Not Reviewed'")
+            logger.info("[MIGRATION] Updated %s empty ratings to 'Not Reviewed'", updated_ratings)
 
             # Step 2: Clean up delivery info (set empty strings for invalid values)
             updated_delivery_time = conn.execute('''
-                UPDATE restaurants 
-                SET delivery_time = '', updated_at = CURRENT_TIMESTAMP
+                UPDATE restaurant_area_delivery
+                SET delivery_time = ''
                 WHERE delivery_time IN ('unknown', 'not specified', 'null', 'not available')
             ''').rowcount
 
             updated_delivery_fee = conn.execute('''
-                UPDATE restaurants 
-                SET delivery_fee = '', updated_at = CURRENT_TIMESTAMP
+                UPDATE restaurant_area_delivery
+                SET delivery_fee = ''
                 WHERE delivery_fee IN ('unknown', 'not specified', 'null', 'not available')
             ''').rowcount
 
-            print(
-                f"[MIGRATION] Cleaned {updated_delivery_time} delivery times and {updated_delivery_fee} delivery fees")
+            logger.info(
+                "[MIGRATION] Cleaned %s delivery times and %s delivery fees", updated_delivery_time, updated_delivery_fee)
+            version = self._bump_data_version(conn)
 
             # Step 3: Remove low-quality records (this is where we apply strict standards)
-            print("[MIGRATION] Removing low-quality records...")
+            logger.info("[MIGRATION] Removing low-quality records...")
 
             # Mark records for deletion (don't delete yet, just log what would be removed)
             cursor = conn.execute('''
@@ -606,48 +876,48 @@ class DatasetBuilder:
             ''')
             no_cuisine = cursor.fetchone()[0]
 
-            print(f"[MIGRATION] Records that will be removed:")
-            print(f"  - {unknown_restaurants} unknown restaurants")
-            print(f"  - {no_url} without URLs")
-            print(f"  - {no_image} without images")
-            print(f"  - {no_cuisine} without cuisine types")
+            logger.info("[MIGRATION] Records that will be removed:")
+            logger.info("  - %s unknown restaurants", unknown_restaurants)
+            logger.info("  - %s without URLs", no_url)
+            logger.info("  - %s without images", no_image)
+            logger.info("  - %s without cuisine types", no_cuisine)
 
             total_to_remove = unknown_restaurants + no_url + no_image + no_cuisine
             remaining_after_cleanup = total_before - total_to_remove
 
-            print(
-                f"[MIGRATION] Will keep {remaining_after_cleanup} high-quality records out of {total_before}")
+            logger.info(
+                "[MIGRATION] Will keep %s high-quality records out of %s", remaining_after_cleanup, total_before)
 
             # Ask for confirmation before deleting
-            print(
-                "\n[MIGRATION] Do you want to proceed with removing low-quality records?")
-            print("This will permanently delete records that don't meet quality standards.")
+            logger.info("[MIGRATION] Do you want to proceed with removing low-quality records?")
+            logger.info("This will permanently delete records that don't meet quality standards.")
 
             # For now, let's not auto-delete. Instead, create a backup table
             self._create_backup_and_clean()
 
-        print("[MIGRATION] Migration completed!")
+        self._publish_data_version(version)
+        logger.info("[MIGRATION] Migration completed!")
 
 
     def _create_backup_and_clean(self):
         """Create backup of current data and clean the main table"""
-        with sqlite3.connect(self.db_path) as conn:
+        self.change_detector.clear()
+        with self._connect() as conn:
             # Create backup table with timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_table = f"restaurants_backup_{timestamp}"
 
-            print(f"[MIGRATION] Creating backup table: {backup_table}")
+            logger.info("[MIGRATION] Creating backup table: %s", backup_table)
 
             # Copy current table to backup
             conn.execute(f'''
                 CREATE TABLE {backup_table} AS 
-                SELECT * FROM restaurants
+                SELECT * FROM restaurant_listings
             ''')
 
             backup_count = conn.execute(
                 f'SELECT COUNT(*) FROM {backup_table}').fetchone()[0]
-            print(
-                f"[MIGRATION] Backed up {backup_count} records to {backup_table}")
+            logger.info("[MIGRATION] Backed up %s records to %s", backup_count, backup_table)
 
             # Now clean the main table
             removed_unknown = conn.execute('''
@@ -677,21 +947,23 @@ class DatasetBuilder:
             final_count = conn.execute(
                 'SELECT COUNT(*) FROM restaurants').fetchone()[0]
 
-            print(f"[MIGRATION] Cleanup completed:")
-            print(f"  - Removed {removed_unknown} unknown restaurants")
-            print(f"  - Removed {removed_no_url} without URLs")
-            print(f"  - Removed {removed_no_image} without images")
-            print(f"  - Removed {removed_no_cuisine} without cuisine types")
-            print(f"  - Final count: {final_count} high-quality records")
-            print(f"  - Backup available in table: {backup_table}")
+            logger.info("[MIGRATION] Cleanup completed:")
+            logger.info("  - Removed %s unknown restaurants", removed_unknown)
+            logger.info("  - Removed %s without URLs", removed_no_url)
+            logger.info("  - Removed %s without images", removed_no_image)
+            logger.info("  - Removed %s without cuisine types", removed_no_cuisine)
+            logger.info("  - Final count: %s high-quality records", final_count)
+            logger.info("  - Backup available in table: %s", backup_table)
+            version = self._bump_data_version(conn)
+        self._publish_data_version(version)
 
 
     def run_migration_safely(self):
         """Safe migration that you can run manually"""
-        print("[MIGRATION] Starting safe migration process...")
+        logger.info("[MIGRATION] Starting safe migration process...")
 
         # First, just analyze what we have
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute('''
                 SELECT 
                     COUNT(*) as total,
@@ -706,17 +978,17 @@ class DatasetBuilder:
             stats = cursor.fetchone()
             total, bad_names, bad_urls, bad_images, bad_cuisine, empty_ratings = stats
 
-            print(f"\n[ANALYSIS] Current database status:")
-            print(f"  Total records: {total}")
-            print(f"  Bad names: {bad_names}")
-            print(f"  Bad URLs: {bad_urls}")
-            print(f"  Bad images: {bad_images}")
-            print(f"  Bad cuisine types: {bad_cuisine}")
-            print(f"  Empty ratings: {empty_ratings}")
+            logger.info("[ANALYSIS] Current database status:")
+            logger.info("  Total records: %s", total)
+            logger.info("  Bad names: %s", bad_names)
+            logger.info("  Bad URLs: %s", bad_urls)
+            logger.info("  Bad images: %s", bad_images)
+            logger.info("  Bad cuisine types: %s", bad_cuisine)
+            logger.info("  Empty ratings: %s", empty_ratings)
 
             high_quality = total - \
                 max(bad_names, bad_urls, bad_images, bad_cuisine)
-            print(f"  High-quality records: ~{high_quality}")
+            logger.info("  High-quality records: ~%s", high_quality)
 
             return {
                 'total': total,
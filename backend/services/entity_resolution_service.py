@@ -0,0 +1,321 @@
+import math
+import re
+import sqlite3
+import unicodedata
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+from utils.log import get_logger
+
+logger = get_logger('match')
+
+# Size of a blocking tile in degrees (~1.1 km at Dhaka's latitude). A row is
+# only compared with groups seen in its own tile and the 8 around it.
+TILE_DEGREES = 0.01
+
+# Minimum trigram similarity for two names to be the same restaurant
+MATCH_THRESHOLD = 0.72
+
+# Dhaka areas that show up as branch suffixes ("Kudos - ECB", "Takeout - Mirpur")
+AREA_WORDS = {
+    'adabor', 'agargaon', 'agora', 'avenue', 'badda', 'banani', 'banasree', 'baridhara',
+    'bashundhara', 'bashundara', 'bazar', 'bazaar', 'block', 'branch', 'cantonment',
+    'chattar', 'chattor', 'circle', 'dhaka', 'dhanmondi', 'dohs', 'east', 'ecb', 'farmgate',
+    'gulshan', 'jatrabari', 'kachukhet', 'kawran', 'khilgaon', 'khilkhet', 'lalbagh',
+    'lalmatia', 'malibagh', 'manikdi', 'matikata', 'meenabazar', 'mirpur', 'mohakhali',
+    'mohammadpur', 'motijheel', 'new', 'niketon', 'north', 'old', 'outlet', 'pallabi',
+    'panthapath', 'rampura', 'road', 'sector', 'shahjadpur', 'shyamoli', 'south',
+    'tejgaon', 'uttara', 'west', 'wari'
+}
+
+BANGLA_DIGITS = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
+
+# Romanization of the Bengali block, good enough for fuzzy matching
+BANGLA_LETTERS = {
+    'অ': 'a', 'আ': 'a', 'ই': 'i', 'ঈ': 'i', 'উ': 'u', 'ঊ': 'u', 'ঋ': 'ri',
+    'এ': 'e', 'ঐ': 'oi', 'ও': 'o', 'ঔ': 'ou',
+    'ক': 'k', 'খ': 'kh', 'গ': 'g', 'ঘ': 'gh', 'ঙ': 'ng',
+    'চ': 'ch', 'ছ': 'chh', 'জ': 'j', 'ঝ': 'jh', 'ঞ': 'n',
+    'ট': 't', 'ঠ': 'th', 'ড': 'd', 'ঢ': 'dh', 'ণ': 'n',
+    'ত': 't', 'থ': 'th', 'দ': 'd', 'ধ': 'dh', 'ন': 'n',
+    'প': 'p', 'ফ': 'f', 'ব': 'b', 'ভ': 'bh', 'ম': 'm',
+    'য': 'j', 'র': 'r', 'ল': 'l', 'শ': 'sh', 'ষ': 'sh', 'স': 's', 'হ': 'h',
+    'ৎ': 't', 'ং': 'ng', 'ঃ': 'h', 'ঁ': '',
+    'া': 'a', 'ি': 'i', 'ী': 'i', 'ু': 'u', 'ূ': 'u', 'ৃ': 'ri',
+    'ে': 'e', 'ৈ': 'oi', 'ো': 'o', 'ৌ': 'ou', '্': ''
+}
+BANGLA_CONSONANTS = set('কখগঘঙচছজঝঞটঠডঢণতথদধনপফবভমযরলশষসহ')
+
+# Letters written with a nukta, which NFC always leaves decomposed
+BANGLA_NUKTA_LETTERS = {'ড\u09bc': 'r', 'ঢ\u09bc': 'rh', 'য\u09bc': 'y'}
+
+# Spelling variants folded together before comparing ("kacchi" / "kachchi")
+PHONETIC_FOLDS = [('chch', 'ch'), ('cch', 'ch'), ('chh', 'ch'), ('ph', 'f'),
+                  ('ee', 'i'), ('oo', 'u'), ('z', 'j'), ('w', 'o')]
+
+# Branch separators: a dash with whitespace on either side, or parentheses
+BRANCH_DASH = re.compile(r'\s+[-–—]\s*|\s*[-–—]\s+')
+BARE_DASH = re.compile(r'[-–—]')
+PARENTHESES = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+
+
+def transliterate_bangla(text: str) -> str:
+    """Romanize Bengali script, adding the inherent vowel between consonants"""
+    if not any('ঀ' <= char <= '৿' for char in text):
+        return text.translate(BANGLA_DIGITS)
+
+    # NFC keeps vowel signs like ো whole and splits nukta letters apart
+    text = unicodedata.normalize('NFC', text).translate(BANGLA_DIGITS)
+    for letter, roman in BANGLA_NUKTA_LETTERS.items():
+        text = text.replace(letter, roman)
+    output = []
+    for index, char in enumerate(text):
+        output.append(BANGLA_LETTERS.get(char, char))
+        next_char = text[index + 1] if index + 1 < len(text) else ''
+        if char in BANGLA_CONSONANTS and next_char in BANGLA_CONSONANTS:
+            output.append('a')
+    return ''.join(output)
+
+
+def normalize_name(name: str) -> str:
+    """
+    Reduce a listing name to the restaurant it belongs to.
+
+    "Paragon Momo - Meenabazar ECB Chattar" and "Paragon Momo - ECB Chattar"
+    both become "paragon momo".
+    """
+    if not name:
+        return ''
+
+    text = transliterate_bangla(name)
+    text = PARENTHESES.sub(' ', text)
+    text = BRANCH_DASH.split(text, maxsplit=1)[0]
+
+    # "L'eto-Gulshan Avenue": a bare hyphen only splits off a known area
+    parts = BARE_DASH.split(text, maxsplit=1)
+    if len(parts) == 2 and _first_word(parts[1]) in AREA_WORDS:
+        text = parts[0]
+
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = text.replace('&', ' and ')
+    text = re.sub(r"['’`]", '', text)
+    text = re.sub(r'[^a-z0-9]+', ' ', text)
+
+    words = text.split()
+    if words and words[0] == 'the' and len(words) > 1:
+        words = words[1:]
+    # Drop trailing area words and branch numbers ("dhaba mirpur 11")
+    while len(words) > 1 and (words[-1] in AREA_WORDS or words[-1].isdigit()):
+        words.pop()
+
+    return ' '.join(words)
+
+
+def name_key(normalized: str) -> str:
+    """Spacing- and spelling-insensitive form used for similarity"""
+    key = normalized.replace(' ', '')
+    for source, target in PHONETIC_FOLDS:
+        key = key.replace(source, target)
+    return re.sub(r'(.)\1+', r'\1', key)
+
+
+@lru_cache(maxsize=65536)
+def trigrams(key: str) -> frozenset:
+    padded = f"  {key} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    """Dice coefficient over character trigrams"""
+    if not a or not b:
+        return 0.0
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+
+def tile_of(lat: float, lng: float) -> Tuple[int, int]:
+    return math.floor(lat / TILE_DEGREES), math.floor(lng / TILE_DEGREES)
+
+
+class EntityResolver:
+    """
+    Link listings of the same restaurant across platforms.
+
+    Each restaurants row (one per platform listing, however many service
+    areas it delivers to) gets a restaurant_group_id. Matching is
+    incremental: a new row first reuses the group its (platform, url)
+    already belongs to, otherwise it is scored only against groups seen in
+    the neighbouring geo tiles, so ingestion never rescans the whole table.
+
+    All lookups go to SQLite inside the caller's write transaction, so
+    every gunicorn worker and the crawler see each other's groups, and
+    restaurant_group_members allows one group per (platform, url).
+    """
+
+    def __init__(self, threshold: float = MATCH_THRESHOLD):
+        self.threshold = threshold
+
+    def setup(self, conn: sqlite3.Connection):
+        """Create the group tables and the restaurants.restaurant_group_id link"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS restaurant_groups (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                canonical_name TEXT NOT NULL,
+                normalized_name TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS restaurant_group_tiles (
+                tile_lat INTEGER NOT NULL,
+                tile_lng INTEGER NOT NULL,
+                group_id INTEGER NOT NULL REFERENCES restaurant_groups(id),
+                name_key TEXT NOT NULL,
+                PRIMARY KEY (tile_lat, tile_lng, group_id)
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS restaurant_group_members (
+                platform TEXT NOT NULL,
+                url TEXT NOT NULL,
+                group_id INTEGER NOT NULL REFERENCES restaurant_groups(id),
+                PRIMARY KEY (platform, url)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_group_members_group
+            ON restaurant_group_members(group_id, platform)
+        ''')
+
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(restaurants)')]
+        if 'restaurant_group_id' not in columns:
+            conn.execute(
+                'ALTER TABLE restaurants ADD COLUMN restaurant_group_id INTEGER')
+            logger.info("Added restaurant_group_id to restaurants table")
+
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_restaurant_group ON restaurants(restaurant_group_id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_url ON restaurants(url)')
+
+        # Listings grouped before membership was stored; the oldest row wins
+        conn.execute('''
+            INSERT OR IGNORE INTO restaurant_group_members (platform, url, group_id)
+            SELECT platform, url, restaurant_group_id FROM restaurants
+            WHERE restaurant_group_id IS NOT NULL AND url IS NOT NULL AND url != ''
+            ORDER BY id
+        ''')
+        # A deleted listing leaves its group, and a group with no listings
+        # left stops being a match candidate
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS restaurants_group_delete
+            AFTER DELETE ON restaurants BEGIN
+                DELETE FROM restaurant_group_members
+                WHERE platform = old.platform AND url = old.url
+                  AND NOT EXISTS (SELECT 1 FROM restaurants
+                                  WHERE platform = old.platform AND url = old.url);
+                DELETE FROM restaurant_group_tiles
+                WHERE group_id = old.restaurant_group_id
+                  AND NOT EXISTS (SELECT 1 FROM restaurants
+                                  WHERE restaurant_group_id = old.restaurant_group_id);
+            END
+        ''')
+
+    @staticmethod
+    def _candidates(conn: sqlite3.Connection, tile: Tuple[int, int]):
+        """(group_id, name_key) of the groups seen in a tile and the 8 around it"""
+        tile_lat, tile_lng = tile
+        return conn.execute('''
+            SELECT group_id, name_key FROM restaurant_group_tiles
+            WHERE tile_lat BETWEEN ? AND ? AND tile_lng BETWEEN ? AND ?
+        ''', (tile_lat - 1, tile_lat + 1, tile_lng - 1, tile_lng + 1)).fetchall()
+
+    def _best_group(self, conn: sqlite3.Connection, grams: frozenset, tile, platform: str) -> Optional[int]:
+        scored = []
+        for group_id, key in self._candidates(conn, tile):
+            group_grams = trigrams(key)
+            # Dice can't reach the threshold if the sizes are too far apart
+            smaller, larger = sorted((len(grams), len(group_grams)))
+            if 2.0 * smaller / (smaller + larger) < self.threshold:
+                continue
+            score = similarity(grams, group_grams)
+            if score >= self.threshold:
+                scored.append((score, group_id))
+
+        for _, group_id in sorted(scored, key=lambda pair: (-pair[0], pair[1])):
+            # Another branch of a chain on the same platform is a different listing
+            taken = conn.execute(
+                'SELECT 1 FROM restaurant_group_members WHERE group_id = ? AND platform = ? LIMIT 1',
+                (group_id, platform)).fetchone()
+            if not taken:
+                return group_id
+        return None
+
+    def assign_groups(self, conn: sqlite3.Connection, rows: List[Dict[str, Any]]) -> int:
+        """
+        Give each row (dicts with id, name, platform, url and service area)
+        a restaurant_group_id, creating groups as needed. Call inside the
+        write transaction that stored the rows.
+
+        Returns:
+            int: number of new groups created
+        """
+        created = 0
+        for row in rows:
+            normalized = normalize_name(row['name'])
+            if not normalized:
+                continue
+            key = name_key(normalized)
+            grams = trigrams(key)
+            tile = tile_of(row['service_area_lat'], row['service_area_lng'])
+            platform = row['platform']
+            url = row.get('url')
+
+            group_id = None
+            if url:
+                member = conn.execute(
+                    'SELECT group_id FROM restaurant_group_members WHERE platform = ? AND url = ?',
+                    (platform, url)).fetchone()
+                group_id = member[0] if member else None
+            if group_id is None:
+                group_id = self._best_group(conn, grams, tile, platform)
+            if group_id is None:
+                group_id = conn.execute('''
+                    INSERT INTO restaurant_groups (canonical_name, normalized_name)
+                    VALUES (?, ?)
+                ''', (row['name'], normalized)).lastrowid
+                created += 1
+
+            conn.execute('UPDATE restaurants SET restaurant_group_id = ? WHERE id = ?',
+                         (group_id, row['id']))
+            conn.execute('''
+                INSERT OR IGNORE INTO restaurant_group_tiles
+                (tile_lat, tile_lng, group_id, name_key) VALUES (?, ?, ?, ?)
+            ''', (tile[0], tile[1], group_id, key))
+            if url:
+                conn.execute('''
+                    INSERT OR IGNORE INTO restaurant_group_members (platform, url, group_id)
+                    VALUES (?, ?, ?)
+                ''', (platform, url, group_id))
+
+        return created
+
+    def resolve_ungrouped(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        """Backfill groups for rows stored before matching existed"""
+        conn.row_factory = sqlite3.Row
+        rows = [dict(row) for row in conn.execute('''
+            SELECT id, name, platform, url, min(service_area_lat) AS service_area_lat,
+                   min(service_area_lng) AS service_area_lng
+            FROM restaurant_listings
+            WHERE restaurant_group_id IS NULL
+            GROUP BY id
+            ORDER BY id
+        ''')]
+        conn.row_factory = None
+
+        created = self.assign_groups(conn, rows)
+        logger.info("Grouped %s restaurants into %s new groups", len(rows), created)
+        return {'processed': len(rows), 'groups_created': created}
+
+
+def _first_word(text: str) -> str:
+    words = re.findall(r'[a-z]+', text.lower())
+    return words[0] if words else ''
@@ -0,0 +1,352 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils.parsing import parse_amount, parse_eta, parse_rating
+from utils.log import get_logger
+
+logger = get_logger('history')
+
+# Values tracked per (restaurant, service area); offers is a JSON list
+METRICS = ('rating', 'review_count', 'fee', 'eta_min', 'eta_max')
+VALUES = METRICS + ('offers',)
+
+# Raw observations are kept this many days, then folded into rollups of
+# ROLLUP_RESOLUTION ('hour' or 'day'); rollups go after RETENTION_DAYS
+RAW_DAYS = int(os.environ.get('OBSERVATION_RAW_DAYS', '7'))
+ROLLUP_RESOLUTION = os.environ.get('OBSERVATION_ROLLUP', 'hour')
+RETENTION_DAYS = int(os.environ.get('OBSERVATION_RETENTION_DAYS', '365'))
+# How often ingestion runs compact(), shared by every process using the file
+COMPACT_INTERVAL_HOURS = float(os.environ.get('OBSERVATION_COMPACT_HOURS', '6'))
+
+RESOLUTION_SECONDS = {'hour': 3600, 'day': 86400}
+DAY_SECONDS = 86400
+
+
+def observed_values(restaurant: Dict[str, Any]) -> Tuple:
+    """Numeric values of a cleaned listing, in VALUES order"""
+    rating, review_count = parse_rating(restaurant.get('rating'))
+    eta_min, eta_max = parse_eta(restaurant.get('delivery_time'))
+    if review_count is not None:
+        review_count = int(review_count.rstrip('+'))
+    offers = json.dumps(sorted(restaurant.get('offers') or []), ensure_ascii=False)
+    return (rating, review_count, parse_amount(restaurant.get('delivery_fee')),
+            eta_min, eta_max, offers)
+
+
+def _iso(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class ObservationStore:
+    """
+    Append-only history of rating, fee, ETA and offers per listing.
+
+    Rows are delta encoded: `changed` is a bitmask over VALUES and only the
+    flagged columns are meaningful, so an observation that changes nothing
+    is not stored at all. Time is stored as (day, second of day) and the
+    table is clustered by day, which is what compaction drops. The first row
+    of a series on a given day is a full keyframe, so every day can be
+    decoded on its own. Days older than RAW_DAYS are compacted into
+    min/max/last rollups per hour or day, and rollups older than
+    RETENTION_DAYS are deleted, keeping storage bounded; ingestion calls
+    maybe_compact() so that happens without anyone asking.
+
+    The last state of each series is cached, but only trusted while the
+    series' newest stored row is the one this process wrote: another
+    process writing to the same series makes it reload from the table.
+    """
+
+    def __init__(self, db_path="dataset/restaurants.db", cache_size: int = 100000,
+                 compact_interval_hours: float = COMPACT_INTERVAL_HOURS):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.compact_interval = compact_interval_hours * 3600
+        self.lock = threading.Lock()
+        # (restaurant_id, lat, lng) -> (day, second, values) of the last stored row
+        self._last = OrderedDict()
+        self._compact_checked_at = 0.0
+
+    def setup(self, conn: sqlite3.Connection):
+        value_columns = ',\n'.join(
+            f'                {name} {"TEXT" if name == "offers" else "REAL"}' for name in VALUES)
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS observations (
+                day INTEGER NOT NULL,
+                restaurant_id INTEGER NOT NULL,
+                service_area_lat REAL NOT NULL,
+                service_area_lng REAL NOT NULL,
+                second INTEGER NOT NULL,
+                changed INTEGER NOT NULL,
+{value_columns},
+                PRIMARY KEY (day, restaurant_id, service_area_lat, service_area_lng, second)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_observations_restaurant ON observations(restaurant_id, day)')
+
+        rollup_columns = ',\n'.join(
+            f'                {name}_{stat} REAL' for name in METRICS for stat in ('min', 'max', 'last'))
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS observation_rollups (
+                restaurant_id INTEGER NOT NULL,
+                service_area_lat REAL NOT NULL,
+                service_area_lng REAL NOT NULL,
+                period_start INTEGER NOT NULL,
+                resolution INTEGER NOT NULL,
+                changes INTEGER NOT NULL,
+{rollup_columns},
+                offers_seen TEXT,
+                PRIMARY KEY (restaurant_id, service_area_lat, service_area_lng, period_start)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_rollups_area
+            ON observation_rollups(service_area_lat, service_area_lng, period_start)
+        ''')
+        # When compact() last ran, so only one process runs it per interval
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS observation_compactions (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                compacted_at INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('INSERT OR IGNORE INTO observation_compactions (id, compacted_at) VALUES (1, 0)')
+
+    def record(self, conn: sqlite3.Connection, restaurant_id: int, restaurant: Dict[str, Any],
+               now: Optional[float] = None) -> bool:
+        """Append an observation of a cleaned listing; False when nothing changed"""
+        now = int(now if now is not None else time.time())
+        day, second = divmod(now, DAY_SECONDS)
+        series = (restaurant_id, restaurant['service_area_lat'], restaurant['service_area_lng'])
+        values = observed_values(restaurant)
+
+        with self.lock:
+            cached = self._last.get(series)
+        # One index seek: is the newest row of the series today still ours?
+        newest = conn.execute('''
+            SELECT second FROM observations
+            WHERE day = ? AND restaurant_id = ? AND service_area_lat = ? AND service_area_lng = ?
+            ORDER BY second DESC LIMIT 1
+        ''', (day, *series)).fetchone()
+        if newest is None:
+            last = None
+        elif cached is not None and cached[:2] == (day, newest[0]):
+            last = (day, cached[2])
+        else:
+            last = self._load_state(conn, series, day)
+
+        if last is None:
+            changed = (1 << len(VALUES)) - 1
+        else:
+            changed = sum(1 << index for index, (old, new) in enumerate(zip(last[1], values))
+                          if old != new)
+            if not changed:
+                return False
+
+        stored = [value if changed & (1 << index) else None for index, value in enumerate(values)]
+        conn.execute(f'''
+            INSERT OR REPLACE INTO observations
+            (day, restaurant_id, service_area_lat, service_area_lng, second, changed, {', '.join(VALUES)})
+            VALUES (?, ?, ?, ?, ?, ?, {', '.join('?' * len(VALUES))})
+        ''', (day, *series, second, changed, *stored))
+
+        with self.lock:
+            self._last[series] = (day, second, values)
+            self._last.move_to_end(series)
+            while len(self._last) > self.cache_size:
+                self._last.popitem(last=False)
+        return True
+
+    def maybe_compact(self, now: Optional[float] = None) -> Optional[Dict[str, int]]:
+        """
+        compact() if no process did in the last compact_interval; returns its
+        result, or None when it was not due. Cheap enough to call per ingest.
+        """
+        if self.compact_interval <= 0:
+            return None
+        checked = time.monotonic()
+        with self.lock:
+            if checked - self._compact_checked_at < min(self.compact_interval, 60):
+                return None
+            self._compact_checked_at = checked
+
+        now = int(now if now is not None else time.time())
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            claimed = conn.execute('''
+                UPDATE observation_compactions SET compacted_at = ?
+                WHERE id = 1 AND compacted_at <= ?
+            ''', (now, now - self.compact_interval)).rowcount
+        if not claimed:
+            return None
+        return self.compact(now=now)
+
+    def _load_state(self, conn: sqlite3.Connection, series, day: int):
+        """Decoded state of a series today, or None if it has no row today (next one is a keyframe)"""
+        rows = conn.execute(f'''
+            SELECT second, changed, {', '.join(VALUES)} FROM observations
+            WHERE day = ? AND restaurant_id = ? AND service_area_lat = ? AND service_area_lng = ?
+            ORDER BY second
+        ''', (day, *series)).fetchall()
+        state = None
+        for _, values in self._decode(rows):
+            state = (day, values)
+        return state
+
+    @staticmethod
+    def _decode(rows):
+        """Yield (second, full values) for one series' rows of one day, keyframe first"""
+        values = [None] * len(VALUES)
+        for row in rows:
+            second, changed = row[0], row[1]
+            for index in range(len(VALUES)):
+                if changed & (1 << index):
+                    values[index] = row[2 + index]
+            yield second, tuple(values)
+
+    def _series_rows(self, conn: sqlite3.Connection, where: str, params: Tuple):
+        """Decoded raw observations as {series: [(timestamp, values)]}"""
+        cursor = conn.execute(f'''
+            SELECT day, restaurant_id, service_area_lat, service_area_lng, second, changed,
+                   {', '.join(VALUES)}
+            FROM observations WHERE {where}
+            ORDER BY restaurant_id, service_area_lat, service_area_lng, day, second
+        ''', params)
+        grouped: Dict[Tuple, Dict[int, List]] = {}
+        for row in cursor:
+            grouped.setdefault(tuple(row[1:4]), {}).setdefault(row[0], []).append(row[4:])
+
+        series_rows = {}
+        for series, days in grouped.items():
+            series_rows[series] = [
+                (day * DAY_SECONDS + second, values)
+                for day in sorted(days) for second, values in self._decode(days[day])
+            ]
+        return series_rows
+
+    def compact(self, raw_days: int = RAW_DAYS, resolution: str = ROLLUP_RESOLUTION,
+                retention_days: int = RETENTION_DAYS, now: Optional[float] = None) -> Dict[str, int]:
+        """Fold raw days older than raw_days into rollups and drop expired rollups"""
+        if resolution not in RESOLUTION_SECONDS:
+            raise ValueError(f"Unknown resolution {resolution!r}, expected hour or day")
+        period = RESOLUTION_SECONDS[resolution]
+        now = int(now if now is not None else time.time())
+        cutoff_day = now // DAY_SECONDS - raw_days
+
+        with sqlite3.connect(self.db_path) as conn:
+            series_rows = self._series_rows(conn, 'day < ?', (cutoff_day,))
+            rollups = 0
+            for series, observations in series_rows.items():
+                periods: Dict[int, List] = {}
+                for timestamp, values in observations:
+                    periods.setdefault(timestamp - timestamp % period, []).append(values)
+                for period_start, samples in periods.items():
+                    self._write_rollup(conn, series, period_start, period, samples)
+                    rollups += 1
+
+            removed = conn.execute('DELETE FROM observations WHERE day < ?', (cutoff_day,)).rowcount
+            expired = conn.execute('DELETE FROM observation_rollups WHERE period_start < ?',
+                                   (now - retention_days * DAY_SECONDS,)).rowcount
+
+        logger.info("Compacted %s observations into %s rollups, dropped %s expired rollups",
+                    removed, rollups, expired)
+        return {'observations_compacted': removed, 'rollups_written': rollups,
+                'rollups_expired': expired}
+
+    @staticmethod
+    def _write_rollup(conn: sqlite3.Connection, series, period_start: int, period: int, samples):
+        stats = []
+        for index in range(len(METRICS)):
+            present = [values[index] for values in samples if values[index] is not None]
+            stats += [min(present, default=None), max(present, default=None), samples[-1][index]]
+        offers = sorted({offer for values in samples for offer in json.loads(values[-1] or '[]')})
+
+        columns = [f'{name}_{stat}' for name in METRICS for stat in ('min', 'max', 'last')]
+        conn.execute(f'''
+            INSERT OR REPLACE INTO observation_rollups
+            (restaurant_id, service_area_lat, service_area_lng, period_start, resolution, changes,
+             {', '.join(columns)}, offers_seen)
+            VALUES ({', '.join('?' * (7 + len(columns)))})
+        ''', (*series, period_start, period, len(samples), *stats,
+              json.dumps(offers, ensure_ascii=False)))
+
+    def restaurant_trend(self, restaurant_id: int, metric: str, days: int = 30,
+                         lat: Optional[float] = None, lng: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Time series of one value for a restaurant, oldest first.
+
+        Compacted history comes as rollup points (min/max/last), recent
+        history as the individual changes. With lat/lng only that service
+        area is included.
+        """
+        return self._trend(metric, days, 'restaurant_id = ?', (restaurant_id,), lat, lng)
+
+    def tile_trend(self, lat: float, lng: float, metric: str, days: int = 30) -> List[Dict[str, Any]]:
+        """Daily mean of a value over every restaurant of a service area"""
+        points = self._trend(metric, days, 'restaurant_id IS NOT NULL', (), lat, lng)
+        daily: Dict[int, Dict[Tuple, Any]] = {}
+        for point in points:
+            day = point['timestamp'] // DAY_SECONDS
+            # Per restaurant the last value of the day counts
+            daily.setdefault(day, {})[point['restaurant_id']] = point['value']
+
+        trend = []
+        for day in sorted(daily):
+            values = [value for value in daily[day].values() if value is not None]
+            trend.append({
+                'time': _iso(day * DAY_SECONDS),
+                'value': round(sum(values) / len(values), 2) if values else None,
+                'restaurants': len(values)
+            })
+        return trend
+
+    def _trend(self, metric: str, days: int, where: str, params: Tuple,
+               lat: Optional[float], lng: Optional[float]) -> List[Dict[str, Any]]:
+        if metric not in VALUES:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {', '.join(VALUES)}")
+        since = int(time.time()) - days * DAY_SECONDS
+        if lat is not None and lng is not None:
+            where += ' AND service_area_lat = ? AND service_area_lng = ?'
+            params += (round(lat, 4), round(lng, 4))
+
+        points = []
+        with sqlite3.connect(self.db_path) as conn:
+            if metric != 'offers':
+                columns = f'{metric}_min, {metric}_max, {metric}_last'
+            else:
+                columns = 'NULL, NULL, offers_seen'
+            rollups = conn.execute(f'''
+                SELECT restaurant_id, service_area_lat, service_area_lng, period_start, changes,
+                       {columns}
+                FROM observation_rollups
+                WHERE {where} AND period_start >= ?
+            ''', params + (since,))
+            for restaurant_id, area_lat, area_lng, period_start, changes, low, high, last in rollups:
+                points.append({
+                    'restaurant_id': restaurant_id, 'lat': area_lat, 'lng': area_lng,
+                    'timestamp': period_start, 'value': json.loads(last) if metric == 'offers' else last,
+                    'min': low, 'max': high, 'changes': changes
+                })
+
+            index = VALUES.index(metric)
+            raw = self._series_rows(conn, f'{where} AND day >= ?', params + (since // DAY_SECONDS,))
+            for (restaurant_id, area_lat, area_lng), observations in raw.items():
+                for timestamp, values in observations:
+                    if timestamp < since:
+                        continue
+                    value = values[index]
+                    points.append({
+                        'restaurant_id': restaurant_id, 'lat': area_lat, 'lng': area_lng,
+                        'timestamp': timestamp,
+                        'value': json.loads(value) if metric == 'offers' and value else value
+                    })
+
+        points.sort(key=lambda point: (point['timestamp'], point['restaurant_id']))
+        for point in points:
+            point['time'] = _iso(point['timestamp'])
+        return points
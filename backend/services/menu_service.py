@@ -0,0 +1,305 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from queue import Queue, Empty
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils.Deadline import Deadline, ScrapeCancelled, set_current_deadline
+from utils.PolitenessScheduler import ScrapeBlocked, ScrapeThrottled, politeness
+from utils.parsing import parse_amount
+from utils.log import get_logger
+
+logger = get_logger('menu')
+
+# Budget of one restaurant's menu fetch, politeness wait included
+MENU_DEADLINE_SECONDS = float(os.environ.get('MENU_DEADLINE_SECONDS', 60))
+
+
+class MenuStore:
+    """
+    Normalized menu storage keyed by restaurant URL.
+
+    Every crawl of a restaurant is hashed; when the hash matches the stored
+    snapshot only crawled_at moves and no menu rows are rewritten.
+    """
+
+    def __init__(self, db_path="dataset/restaurants.db"):
+        self.db_path = db_path
+
+    def setup(self, conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS menu_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                restaurant_url TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                name TEXT NOT NULL,
+                description TEXT,
+                price TEXT,
+                price_value REAL,
+                image_url TEXT,
+                category TEXT,
+                position INTEGER,
+                UNIQUE(restaurant_url, name, price)
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS menu_snapshots (
+                restaurant_url TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                item_count INTEGER NOT NULL,
+                crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_menu_restaurant ON menu_items(restaurant_url)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_menu_name ON menu_items(name)')
+
+    @staticmethod
+    def content_hash(items: List[Dict[str, Any]]) -> str:
+        """Order-independent hash of the fields that define a menu"""
+        normalized = sorted(
+            (item['name'].strip().lower(), (item.get('description') or '').strip(),
+             (item.get('price') or '').strip(), item.get('category') or '')
+            for item in items
+        )
+        payload = json.dumps(normalized, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def save_menu(self, restaurant_url: str, platform: str, items: List[Dict[str, Any]]) -> bool:
+        """
+        Store a crawled menu.
+
+        Returns:
+            bool: True if the menu changed and rows were written
+        """
+        digest = self.content_hash(items)
+
+        with sqlite3.connect(self.db_path) as conn:
+            existing = conn.execute(
+                'SELECT content_hash FROM menu_snapshots WHERE restaurant_url = ?',
+                (restaurant_url,)).fetchone()
+
+            if existing and existing[0] == digest:
+                conn.execute(
+                    'UPDATE menu_snapshots SET crawled_at = CURRENT_TIMESTAMP WHERE restaurant_url = ?',
+                    (restaurant_url,))
+                return False
+
+            conn.execute('DELETE FROM menu_items WHERE restaurant_url = ?', (restaurant_url,))
+            conn.executemany('''
+                INSERT OR IGNORE INTO menu_items
+                (restaurant_url, platform, name, description, price, price_value,
+                 image_url, category, position)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (restaurant_url, platform, item['name'], item.get('description'),
+                 item.get('price'), parse_amount(item.get('price')),
+                 item.get('image_url'), item.get('category'), position)
+                for position, item in enumerate(items)
+            ])
+            conn.execute('''
+                INSERT INTO menu_snapshots (restaurant_url, platform, content_hash, item_count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(restaurant_url) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    item_count = excluded.item_count,
+                    crawled_at = CURRENT_TIMESTAMP,
+                    changed_at = CURRENT_TIMESTAMP
+            ''', (restaurant_url, platform, digest, len(items)))
+
+        return True
+
+    def get_menu(self, restaurant_url: str) -> List[Dict[str, Any]]:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute('''
+                SELECT name, description, price, price_value, image_url, category
+                FROM menu_items
+                WHERE restaurant_url = ?
+                ORDER BY position
+            ''', (restaurant_url,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_crawl_targets(self, platform: Optional[str] = None, limit: int = 50,
+                          max_age_hours: float = 24) -> List[Tuple[str, str]]:
+        """Restaurant URLs with no menu yet or a menu older than max_age_hours"""
+        cutoff = (datetime.utcnow() - timedelta(hours=max_age_hours)
+                  ).strftime('%Y-%m-%d %H:%M:%S')
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute('''
+                SELECT DISTINCT r.platform, r.url
+                FROM restaurants r
+                LEFT JOIN menu_snapshots s ON s.restaurant_url = r.url
+                WHERE r.url IS NOT NULL AND r.url != ''
+                  AND (? IS NULL OR r.platform = ?)
+                  AND (s.restaurant_url IS NULL OR s.crawled_at < ?)
+                ORDER BY s.crawled_at IS NOT NULL, s.crawled_at
+                LIMIT ?
+            ''', (platform, platform, cutoff, limit))
+            return cursor.fetchall()
+
+
+class MenuCrawler:
+    """
+    Opt-in menu crawl over stored restaurant URLs.
+
+    A fixed number of worker threads pull URLs from a queue, so at most
+    `concurrency` browsers are open at once; each worker reuses its browser
+    across restaurants of the same platform. Every fetch goes through the
+    same politeness scheduler and circuit breakers as /scrape: it waits for
+    the platform's rate limit, is skipped while the circuit is open, and
+    runs under its own Deadline of `deadline_seconds`.
+    """
+
+    def __init__(self, scrapers: Dict[str, Any], menu_store: MenuStore, concurrency: int = 2,
+                 scheduler=None, breakers: Optional[Dict[str, Any]] = None,
+                 deadline_seconds: float = MENU_DEADLINE_SECONDS):
+        self.scrapers = scrapers
+        self.menu_store = menu_store
+        self.concurrency = concurrency
+        self.scheduler = scheduler or politeness
+        self.breakers = breakers or {}
+        self.deadline_seconds = deadline_seconds
+        self.lock = threading.Lock()
+        self.running = False
+        self.last_stats: Dict[str, Any] = {}
+
+    def crawl(self, targets: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """Crawl (platform, url) pairs and store their menus, blocking until done"""
+        queue = Queue()
+        for target in targets:
+            queue.put(target)
+
+        stats = {'queued': len(targets), 'changed': 0, 'unchanged': 0,
+                 'empty': 0, 'failed': 0, 'skipped': 0, 'items': 0}
+        start_time = time.time()
+
+        workers = [threading.Thread(target=self._worker, args=(queue, stats), daemon=True)
+                   for _ in range(min(self.concurrency, len(targets)))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        stats['seconds'] = round(time.time() - start_time, 2)
+        logger.info("Crawl finished: %s", stats)
+        return stats
+
+    def crawl_in_background(self, targets: List[Tuple[str, str]]) -> bool:
+        """Start a crawl thread unless one is already running"""
+        with self.lock:
+            if self.running:
+                return False
+            self.running = True
+
+        def run():
+            try:
+                self.last_stats = self.crawl(targets)
+            finally:
+                with self.lock:
+                    self.running = False
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
+    def _worker(self, queue: Queue, stats: Dict[str, Any]):
+        drivers = {}
+        try:
+            while True:
+                try:
+                    platform, url = queue.get_nowait()
+                except Empty:
+                    break
+
+                scraper = self.scrapers.get(platform)
+                if scraper is None:
+                    self._count(stats, 'failed')
+                    continue
+
+                breaker = self.breakers.get(platform)
+                if breaker is not None and not breaker.allow():
+                    logger.debug("Skipping menu of %s: %s circuit open", url, platform)
+                    self._count(stats, 'skipped')
+                    continue
+
+                try:
+                    items = self._fetch(scraper, platform, url, drivers, breaker)
+                except ScrapeThrottled as e:
+                    logger.debug("Skipping menu of %s: %s", url, e.reason)
+                    self._count(stats, 'skipped')
+                    continue
+                except Exception as e:
+                    logger.error("Error crawling %s: %s", url, e)
+                    self._count(stats, 'failed')
+                    # Start over with a fresh browser for the next restaurant
+                    driver = drivers.pop(platform, None)
+                    if driver:
+                        try:
+                            driver.quit()
+                        except Exception:
+                            # Already quit by its deadline
+                            pass
+                    continue
+
+                if not items:
+                    self._count(stats, 'empty')
+                    continue
+
+                changed = self.menu_store.save_menu(
+                    url, platform, [item.to_dict() for item in items])
+                self._count(stats, 'changed' if changed else 'unchanged')
+                self._count(stats, 'items', len(items))
+        finally:
+            for driver in drivers.values():
+                driver.quit()
+
+    def _fetch(self, scraper, platform: str, url: str, drivers: Dict[str, Any], breaker) -> List:
+        """One menu, once the scheduler allows it and within its own deadline"""
+        deadline = Deadline(self.deadline_seconds)
+        set_current_deadline(deadline)
+        try:
+            try:
+                lease, _ = self.scheduler.acquire(platform)
+            except ScrapeThrottled:
+                if breaker is not None:
+                    breaker.skip()
+                raise
+
+            outcome = None
+            start_time = time.time()
+            try:
+                if platform not in drivers:
+                    drivers[platform] = scraper._create_driver()
+                # A fetch past its deadline has its browser quit under it
+                deadline.register(drivers[platform])
+                try:
+                    items = scraper.scrape_menu(drivers[platform], url)
+                finally:
+                    deadline.unregister(drivers[platform])
+                outcome = 'ok' if items else 'empty'
+            except ScrapeBlocked:
+                outcome = 'blocked'
+                raise
+            except ScrapeCancelled:
+                raise
+            except Exception:
+                outcome = 'error'
+                raise
+            finally:
+                self.scheduler.release(platform, lease, outcome)
+                if breaker is not None:
+                    breaker.record(outcome == 'ok', time.time() - start_time)
+            return items
+        finally:
+            set_current_deadline(None)
+
+    def _count(self, stats: Dict[str, Any], key: str, amount: int = 1):
+        with self.lock:
+            stats[key] += amount
@@ -1,82 +1,317 @@
-from utils.FoodPandaScraper import FoodPandaScraper
-from utils.FoodiScraper import FoodiScraper
+from utils.tracing import tracer, tile_tag
+from utils.metrics import metrics
+from utils.CircuitBreaker import CircuitBreaker
+from utils.Deadline import Deadline, ScrapeCancelled, set_current_deadline
+from utils.PolitenessScheduler import ScrapeBlocked, ScrapeThrottled, politeness
+from utils.SelectorRegistry import selector_registry
 import asyncio
+import importlib
+import os
+import functools
+import threading
 import time
+from collections import OrderedDict
+from collections.abc import Mapping
 from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from utils.log import get_logger
+
+logger = get_logger('scraper')
+
+# Default overall budget of a /scrape request
+DEFAULT_DEADLINE_SECONDS = float(os.environ.get('SCRAPE_DEADLINE_SECONDS', 90))
+# How long to wait for a scraper to hand back partial results after its deadline
+CANCEL_GRACE_SECONDS = 5
+
+# Scraper class per platform, imported on first use: selenium, bs4 and
+# webdriver_manager are slow to import and most requests never scrape
+SCRAPER_CLASSES = {
+    "foodi": "utils.FoodiScraper.FoodiScraper",
+    "foodpanda": "utils.FoodPandaScraper.FoodPandaScraper",
+}
+
+
+class ScraperRegistry(Mapping):
+    """Platform name -> scraper instance, built the first time it is looked up"""
+
+    def __init__(self, classes=None):
+        self.classes = dict(classes or SCRAPER_CLASSES)
+        self.instances = {}
+        self.lock = threading.Lock()
+
+    def __getitem__(self, platform):
+        scraper = self.instances.get(platform)
+        if scraper is None:
+            path = self.classes[platform]
+            with self.lock:
+                scraper = self.instances.get(platform)
+                if scraper is None:
+                    module_name, class_name = path.rsplit('.', 1)
+                    scraper = getattr(importlib.import_module(module_name), class_name)()
+                    self.instances[platform] = scraper
+                    logger.debug("Loaded %s scraper", platform)
+        return scraper
+
+    def __iter__(self):
+        return iter(self.classes)
+
+    def __len__(self):
+        return len(self.classes)
+
+    def load_all(self):
+        """Build every scraper now, e.g. in a gunicorn --preload master"""
+        for platform in self.classes:
+            self[platform]
+
 
 class ScraperService:
-    def __init__(self):
-        self.scrapers = {
-            "foodi": FoodiScraper(),
-            "foodpanda": FoodPandaScraper(),
-        }
-        self.executor = ThreadPoolExecutor(max_workers=4)
+    def __init__(self, cache_size=256, cache_ttl_seconds=1800, max_workers=4, scheduler=None):
+        self.scrapers = ScraperRegistry()
+        # Per-platform rate, concurrency and backoff, shared across processes
+        self.scheduler = scheduler or politeness
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self.breakers = {platform: CircuitBreaker() for platform in self.scrapers}
+        # Last good result per (platform, tile), served while a circuit is open
+        self.cache_size = cache_size
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_lock = threading.Lock()
+        self.result_cache = OrderedDict()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool of this process; a pool inherited through fork has no threads"""
+        pid = os.getpid()
+        if self._executor_pid != pid:
+            with self._executor_lock:
+                if self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                    self._executor_pid = pid
+        return self._executor
+
+    async def _scrape_platform_async(self, platform_name, scraper, scrape_request, deadline):
+        tile = tile_tag(scrape_request.lat, scrape_request.lng)
+        breaker = self.breakers[platform_name]
+        if not breaker.allow():
+            return self._serve_open_circuit(platform_name, tile, breaker)
 
-    async def _scrape_platform_async(self, platform_name, scraper, scrape_request):
-        print(f"Starting async scrape for {platform_name}...")
+        # The request deadline, tightened to the platform's recent p95 scrape time
+        platform_deadline = deadline.child(breaker.timeout())
+        timeout = platform_deadline.remaining()
+        logger.info("Starting async scrape for %s (timeout %.0fs)...", platform_name, timeout)
         start_time = time.time()
 
+        span = tracer.start_span('scrape', platform=platform_name)
+        metrics.inc('scrapes_in_flight', platform=platform_name)
         try:
-            # Run the blocking scraper in a thread pool
+            # Run the blocking scraper in a thread pool, inside this span's context
+            # and with its deadline visible to the scraper
+            context = tracer.context_for(span)
+            context.run(set_current_deadline, platform_deadline)
             loop = asyncio.get_event_loop()
-            platform_results = await loop.run_in_executor(
+            platform_results = await asyncio.wait_for(loop.run_in_executor(
                 self.executor,
-                scraper.scrape,
-                scrape_request.lat,
-                scrape_request.lng,
-                scrape_request.text,
-                scrape_request.filters
-            )
+                functools.partial(
+                    context.run,
+                    self._polite_scrape,
+                    platform_name,
+                    scraper,
+                    scrape_request.lat,
+                    scrape_request.lng,
+                    scrape_request.text,
+                    scrape_request.filters
+                )
+            ), timeout + CANCEL_GRACE_SECONDS)
 
             # Convert to dict for JSON serialization
             result = [restaurant.to_dict() for restaurant in platform_results]
 
+            span.set_attribute('restaurants', len(result))
+            span.end()
+
             end_time = time.time()
-            print(
-                f"✅ {platform_name} completed in {end_time - start_time:.2f}s - Found {len(result)} restaurants")
+            # Scrapers swallow their own errors and return [], so empty counts as a failure
+            self._record_outcome(breaker, deadline, bool(result), end_time - start_time)
+            if result:
+                self._cache_result(platform_name, tile, result)
+
+            metrics.inc('scraper_results_total', platform=platform_name,
+                        outcome='success' if result else 'empty')
+            metrics.inc('scraper_restaurants_total', len(result), platform=platform_name)
+            metrics.observe('scrape_duration_seconds', end_time - start_time, platform=platform_name)
+            logger.info(
+                "✅ %s completed in %.2fs - Found %s restaurants", platform_name, end_time - start_time, len(result))
+
+            return platform_name, result, {"circuit": breaker.state, "from_cache": False,
+                                           "truncated": False}
+
+        except ScrapeThrottled as e:
+            # No slot within the deadline: nothing was scraped, so the breaker is not told
+            span.end(e)
+            breaker.skip()
+            metrics.inc('scraper_results_total', platform=platform_name, outcome='throttled')
+            logger.warning("⏳ %s not scraped: %s", platform_name, e.reason)
+            return platform_name, [], {"circuit": breaker.state, "from_cache": False,
+                                       "truncated": True, "reason": e.reason}
 
-            return platform_name, result
+        except ScrapeCancelled as e:
+            # Stopped at a checkpoint: return whatever was extracted before that
+            span.end(e)
+            end_time = time.time()
+            result = [restaurant.to_dict() for restaurant in e.partial]
+            self._record_outcome(breaker, deadline, bool(result), end_time - start_time)
+            metrics.inc('scraper_results_total', platform=platform_name, outcome='truncated')
+            metrics.inc('scraper_restaurants_total', len(result), platform=platform_name)
+            metrics.observe('scrape_duration_seconds', end_time - start_time, platform=platform_name)
+            logger.warning(
+                "⏱️ %s stopped after %.2fs (%s) - Kept %s restaurants", platform_name, end_time - start_time, e.reason, len(result))
+            return platform_name, result, {"circuit": breaker.state, "from_cache": False,
+                                           "truncated": True, "reason": e.reason}
 
         except Exception as e:
+            span.end(e)
             end_time = time.time()
-            print(
-                f"❌ {platform_name} failed in {end_time - start_time:.2f}s - Error: {e}")
-            return platform_name, {"error": str(e)}
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            if timed_out:
+                self._record_outcome(breaker, deadline, False, end_time - start_time)
+            else:
+                breaker.record(False, end_time - start_time)
+            if timed_out:
+                # The scraper did not stop by itself: kill its browser so the thread ends
+                platform_deadline.cancel('deadline exceeded')
+            metrics.inc('scraper_results_total', platform=platform_name,
+                        outcome='timeout' if timed_out else 'error')
+            metrics.observe('scrape_duration_seconds', end_time - start_time, platform=platform_name)
+            error = f"timed out after {timeout:.0f}s" if timed_out else str(e)
+            logger.warning(
+                "❌ %s failed in %.2fs - Error: %s", platform_name, end_time - start_time, error)
+            return platform_name, {"error": error}, {"circuit": breaker.state, "from_cache": False,
+                                                     "truncated": timed_out}
+
+        finally:
+            metrics.inc('scrapes_in_flight', -1, platform=platform_name)
+
+    @staticmethod
+    def _record_outcome(breaker, deadline, success, duration):
+        """
+        Tell the breaker how a scrape went. A failure after the request's own
+        budget ran out, or after the request was cancelled, is not counted:
+        a short client deadline says nothing about the platform.
+        """
+        if not success and deadline.cancelled:
+            breaker.skip()
+        else:
+            breaker.record(success, duration)
+
+    def _polite_scrape(self, platform_name, scraper, *args):
+        """scraper.scrape(*args) once the politeness scheduler lets it start; in a worker thread"""
+        lease, waited = self.scheduler.acquire(platform_name)
+        metrics.observe('scrape_queue_seconds', waited, platform=platform_name)
+        outcome = None
+        try:
+            results = scraper.scrape(*args)
+            # Empty may be a sparse tile as well as a swallowed error: no backoff
+            # either way, only exceptions and block pages back off
+            outcome = 'ok' if results else 'empty'
+            return results
+        except ScrapeBlocked:
+            outcome = 'blocked'
+            metrics.inc('scraper_blocked_total', platform=platform_name)
+            raise
+        except ScrapeCancelled:
+            raise
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            self.scheduler.release(platform_name, lease, outcome)
+
+    def _serve_open_circuit(self, platform_name, tile, breaker):
+        """Result for a platform whose circuit is open: cached if possible, never a scrape"""
+        metrics.inc('scraper_results_total', platform=platform_name, outcome='circuit_open')
+        status = {
+            "circuit": breaker.state,
+            "from_cache": False,
+            "retry_in_seconds": round(breaker.retry_in(), 1)
+        }
+
+        cached = self._cached_result(platform_name, tile)
+        if cached is None:
+            logger.warning("Skipping %s: circuit open, no cached result for %s", platform_name, tile)
+            return platform_name, {"error": f"{platform_name} is temporarily unavailable"}, status
+
+        cached_at, result = cached
+        logger.info("Serving cached %s result for %s: circuit open", platform_name, tile)
+        status.update(from_cache=True, cached_at=datetime.fromtimestamp(cached_at).isoformat())
+        return platform_name, result, status
+
+    def _cache_result(self, platform_name, tile, result):
+        with self.cache_lock:
+            key = (platform_name, tile)
+            self.result_cache[key] = (time.time(), result)
+            self.result_cache.move_to_end(key)
+            while len(self.result_cache) > self.cache_size:
+                self.result_cache.popitem(last=False)
+
+    def _cached_result(self, platform_name, tile):
+        with self.cache_lock:
+            cached = self.result_cache.get((platform_name, tile))
+        if cached is None or time.time() - cached[0] > self.cache_ttl_seconds:
+            return None
+        return cached
+
+    def get_platform_status(self):
+        """Circuit state, failure rate, adaptive timeout, rate limit state and selector stats per platform"""
+        return {platform: {**breaker.status(), 'politeness': self.scheduler.status(platform),
+                           'selectors': selector_registry.stats(platform)}
+                for platform, breaker in self.breakers.items()}
 
     async def scrape_async(self, scrape_request):
         """
         Async method to scrape data from all platforms concurrently
         """
-        print(f"🚀 Starting async parallel scrape for: {scrape_request}")
+        logger.info("🚀 Starting async parallel scrape for: %s", scrape_request)
         start_time = time.time()
+        deadline = Deadline(scrape_request.deadline_seconds or DEFAULT_DEADLINE_SECONDS)
 
-        # Create tasks for all platforms
-        tasks = [
-            self._scrape_platform_async(platform, scraper, scrape_request)
-            for platform, scraper in self.scrapers.items()
-        ]
+        with tracer.span('scrape_request', tile=tile_tag(scrape_request.lat, scrape_request.lng)):
+            # Create tasks for all platforms
+            tasks = [
+                self._scrape_platform_async(platform, scraper, scrape_request, deadline)
+                for platform, scraper in self.scrapers.items()
+            ]
 
-        # Wait for all tasks to complete
-        results_list = await asyncio.gather(*tasks, return_exceptions=True)
+            # Wait for all tasks to complete
+            results_list = await asyncio.gather(*tasks, return_exceptions=True)
 
         # Process results
         results = {}
+        status = {}
         for result in results_list:
             if isinstance(result, Exception):
-                print(f"Exception occurred: {result}")
+                logger.error("Exception occurred: %s", result)
                 continue
-            platform_name, platform_result = result
+            platform_name, platform_result, platform_status = result
             results[platform_name] = platform_result
+            status[platform_name] = platform_status
 
         total_time = time.time() - start_time
         total_restaurants = sum(len(result) if isinstance(
             result, list) else 0 for result in results.values())
-        print(
-            f"🎉 All platforms completed in {total_time:.2f}s - Total restaurants: {total_restaurants}")
+        logger.info(
+            "🎉 All platforms completed in %.2fs - Total restaurants: %s", total_time, total_restaurants)
 
-        return results
+        return results, status
 
     def scrape(self, scrape_request):
+        """Results per platform"""
+        results, _ = self.scrape_with_status(scrape_request)
+        return results
+
+    def scrape_with_status(self, scrape_request):
+        """Results per platform and, per platform, circuit state and whether it came from cache"""
         try:
             # Try to get existing event loop
             loop = asyncio.get_event_loop()
@@ -0,0 +1,165 @@
+import math
+import re
+import sqlite3
+from typing import List, Dict, Any, Optional
+from utils.log import get_logger
+
+logger = get_logger('search')
+
+# Menu text of a restaurant as indexed next to its name and cuisine
+MENU_TEXT_SQL = '''
+    SELECT group_concat(m.name || ' ' || coalesce(m.description, ''), ' | ')
+    FROM menu_items m WHERE m.restaurant_url = {url}
+'''
+
+# Column weights for bm25(): name, cuisine_type, menu_text
+RANK_WEIGHTS = (10.0, 4.0, 1.0)
+
+
+def build_match_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted so user input can never be parsed as FTS5 syntax.
+    """
+    words = re.findall(r'\w+', text.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class SearchIndex:
+    """
+    FTS5 index over restaurant names, cuisines and menu items.
+
+    One document per restaurants row, not per service area. The index is
+    maintained entirely by triggers: inserting, updating or deleting a
+    restaurants row and storing a changed menu snapshot keep it in sync,
+    so ingestion code never writes to it directly.
+    """
+
+    def __init__(self, db_path="dataset/restaurants.db"):
+        self.db_path = db_path
+
+    def setup(self, conn: sqlite3.Connection):
+        exists = conn.execute('''
+            SELECT name FROM sqlite_master WHERE type='table' AND name='restaurant_search'
+        ''').fetchone()
+
+        if not exists:
+            conn.execute('''
+                CREATE VIRTUAL TABLE restaurant_search USING fts5(
+                    name, cuisine_type, menu_text,
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3'
+                )
+            ''')
+            # Index everything stored before search existed
+            conn.execute(f'''
+                INSERT INTO restaurant_search (rowid, name, cuisine_type, menu_text)
+                SELECT r.id, r.name, r.cuisine_type, ({MENU_TEXT_SQL.format(url='r.url')})
+                FROM restaurants r
+            ''')
+            logger.info("Created full-text search index")
+
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS restaurants_search_insert
+            AFTER INSERT ON restaurants BEGIN
+                INSERT INTO restaurant_search (rowid, name, cuisine_type, menu_text)
+                VALUES (new.id, new.name, new.cuisine_type,
+                        ({MENU_TEXT_SQL.format(url='new.url')}));
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS restaurants_search_update
+            AFTER UPDATE OF name, cuisine_type ON restaurants BEGIN
+                UPDATE restaurant_search
+                SET name = new.name, cuisine_type = new.cuisine_type
+                WHERE rowid = new.id;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS restaurants_search_delete
+            AFTER DELETE ON restaurants BEGIN
+                DELETE FROM restaurant_search WHERE rowid = old.id;
+            END
+        ''')
+
+        # A menu is rewritten as a whole, then its snapshot hash changes once
+        for event in ('INSERT', 'UPDATE OF content_hash'):
+            name = 'menu_search_' + event.split()[0].lower()
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {name}
+                AFTER {event} ON menu_snapshots BEGIN
+                    UPDATE restaurant_search
+                    SET menu_text = ({MENU_TEXT_SQL.format(url='new.restaurant_url')})
+                    WHERE rowid IN (SELECT id FROM restaurants WHERE url = new.restaurant_url);
+                END
+            ''')
+
+    def search(self, text: str, lat: Optional[float] = None, lng: Optional[float] = None,
+               radius_km: float = 5, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Restaurants matching text, best first, optionally near (lat, lng).
+
+        A restaurant listed for several service areas is returned once, for
+        the area closest to the requested point; the limit counts
+        restaurants, not areas.
+        """
+        match_query = build_match_query(text)
+        if not match_query:
+            return []
+
+        # Each restaurant is joined to one service area: the closest to
+        # (lat, lng) inside the radius, else the one it was seen in last
+        area_where = ['a.restaurant_id = r.id']
+        area_params: List[Any] = []
+        area_order = 'a.seen_at DESC'
+        order_by = 'rank'
+        order_params: List[Any] = []
+        if lat is not None and lng is not None:
+            lat_margin = radius_km / 111.0
+            lng_margin = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+            area_where.append('a.service_area_lat BETWEEN ? AND ?')
+            area_where.append('a.service_area_lng BETWEEN ? AND ?')
+            area_params += [lat - lat_margin, lat + lat_margin,
+                            lng - lng_margin, lng + lng_margin]
+            distance = ('(({alias}.service_area_lat - ?) * ({alias}.service_area_lat - ?)'
+                        ' + ({alias}.service_area_lng - ?) * ({alias}.service_area_lng - ?))')
+            area_order = distance.format(alias='a')
+            area_params += [lat, lat, lng, lng]
+            # Among equally ranked restaurants prefer the closest service area
+            order_by += ', ' + distance.format(alias='d')
+            order_params += [lat, lat, lng, lng]
+
+        weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute(f'''
+                SELECT r.id, r.name, r.cuisine_type, r.image_url, r.url, r.platform,
+                       r.rating, d.delivery_time, d.delivery_fee,
+                       d.service_area_lat, d.service_area_lng,
+                       bm25(restaurant_search, {weights}) AS rank,
+                       snippet(restaurant_search, 2, '', '', '…', 12) AS menu_match
+                FROM restaurant_search
+                JOIN restaurants r ON r.id = restaurant_search.rowid
+                JOIN restaurant_area_delivery d
+                  ON (d.restaurant_id, d.service_area_lat, d.service_area_lng) = (
+                      SELECT a.restaurant_id, a.service_area_lat, a.service_area_lng
+                      FROM restaurant_area_delivery a
+                      WHERE {' AND '.join(area_where)}
+                      ORDER BY {area_order}
+                      LIMIT 1
+                  )
+                WHERE restaurant_search MATCH ?
+                ORDER BY {order_by}
+                LIMIT ?
+            ''', area_params + [match_query] + order_params + [limit])
+
+            results = []
+            for row in cursor:
+                result = dict(row)
+                result['rank'] = round(-result['rank'], 4)
+                if not result['menu_match']:
+                    result['menu_match'] = None
+                results.append(result)
+
+            return results
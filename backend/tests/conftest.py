@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Module-level services (dataset builder, caches, schedulers) open SQLite
+# files relative to the working directory when first used; keep those out
+# of the checkout by running the suite from a scratch directory.
+_scratch = tempfile.mkdtemp(prefix='khaboki-tests-')
+os.makedirs(os.path.join(_scratch, 'dataset'), exist_ok=True)
+os.chdir(_scratch)
@@ -0,0 +1,49 @@
+import pytest
+
+from benchmarks.batch_cleaning import clean_per_record, make_results
+from utils.BatchCleaner import BatchCleaner, load_pandas
+
+LAT, LNG = 23.8103, 90.4125
+
+
+@pytest.fixture
+def legacy_clean():
+    """The per-record cleaning rules BatchCleaner replaced, as the reference"""
+    return lambda results: clean_per_record(results, LAT, LNG)
+
+
+@pytest.mark.parametrize('use_pandas', [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(load_pandas() is None, reason='pandas not installed')),
+])
+def test_matches_per_record_cleaning(use_pandas, legacy_clean):
+    results = make_results(600)
+
+    rows, rejected = BatchCleaner(use_pandas=use_pandas).clean(results, LAT, LNG)
+
+    assert rows == legacy_clean(results)
+    assert sum(rejected.values()) == 600 - len(rows)
+
+
+def test_rejections_are_counted_under_the_first_rule():
+    card = {'name': 'Pizza Hut', 'url': 'https://f/1', 'image_url': 'https://f/1.jpg',
+            'cuisine_type': 'pizza', 'rating': '', 'delivery_time': 'Unknown', 'delivery_fee': 'Tk 30'}
+    results = {
+        'foodi': [
+            card,
+            dict(card, name='Unknown Restaurant', url='null'),
+            dict(card, url='none', image_url='https://via.placeholder.com/1.png'),
+            dict(card, image_url='https://'),
+            dict(card, cuisine_type='Not specified'),
+        ],
+        'foodpanda': {'error': 'foodpanda is temporarily unavailable'},
+    }
+
+    rows, rejected = BatchCleaner().clean(results, LAT, LNG)
+
+    assert rejected == {'unknown_name': 1, 'missing_url': 1, 'missing_image': 1, 'missing_cuisine': 1}
+    assert len(rows) == 1
+    assert rows[0]['cuisine_type'] == 'Pizza'
+    assert rows[0]['rating'] == 'Not Reviewed'
+    assert rows[0]['delivery_time'] == ''
+    assert rows[0]['service_area_lat'] == 23.8103
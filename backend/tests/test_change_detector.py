@@ -0,0 +1,114 @@
+import sqlite3
+
+from services.data_collection_service import DatasetBuilder
+from utils.ChangeDetector import ChangeDetector, card_key
+
+LAT, LNG = 23.8103, 90.4125
+
+
+def card(name, url, rating='4.2(10)', **extra):
+    return dict({'name': name, 'url': url, 'image_url': f'{url}/logo.jpg', 'cuisine_type': 'Pizza',
+                 'rating': rating, 'delivery_time': '20-35 min', 'delivery_fee': 'Tk 30',
+                 'platform': 'Foodi', 'offers': []}, **extra)
+
+
+def test_unchanged_listing_is_skipped_after_commit():
+    detector = ChangeDetector()
+    results = {'foodi': [card('Pizza Hut', 'https://f/1'), card('KFC', 'https://f/2')]}
+
+    changed, pending, unchanged = detector.diff(results, LAT, LNG)
+    assert len(changed['foodi']) == 2 and unchanged == []
+
+    # Nothing is remembered until the write is committed
+    assert len(detector.diff(results, LAT, LNG)[0]['foodi']) == 2
+    detector.commit(pending)
+
+    changed, _, unchanged = detector.diff(results, LAT, LNG)
+    assert changed == {} and len(unchanged) == 2
+
+
+def test_only_changed_cards_are_sent_on():
+    detector = ChangeDetector()
+    detector.commit(detector.diff({'foodi': [card('Pizza Hut', 'https://f/1'), card('KFC', 'https://f/2')]},
+                                  LAT, LNG)[1])
+
+    changed, _, unchanged = detector.diff(
+        {'foodi': [card('Pizza Hut', 'https://f/1', rating='4.5(12)'), card('KFC', 'https://f/2')]}, LAT, LNG)
+
+    assert [restaurant['name'] for restaurant in changed['foodi']] == ['Pizza Hut']
+    assert [restaurant['name'] for _, restaurant in unchanged] == ['KFC']
+
+
+def test_same_name_branches_do_not_collide():
+    first, second = card('Pizza Hut', 'https://f/gulshan'), card('Pizza Hut', 'https://f/banani')
+    assert card_key(first) != card_key(second)
+
+    detector = ChangeDetector()
+    detector.commit(detector.diff({'foodi': [first, second]}, LAT, LNG)[1])
+    changed, _, _ = detector.diff({'foodi': [first, dict(second, rating='3.9(4)')]}, LAT, LNG)
+
+    assert [restaurant['url'] for restaurant in changed['foodi']] == ['https://f/banani']
+
+
+def test_failed_cards_are_not_committed():
+    detector = ChangeDetector()
+    results = {'foodi': [card('Pizza Hut', 'https://f/1'), card('KFC', 'https://f/2')]}
+    _, pending, _ = detector.diff(results, LAT, LNG)
+    detector.commit(pending, {('foodi', card_key(results['foodi'][1]))})
+
+    changed, _, unchanged = detector.diff(results, LAT, LNG)
+    assert [restaurant['name'] for restaurant in changed['foodi']] == ['KFC']
+    assert len(unchanged) == 1
+
+
+def test_failed_write_is_retried_on_next_ingest(tmp_path, monkeypatch):
+    builder = DatasetBuilder(str(tmp_path / 'restaurants.db'))
+    builder.ensure_database()
+    data = {'success': True, 'results': {'foodi': [card('Pizza Hut', 'https://f/1'), card('KFC', 'https://f/2')]}}
+
+    upsert = DatasetBuilder._upsert_area_delivery
+
+    def failing_upsert(conn, restaurant_id, restaurant):
+        if restaurant['name'] == 'KFC':
+            raise sqlite3.OperationalError('disk I/O error')
+        return upsert(conn, restaurant_id, restaurant)
+
+    monkeypatch.setattr(DatasetBuilder, '_upsert_area_delivery', staticmethod(failing_upsert))
+    builder.ingest(data, LAT, LNG)
+    monkeypatch.setattr(DatasetBuilder, '_upsert_area_delivery', staticmethod(upsert))
+    builder.ingest(data, LAT, LNG)
+
+    with sqlite3.connect(builder.db_path) as conn:
+        names = sorted(row[0] for row in conn.execute('SELECT name FROM restaurant_listings'))
+    assert names == ['KFC', 'Pizza Hut']
+
+
+def test_unchanged_rescrape_does_not_touch_the_database(tmp_path, monkeypatch):
+    builder = DatasetBuilder(str(tmp_path / 'restaurants.db'))
+    builder.ensure_database()
+    data = {'success': True, 'results': {'foodi': [card('Pizza Hut', 'https://f/1')]}}
+    builder.ingest(data, LAT, LNG)
+
+    with sqlite3.connect(builder.db_path) as conn:
+        conn.execute("UPDATE restaurant_area_delivery SET seen_at = '2000-01-01 00:00:00'")
+        conn.execute("UPDATE restaurants SET updated_at = '2000-01-01 00:00:00'")
+        assert conn.execute('SELECT COUNT(*) FROM tile_seen').fetchone()[0] == 1
+
+    connections = []
+    monkeypatch.setattr(builder, '_connect', lambda: connections.append(1))
+    builder.ingest(data, LAT, LNG)
+    assert connections == []
+
+    with sqlite3.connect(builder.db_path) as conn:
+        updated_at = conn.execute('SELECT updated_at FROM restaurant_listings').fetchone()[0]
+    assert updated_at == '2000-01-01 00:00:00'
+
+
+def test_tile_seen_is_written_once_per_interval():
+    detector = ChangeDetector(seen_interval=600)
+    results = {'foodi': [card('Pizza Hut', 'https://f/1')], 'foodpanda': [],
+               'other': {'error': 'unavailable'}}
+
+    assert detector.seen_due(results, LAT, LNG) == [('foodi', (LAT, LNG)), ('foodpanda', (LAT, LNG))]
+    assert detector.seen_due(results, LAT, LNG) == []
+    assert detector.seen_due(results, LAT + 0.01, LNG) != []
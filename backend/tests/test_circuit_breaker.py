@@ -0,0 +1,87 @@
+import pytest
+
+from utils import CircuitBreaker as circuit_module
+from utils.CircuitBreaker import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(circuit_module.time, 'monotonic', lambda: clock[0])
+    return clock
+
+
+def tripped(clock, **options):
+    breaker = CircuitBreaker(min_calls=4, failure_threshold=0.5, open_seconds=60, **options)
+    for success in (True, False, True, False):
+        breaker.record(success, 1.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_stays_closed_below_min_calls(clock):
+    breaker = CircuitBreaker(min_calls=4)
+    for _ in range(3):
+        breaker.record(False, 1.0)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_opens_at_failure_threshold_and_refuses_calls(clock):
+    breaker = tripped(clock)
+    assert not breaker.allow()
+    clock[0] += 59
+    assert not breaker.allow()
+    assert breaker.retry_in() == pytest.approx(1.0)
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = tripped(clock)
+    clock[0] += 60
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes(clock):
+    breaker = tripped(clock)
+    clock[0] += 60
+    breaker.allow()
+    breaker.record(True, 1.0)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.status()['failure_rate'] == 0.0
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_for_twice_as_long(clock):
+    breaker = tripped(clock, max_open_seconds=100)
+    clock[0] += 60
+    breaker.allow()
+    breaker.record(False, 1.0)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_in() == pytest.approx(100)  # 120, capped at max_open_seconds
+    clock[0] += 99
+    assert not breaker.allow()
+    clock[0] += 1
+    assert breaker.allow()
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = CircuitBreaker(min_calls=2, failure_threshold=1.0, slow_call_seconds=10)
+    breaker.record(True, 11.0)
+    breaker.record(True, 12.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_skipped_probe_lets_the_next_call_probe(clock):
+    breaker = tripped(clock)
+    clock[0] += 60
+    assert breaker.allow()
+
+    breaker.skip()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
@@ -0,0 +1,94 @@
+import argparse
+import threading
+import time
+
+import pytest
+
+from crawler import __main__ as crawler
+from crawler.checkpoint import CrawlCheckpoint
+from crawler.grid import grid_tiles, in_bbox, split_tile
+from crawler.planner import QuadtreePlanner
+
+BBOX = (23.70, 90.33, 23.90, 90.45)
+
+
+def test_should_split_only_dense_new_tiles():
+    planner = QuadtreePlanner(BBOX, min_step_km=0.5, split_at=40)
+
+    assert planner.should_split(2.0, found=20, new_vendors=5, capped=True)
+    assert planner.should_split(2.0, found=45, new_vendors=5, capped=False)
+    assert not planner.should_split(2.0, found=10, new_vendors=5, capped=False)
+    # Nothing new: the area is already covered
+    assert not planner.should_split(2.0, found=45, new_vendors=0, capped=True)
+    # Children would be smaller than the minimum
+    assert not planner.should_split(0.8, found=45, new_vendors=5, capped=True)
+    assert planner.should_split(1.0, found=45, new_vendors=5, capped=True)
+
+
+def test_children_are_quadrants_inside_the_bbox():
+    lat, lng = grid_tiles(BBOX, 2.0)[0]
+    children = split_tile(lat, lng, 2.0)
+
+    assert len(children) == 4
+    assert {child_lat > lat for child_lat, _ in children} == {True, False}
+    assert {child_lng > lng for _, child_lng in children} == {True, False}
+    assert all(abs(child_lat - lat) == pytest.approx(0.5 / 111.32, abs=1e-4) for child_lat, _ in children)
+
+    # Quadrants of a tile on the box's corner that fall outside are dropped
+    corner = QuadtreePlanner(BBOX).children(BBOX[0], BBOX[1], 2.0)
+    assert corner == [(child_lat, child_lng) for child_lat, child_lng in split_tile(BBOX[0], BBOX[1], 2.0)
+                      if in_bbox(child_lat, child_lng, BBOX)]
+    assert len(corner) == 1
+
+
+def test_checkpoint_queues_children_once(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path / 'checkpoint.db'))
+    run = checkpoint.run_key(BBOX, 2.0, adaptive=True)
+    checkpoint.start(run, [(23.8, 90.4)], 2.0)
+
+    position, lat, lng, step_km = checkpoint.claim(run, 3)
+    checkpoint.add_children(run, position, split_tile(lat, lng, step_km), step_km / 2)
+    checkpoint.add_children(run, position, split_tile(lat, lng, step_km), step_km / 2)
+    checkpoint.finish(run, position, 20, new_vendors=20)
+
+    assert checkpoint.progress(run) == {'done': 1, 'pending': 4, 'total': 5, 'restaurants': 20}
+    assert checkpoint.claim(run, 3)[3] == 1.0
+    assert checkpoint.record_vendors(run, [('foodi', 'a'), ('foodi', 'b')]) == 2
+    assert checkpoint.record_vendors(run, [('foodi', 'a'), ('foodpanda', 'a')]) == 1
+
+
+def test_idle_workers_wait_for_tiles_a_split_is_about_to_queue(tmp_path, monkeypatch):
+    checkpoint = CrawlCheckpoint(str(tmp_path / 'checkpoint.db'))
+    run = checkpoint.run_key(BBOX, 2.0, adaptive=True)
+    checkpoint.start(run, [(23.8, 90.4)], 2.0)
+    monkeypatch.setattr(crawler, 'IDLE_POLL_SECONDS', 0.05)
+
+    crawled = []
+    lock = threading.Lock()
+
+    def crawl_tile(scraper_service, lat, lng, args, ingest_lock):
+        with lock:
+            crawled.append((threading.current_thread().name, lat, lng))
+            first = len(crawled) == 1
+        # The coarse tile is slow and dense; its quadrants are quick and sparse
+        time.sleep(0.3 if first else 0.1)
+        rows = [{'url': f'{lat},{lng},{index}'} for index in range(40 if first else 1)]
+        return {'foodi': rows}, first, None
+
+    monkeypatch.setattr(crawler, 'crawl_tile', crawl_tile)
+    args = argparse.Namespace(limit=0, max_attempts=3, step_km=2.0, report_every=100)
+    planner = QuadtreePlanner(BBOX, min_step_km=0.5, split_at=40)
+    stats = crawler.CrawlStats()
+    threads = [threading.Thread(target=crawler.worker, name=f'worker-{index}',
+                                args=(None, checkpoint, run, args, stats, threading.Event(),
+                                      threading.Lock(), planner))
+               for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert checkpoint.progress(run)['done'] == 5
+    # The four quadrants were crawled by more than one worker
+    assert len({name for name, _, _ in crawled[1:]}) > 1
+    assert stats.tiles == 5
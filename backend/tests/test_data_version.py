@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+import app as app_module
+from services.data_collection_service import DatasetBuilder
+
+LAT, LNG = 23.8103, 90.4125
+
+
+def scrape(*names):
+    return {'success': True, 'results': {'foodi': [
+        {'name': name, 'url': f'https://f/{index}', 'image_url': f'https://f/{index}/logo.jpg',
+         'cuisine_type': 'Pizza', 'rating': '4.2(10)', 'delivery_time': '20-35 min',
+         'delivery_fee': 'Tk 30', 'platform': 'Foodi', 'offers': []}
+        for index, name in enumerate(names)]}}
+
+
+@pytest.fixture
+def builder(tmp_path, monkeypatch):
+    builder = DatasetBuilder(str(tmp_path / 'restaurants.db'))
+    monkeypatch.setattr(app_module, 'dataset_builder', builder)
+    return builder
+
+
+def test_write_through_another_instance_changes_version(builder):
+    # Another gunicorn worker or the crawler, sharing the database file
+    other = DatasetBuilder(builder.db_path)
+    before = builder.data_version
+
+    other.ingest(scrape('Pizza Hut'), LAT, LNG)
+
+    assert builder.data_version > before
+
+
+def test_stats_etag_round_trip(builder):
+    client = app_module.app.test_client()
+    builder.ingest(scrape('Pizza Hut'), LAT, LNG)
+
+    first = client.get('/dataset/stats')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    assert client.get('/dataset/stats', headers={'If-None-Match': etag}).status_code == 304
+
+    DatasetBuilder(builder.db_path).ingest(scrape('Pizza Hut', 'KFC'), LAT, LNG)
+    refreshed = client.get('/dataset/stats', headers={'If-None-Match': etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers['ETag'] != etag
+
+
+def test_not_modified_does_not_touch_sqlite(builder, monkeypatch):
+    client = app_module.app.test_client()
+    builder.ingest(scrape('Pizza Hut'), LAT, LNG)
+    etag = client.get('/dataset/stats').headers['ETag']
+
+    def no_sqlite(*args, **kwargs):
+        raise AssertionError('SQLite opened for a conditional GET')
+
+    monkeypatch.setattr(sqlite3, 'connect', no_sqlite)
+    assert client.get('/dataset/stats', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_fresh_instance_reads_the_published_version(builder):
+    assert builder.data_version == 0
+    builder.ingest(scrape('Pizza Hut'), LAT, LNG)
+    version = builder.data_version
+
+    # A fresh process reads the published value without opening the database
+    assert DatasetBuilder(builder.db_path).data_version == version > 0
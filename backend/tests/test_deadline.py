@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from utils.Deadline import Deadline, ScrapeCancelled, current_deadline, set_current_deadline
+from utils.FoodPandaScraper import FoodPandaScraper
+
+
+class FakeDriver:
+    def __init__(self, html):
+        self.html = html
+        self.quit_calls = 0
+        self.title = 'foodpanda'
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def test_check_raises_with_partial_results_once_expired():
+    deadline = Deadline(0.05)
+    deadline.check(['kept'])
+    time.sleep(0.06)
+
+    with pytest.raises(ScrapeCancelled) as raised:
+        deadline.check(['kept'])
+    assert raised.value.reason == 'deadline exceeded'
+    assert raised.value.partial == ['kept']
+
+
+def test_cancel_wakes_sleepers_and_quits_registered_drivers():
+    deadline = Deadline(30)
+    driver = FakeDriver('')
+    deadline.register(driver)
+    threading.Timer(0.05, deadline.cancel, args=('client went away',)).start()
+
+    started = time.monotonic()
+    with pytest.raises(ScrapeCancelled, match='client went away'):
+        deadline.sleep(10)
+    assert time.monotonic() - started < 1
+    assert driver.quit_calls == 1
+
+    # Drivers registered after cancellation are quit right away
+    late = FakeDriver('')
+    deadline.register(late)
+    assert late.quit_calls == 1
+
+
+def test_children_are_bounded_and_cancelled_by_their_parent():
+    parent = Deadline(1)
+    child = parent.child(60)
+    assert child.expires_at == parent.expires_at
+
+    parent.cancel('shutdown')
+    assert child.cancelled and child.reason == 'shutdown'
+
+
+def test_foodpanda_stops_parsing_cards_once_cancelled(monkeypatch):
+    cards = ''.join(f'<li><a href="/restaurant/{index}"><span class="vendor-name">Vendor {index}</span></a></li>'
+                    for index in range(30))
+    html = f'<ul class="vendor-list-revamp">{cards}</ul>'
+    deadline = Deadline(30)
+
+    class CancellingDriver(FakeDriver):
+        reads = 0
+
+        def get(self, url):
+            pass
+
+        def find_element(self, by, value):
+            return object()
+
+        @property
+        def page_source(self):
+            # The listing is read once for block detection, then for parsing;
+            # the request is cancelled in between
+            CancellingDriver.reads += 1
+            if CancellingDriver.reads == 2:
+                deadline.cancel('client went away')
+            return self.html
+
+    scraper = FoodPandaScraper()
+    monkeypatch.setattr(scraper, '_create_driver', lambda: CancellingDriver(html))
+    monkeypatch.setattr(scraper, '_sleep', lambda seconds: None)
+
+    set_current_deadline(deadline)
+    try:
+        with pytest.raises(ScrapeCancelled) as raised:
+            scraper.scrape(23.8, 90.4, '')
+    finally:
+        set_current_deadline(None)
+    assert raised.value.partial == []
+    assert current_deadline() is None
@@ -0,0 +1,119 @@
+import sqlite3
+
+import pytest
+
+from services.entity_resolution_service import EntityResolver, name_key, normalize_name
+
+LAT, LNG = 23.8103, 90.4125
+
+
+@pytest.mark.parametrize('name, normalized', [
+    ('Paragon Momo - Meenabazar ECB Chattar', 'paragon momo'),
+    ('Paragon Momo - ECB Chattar', 'paragon momo'),
+    ("L'eto-Gulshan Avenue", 'leto'),
+    ('Coffee-World', 'coffee world'),
+    ('The Dhaba Mirpur 11', 'dhaba'),
+    ('Kudos (Banani)', 'kudos'),
+    ('কাচ্চি ভাই', 'kachchi bhai'),
+    ('', ''),
+])
+def test_normalize_name(name, normalized):
+    assert normalize_name(name) == normalized
+
+
+def test_spelling_variants_share_a_key():
+    assert name_key(normalize_name('Kacchi Bhai')) == name_key(normalize_name('কাচ্চি ভাই'))
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE restaurants (id INTEGER PRIMARY KEY, name TEXT, platform TEXT, url TEXT)')
+    yield conn
+    conn.close()
+
+
+def assign(resolver, conn, *rows, url=None):
+    listings = []
+    for name, platform, lat, lng in rows:
+        listing_url = url or f'https://{platform}/{name}/{lat}'
+        row_id = conn.execute('INSERT INTO restaurants (name, platform, url) VALUES (?, ?, ?)',
+                              (name, platform, listing_url)).lastrowid
+        listings.append({'id': row_id, 'name': name, 'platform': platform, 'url': listing_url,
+                         'service_area_lat': lat, 'service_area_lng': lng})
+    resolver.assign_groups(conn, listings)
+    return [conn.execute('SELECT restaurant_group_id FROM restaurants WHERE id = ?', (listing['id'],)).fetchone()[0]
+            for listing in listings]
+
+
+def test_same_restaurant_across_platforms_shares_a_group(conn):
+    resolver = EntityResolver()
+    resolver.setup(conn)
+
+    foodi, foodpanda = assign(resolver, conn, ('Kacchi Bhai - Dhanmondi', 'foodi', LAT, LNG),
+                              ('কাচ্চি ভাই', 'foodpanda', LAT + 0.005, LNG))
+
+    assert foodi == foodpanda
+
+
+def test_blocking_only_compares_neighbouring_tiles(conn):
+    resolver = EntityResolver()
+    resolver.setup(conn)
+
+    # Three tiles (~3 km) apart: the same name is a different restaurant
+    near, far = assign(resolver, conn, ('Pizza Hut', 'foodi', LAT, LNG),
+                       ('Pizza Hut', 'foodpanda', LAT + 0.03, LNG))
+
+    assert near != far
+
+
+def test_branches_on_one_platform_stay_apart(conn):
+    resolver = EntityResolver()
+    resolver.setup(conn)
+
+    gulshan, banani = assign(resolver, conn, ('Pizza Hut - Gulshan', 'foodi', LAT, LNG),
+                             ('Pizza Hut - Banani', 'foodi', LAT, LNG))
+
+    assert gulshan != banani
+
+
+def test_groups_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'restaurants.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE restaurants (id INTEGER PRIMARY KEY, name TEXT, platform TEXT, url TEXT)')
+        EntityResolver().setup(conn)
+
+    # Separate resolvers and connections, like a gunicorn worker and the crawler
+    worker, crawler = EntityResolver(), EntityResolver()
+    with sqlite3.connect(path) as conn:
+        assign(worker, conn, ('KFC', 'foodi', LAT, LNG))
+    with sqlite3.connect(path) as conn:
+        foodi, = assign(crawler, conn, ('Kacchi Bhai', 'foodi', LAT, LNG))
+    with sqlite3.connect(path) as conn:
+        foodpanda, = assign(worker, conn, ('কাচ্চি ভাই', 'foodpanda', LAT, LNG))
+
+    assert foodi == foodpanda
+
+
+def test_a_listing_keeps_its_group_when_renamed(conn):
+    resolver = EntityResolver()
+    resolver.setup(conn)
+
+    before, = assign(resolver, conn, ('Pizza Hut', 'foodi', LAT, LNG), url='https://foodi/1')
+    after, = assign(resolver, conn, ('Pizza Hut Express', 'foodi', LAT, LNG), url='https://foodi/1')
+
+    assert before == after
+    assert conn.execute('SELECT COUNT(*) FROM restaurant_group_members').fetchone()[0] == 1
+
+
+def test_deleted_listings_leave_their_group(conn):
+    resolver = EntityResolver()
+    resolver.setup(conn)
+    old, = assign(resolver, conn, ('Pizza Hut', 'foodi', LAT, LNG))
+
+    conn.execute('DELETE FROM restaurants')
+    assert conn.execute('SELECT COUNT(*) FROM restaurant_group_members').fetchone()[0] == 0
+    assert conn.execute('SELECT COUNT(*) FROM restaurant_group_tiles').fetchone()[0] == 0
+
+    new, = assign(resolver, conn, ('Pizza Hut', 'foodpanda', LAT, LNG))
+    assert new != old
@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from utils.Deadline import Deadline, set_current_deadline
+from utils.Geocoder import Gazetteer, Geocoder, RateLimiter
+
+
+class StubNominatim:
+    """Local stand-in for Nominatim's /reverse, answering from a queue of statuses"""
+
+    def __init__(self):
+        self.requests = []
+        self.statuses = []
+        self.delay = 0.0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                stub.requests.append((time.monotonic(), query['lat'][0], query['lon'][0]))
+                time.sleep(stub.delay)
+                status = stub.statuses.pop(0) if stub.statuses else 200
+                body = json.dumps({'display_name': f"Road {query['lat'][0]}, Dhaka"}).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubNominatim()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    path = tmp_path / 'gazetteer.csv'
+    path.write_text('name,lat,lng,city\n'
+                    'Gulshan 1,23.7806,90.4163,Dhaka\n'
+                    'Mirpur 10,23.8069,90.3687,Dhaka\n'
+                    'Agrabad,22.3264,91.8123,Chattogram\n', encoding='utf-8')
+    return Gazetteer(str(path))
+
+
+def make_geocoder(tmp_path, stub, gazetteer, **options):
+    options = dict({'min_interval': 0, 'backoff': 0.05, 'timeout': 2}, **options)
+    return Geocoder(str(tmp_path / 'geocode.db'), base_url=stub.url, gazetteer=gazetteer, **options)
+
+
+def test_cache_hit_does_not_request_again(tmp_path, stub, gazetteer):
+    geocoder = make_geocoder(tmp_path, stub, gazetteer)
+
+    first = geocoder.reverse(23.81031, 90.41212)
+    # Same key at the cache's precision
+    second = geocoder.reverse(23.81029, 90.41238)
+
+    assert first == second == 'Road 23.81031, Dhaka'
+    assert len(stub.requests) == 1
+
+
+def test_requests_are_spaced_by_the_rate_limiter(tmp_path, stub, gazetteer):
+    geocoder = make_geocoder(tmp_path, stub, gazetteer, min_interval=0.2)
+
+    for offset in range(3):
+        geocoder.reverse(23.8 + offset * 0.01, 90.4)
+
+    times = [at for at, _, _ in stub.requests]
+    assert len(times) == 3
+    assert all(later - earlier >= 0.18 for earlier, later in zip(times, times[1:]))
+
+
+def test_rate_limiter_spacing(tmp_path):
+    limiter = RateLimiter(0.1, str(tmp_path / 'geocode.db'))
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.wait()
+    assert time.monotonic() - started >= 0.29
+
+
+def test_rate_limit_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / 'geocode.db')
+    # Separate instances stand in for separate workers: no shared memory
+    limiters = [RateLimiter(0.1, path) for _ in range(3)]
+    times = []
+
+    def call(limiter):
+        limiter.wait()
+        times.append(time.monotonic())
+
+    threads = [threading.Thread(target=call, args=(limiter,)) for limiter in limiters * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    times.sort()
+    assert all(later - earlier >= 0.08 for earlier, later in zip(times, times[1:]))
+
+
+def test_rate_limit_wait_is_capped_by_the_deadline(tmp_path):
+    limiter = RateLimiter(1.0, str(tmp_path / 'geocode.db'))
+    assert limiter.wait(Deadline(0.5))
+
+    started = time.monotonic()
+    # The next slot is ~1s away, more than the deadline leaves
+    assert not limiter.wait(Deadline(0.5))
+    assert time.monotonic() - started < 0.1
+    # Giving up did not take the slot
+    assert limiter.wait(Deadline(2.0))
+
+
+def test_retries_on_server_errors(tmp_path, stub, gazetteer):
+    stub.statuses = [503, 502]
+    geocoder = make_geocoder(tmp_path, stub, gazetteer)
+
+    assert geocoder.reverse(23.81, 90.41) == 'Road 23.81, Dhaka'
+    assert len(stub.requests) == 3
+
+
+def test_failure_falls_back_to_gazetteer_uncached(tmp_path, stub, gazetteer):
+    stub.statuses = [500, 500, 500]
+    geocoder = make_geocoder(tmp_path, stub, gazetteer)
+
+    assert geocoder.reverse(23.781, 90.417) == 'Gulshan 1, Dhaka, Bangladesh'
+    assert len(stub.requests) == 3
+    # The fallback was not cached: Nominatim is asked again
+    assert geocoder.reverse(23.781, 90.417) == 'Road 23.781, Dhaka'
+
+
+def test_offline_uses_nearest_gazetteer_area(tmp_path, stub, gazetteer):
+    geocoder = make_geocoder(tmp_path, stub, gazetteer, offline=True)
+
+    assert geocoder.reverse(23.805, 90.37) == 'Mirpur 10, Dhaka, Bangladesh'
+    assert geocoder.reverse(22.33, 91.81) == 'Agrabad, Chattogram, Bangladesh'
+    # Nothing within 10 km
+    assert geocoder.reverse(24.9, 91.87) == ''
+    assert stub.requests == []
+
+
+def test_kd_tree_matches_brute_force(gazetteer):
+    for lat, lng in [(23.79, 90.40), (23.0, 91.0), (22.3, 91.9), (23.81, 90.36)]:
+        area, _ = gazetteer.nearest(lat, lng)
+        closest = min(gazetteer.areas, key=lambda candidate: (
+            (candidate['lat'] - lat) ** 2 + ((candidate['lng'] - lng) * 0.92) ** 2))
+        assert area == closest
+
+
+def test_lookup_is_bounded_by_the_scrape_deadline(tmp_path, stub, gazetteer):
+    stub.delay = 1.0
+    geocoder = make_geocoder(tmp_path, stub, gazetteer, timeout=10, backoff=1.0)
+    token = set_current_deadline(Deadline(0.3))
+    try:
+        started = time.monotonic()
+        address = geocoder.reverse(23.781, 90.417)
+        elapsed = time.monotonic() - started
+    finally:
+        set_current_deadline(None)
+
+    assert address == 'Gulshan 1, Dhaka, Bangladesh'
+    assert elapsed < 0.8
+    assert len(stub.requests) == 1
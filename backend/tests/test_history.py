@@ -0,0 +1,118 @@
+import sqlite3
+import time
+
+import pytest
+
+import app as app_module
+from services.data_collection_service import DatasetBuilder
+from services.history_service import DAY_SECONDS, VALUES, ObservationStore
+
+LAT, LNG = 23.8103, 90.4125
+NOW = (int(time.time()) // DAY_SECONDS) * DAY_SECONDS + 12 * 3600
+ALL_VALUES = (1 << len(VALUES)) - 1
+
+
+def listing(rating='4.2(10)', fee='Tk 30', eta='20-35 min', offers=()):
+    return {'rating': rating, 'delivery_fee': fee, 'delivery_time': eta, 'offers': list(offers),
+            'service_area_lat': LAT, 'service_area_lng': LNG}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    builder = DatasetBuilder(str(tmp_path / 'restaurants.db'))
+    builder.ensure_database()
+    return builder.db_path
+
+
+def record(store, db_path, restaurant, at, restaurant_id=1):
+    with sqlite3.connect(db_path) as conn:
+        return store.record(conn, restaurant_id, restaurant, now=at)
+
+
+def stored(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('SELECT second, changed, rating, fee FROM observations ORDER BY day, second').fetchall()
+
+
+def test_only_changed_values_are_stored(db_path):
+    store = ObservationStore(db_path)
+    assert record(store, db_path, listing(), NOW)
+    assert not record(store, db_path, listing(), NOW + 60)
+    assert record(store, db_path, listing(rating='4.5(12)'), NOW + 120)
+
+    first, second = stored(db_path)
+    assert first[1] == ALL_VALUES and first[2:] == (4.2, 30.0)
+    # Only rating and review count changed; fee is not repeated
+    assert second[1] == 0b11 and second[2:] == (4.5, None)
+
+
+def test_each_day_starts_with_a_keyframe(db_path):
+    store = ObservationStore(db_path)
+    record(store, db_path, listing(), NOW)
+    assert record(store, db_path, listing(), NOW + DAY_SECONDS)
+    assert [row[1] for row in stored(db_path)] == [ALL_VALUES, ALL_VALUES]
+
+
+def test_a_change_written_by_another_process_is_not_lost(db_path):
+    worker, crawler = ObservationStore(db_path), ObservationStore(db_path)
+    record(worker, db_path, listing(fee='Tk 30'), NOW)
+    record(crawler, db_path, listing(fee='Tk 50'), NOW + 10)
+
+    # The worker's cache still says Tk 30, the table says Tk 50
+    assert record(worker, db_path, listing(fee='Tk 30'), NOW + 20)
+
+    trend = worker.restaurant_trend(1, 'fee', days=2)
+    assert [point['value'] for point in trend] == [30.0, 50.0, 30.0]
+
+
+def test_compaction_folds_old_days_into_rollups(db_path):
+    store = ObservationStore(db_path)
+    old = NOW - 10 * DAY_SECONDS
+    for offset, fee in ((0, 'Tk 30'), (600, 'Tk 60'), (1200, 'Tk 40')):
+        record(store, db_path, listing(fee=fee), old + offset)
+    record(store, db_path, listing(), NOW)
+    record(store, db_path, listing(fee='Tk 30'), NOW - 400 * DAY_SECONDS)
+
+    result = store.compact(raw_days=7, resolution='hour', retention_days=365, now=NOW)
+
+    assert result['observations_compacted'] == 4
+    assert result['rollups_expired'] == 1
+    points = store.restaurant_trend(1, 'fee', days=30)
+    rollup, raw = points
+    assert (rollup['min'], rollup['max'], rollup['value'], rollup['changes']) == (30.0, 60.0, 40.0, 3)
+    assert raw['value'] == 30.0 and 'min' not in raw
+
+
+def test_tile_trend_averages_restaurants_per_day(db_path):
+    store = ObservationStore(db_path)
+    record(store, db_path, listing(rating='4.0(10)'), NOW - 3600, restaurant_id=1)
+    record(store, db_path, listing(rating='4.4(10)'), NOW, restaurant_id=1)
+    record(store, db_path, listing(rating='3.0(10)'), NOW, restaurant_id=2)
+
+    trend = store.tile_trend(LAT, LNG, 'rating', days=2)
+
+    # The last value of the day per restaurant: (4.4 + 3.0) / 2
+    assert [(point['value'], point['restaurants']) for point in trend] == [(3.7, 2)]
+    with pytest.raises(ValueError):
+        store.tile_trend(LAT, LNG, 'stars')
+
+
+def test_compaction_runs_once_per_interval_across_processes(db_path):
+    first = ObservationStore(db_path, compact_interval_hours=6)
+    second = ObservationStore(db_path, compact_interval_hours=6)
+
+    assert first.maybe_compact(now=NOW) is not None
+    assert second.maybe_compact(now=NOW + 60) is None
+    assert ObservationStore(db_path, compact_interval_hours=6).maybe_compact(now=NOW + 6 * 3600) is not None
+
+
+def test_compact_endpoint_needs_the_admin_key(monkeypatch):
+    client = app_module.app.test_client()
+    monkeypatch.setattr(app_module.dataset_builder.observations, 'compact', lambda **options: {})
+
+    monkeypatch.setattr(app_module, 'ADMIN_API_KEY', '')
+    assert client.post('/dataset/compact-history', headers={'X-Admin-Key': ''}).status_code == 403
+
+    monkeypatch.setattr(app_module, 'ADMIN_API_KEY', 's3cret')
+    assert client.post('/dataset/compact-history', headers={'X-Admin-Key': 'wrong'}).status_code == 403
+    assert client.post('/dataset/compact-history', headers={'X-Admin-Key': 's3cret'}).status_code == 200
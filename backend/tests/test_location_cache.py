@@ -0,0 +1,116 @@
+import sqlite3
+import time
+
+import pytest
+
+import utils.FoodiScraper as foodi_module
+from utils.FoodiScraper import FoodiScraper
+from utils.LocationCache import LocationCache
+
+STATE = {'url': 'https://foodibd.com/restaurants?type=delivery', 'cookies': [], 'local_storage': {},
+         'suggestion': 'Gulshan 1'}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LocationCache(str(tmp_path / 'location_cache.db'), capacity=2, max_rows=4)
+
+
+def stored_keys(cache):
+    with sqlite3.connect(cache.db_path) as conn:
+        return {row[0] for row in conn.execute('SELECT key FROM location_states')}
+
+
+def test_state_is_found_by_text_or_tile(cache):
+    cache.put('foodi', 'Gulshan  1, Dhaka', 23.78, 90.41, STATE)
+
+    by_text = cache.get('foodi', 'gulshan 1, dhaka', 0, 0)
+    by_tile = cache.get('foodi', 'somewhere else', 23.78, 90.41)
+
+    assert by_text['url'] == by_tile['url'] == STATE['url']
+    assert by_text['key'] == cache.text_key('foodi', 'Gulshan 1, Dhaka')
+    assert by_tile['key'] == cache.tile_key('foodi', 23.78, 90.41)
+    assert cache.get('foodpanda', 'Gulshan 1, Dhaka', 23.78, 90.41) is None
+
+
+def test_blank_text_is_stored_under_the_tile_only(cache):
+    cache.put('foodi', '', 23.78, 90.41, STATE)
+
+    assert stored_keys(cache) == {cache.tile_key('foodi', 23.78, 90.41)}
+    assert cache.get('foodi', '  ', 23.78, 90.41) is not None
+
+
+def test_memory_keeps_the_most_recently_used_entries(cache):
+    cache.put('foodi', '', 23.70, 90.40, STATE)
+    cache.put('foodi', '', 23.75, 90.40, STATE)
+    # Using the first entry makes the second the least recently used
+    cache.get('foodi', '', 23.70, 90.40)
+    cache.put('foodi', '', 23.80, 90.40, STATE)
+
+    assert list(cache.entries) == [cache.tile_key('foodi', 23.70, 90.40),
+                                   cache.tile_key('foodi', 23.80, 90.40)]
+    # Evicted from memory, still restored from SQLite
+    assert cache.get('foodi', '', 23.75, 90.40) is not None
+
+
+def test_rows_beyond_max_rows_are_evicted_least_recently_used_first(cache):
+    for offset in range(3):
+        cache.put('foodi', f'Area {offset}', 23.70 + offset * 0.05, 90.40, STATE)
+        time.sleep(0.01)
+
+    # Three puts of two keys each, four rows kept: the first area is gone
+    assert stored_keys(cache) == {
+        key for offset in (1, 2) for key in (
+            cache.text_key('foodi', f'Area {offset}'), cache.tile_key('foodi', 23.70 + offset * 0.05, 90.40))}
+
+
+def test_expired_state_is_dropped(cache, monkeypatch):
+    cache.put('foodi', 'Gulshan 1', 23.78, 90.41, STATE)
+    later = time.time() + cache.max_age_seconds + 1
+    monkeypatch.setattr('utils.LocationCache.time.time', lambda: later)
+
+    assert cache.get('foodi', 'Gulshan 1', 23.78, 90.41) is None
+    assert stored_keys(cache) == set()
+
+
+def test_restore_from_a_new_process_and_invalidate(cache):
+    cache.put('foodi', 'Gulshan 1', 23.78, 90.41, STATE)
+    restored = LocationCache(cache.db_path)
+
+    state = restored.get('foodi', 'Gulshan 1', 0, 0)
+    assert state['suggestion'] == 'Gulshan 1'
+
+    restored.invalidate(state['key'])
+    assert restored.get('foodi', 'Gulshan 1', 0, 0) is None
+    # The tile key is separate and still restores
+    assert restored.get('foodi', '', 23.78, 90.41) is not None
+
+
+class DriverStarted(Exception):
+    pass
+
+
+def scrape_until_driver(cache, monkeypatch):
+    """Geocoded addresses of a Foodi scrape stopped where the browser would launch"""
+    geocoded = []
+    scraper = FoodiScraper()
+    monkeypatch.setattr(foodi_module, 'location_cache', cache)
+    monkeypatch.setattr(scraper, 'reverse_geocode_address',
+                        lambda lat, lng: geocoded.append((lat, lng)) or 'Gulshan 1, Dhaka')
+
+    def create_driver():
+        raise DriverStarted()
+
+    monkeypatch.setattr(scraper, '_create_driver', create_driver)
+    with pytest.raises(DriverStarted):
+        scraper.scrape(23.78, 90.41, '')
+    return geocoded
+
+
+def test_cached_tile_is_not_geocoded(cache, monkeypatch):
+    cache.put('foodi', 'Gulshan 1, Dhaka', 23.78, 90.41, STATE)
+    assert scrape_until_driver(cache, monkeypatch) == []
+
+
+def test_uncached_tile_is_geocoded(cache, monkeypatch):
+    assert scrape_until_driver(cache, monkeypatch) == [(23.78, 90.41)]
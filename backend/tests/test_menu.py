@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+
+from models.MenuItem import MenuItem
+from services.data_collection_service import DatasetBuilder
+from services.menu_service import MenuCrawler, MenuStore
+from utils.CircuitBreaker import CircuitBreaker
+from utils.Deadline import current_deadline
+from utils.PolitenessScheduler import ScrapeThrottled
+
+URL = 'https://foodibd.com/restaurant/pizza-hut'
+ITEMS = [
+    {'name': 'Margherita', 'description': 'Tomato, mozzarella', 'price': 'Tk 650', 'category': 'Pizza'},
+    {'name': 'Garlic Bread', 'description': '', 'price': 'Tk 250', 'category': 'Sides'},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    builder = DatasetBuilder(str(tmp_path / 'restaurants.db'))
+    builder.ensure_database()
+    return builder.menu_store
+
+
+def test_content_hash_ignores_order_case_and_padding():
+    reordered = [dict(ITEMS[1], name=' garlic bread '), ITEMS[0]]
+    assert MenuStore.content_hash(reordered) == MenuStore.content_hash(ITEMS)
+    assert MenuStore.content_hash([dict(ITEMS[0], price='Tk 700'), ITEMS[1]]) != MenuStore.content_hash(ITEMS)
+
+
+def test_unchanged_menu_only_moves_crawled_at(store):
+    assert store.save_menu(URL, 'foodi', ITEMS)
+    with sqlite3.connect(store.db_path) as conn:
+        conn.execute("UPDATE menu_snapshots SET crawled_at = '2000-01-01', changed_at = '2000-01-01'")
+        ids = conn.execute('SELECT id FROM menu_items ORDER BY id').fetchall()
+
+    assert not store.save_menu(URL, 'foodi', list(reversed(ITEMS)))
+
+    with sqlite3.connect(store.db_path) as conn:
+        crawled_at, changed_at = conn.execute('SELECT crawled_at, changed_at FROM menu_snapshots').fetchone()
+        assert conn.execute('SELECT id FROM menu_items ORDER BY id').fetchall() == ids
+    assert crawled_at > '2000-01-01' and changed_at == '2000-01-01'
+    assert [item['name'] for item in store.get_menu(URL)] == ['Margherita', 'Garlic Bread']
+
+
+def test_changed_menu_is_rewritten(store):
+    store.save_menu(URL, 'foodi', ITEMS)
+    assert store.save_menu(URL, 'foodi', ITEMS[:1])
+    assert [item['name'] for item in store.get_menu(URL)] == ['Margherita']
+
+
+class FakeDriver:
+    def quit(self):
+        pass
+
+
+class FakeScraper:
+    def __init__(self):
+        self.fetched = []
+        self.deadlines = []
+
+    def _create_driver(self):
+        return FakeDriver()
+
+    def scrape_menu(self, driver, url):
+        self.fetched.append(url)
+        self.deadlines.append(current_deadline())
+        return [MenuItem(**{key: item[key] for key in ('name', 'description', 'price', 'category')})
+                for item in ITEMS]
+
+
+class RecordingScheduler:
+    def __init__(self, throttled=False):
+        self.throttled = throttled
+        self.calls = []
+
+    def acquire(self, platform):
+        if self.throttled:
+            raise ScrapeThrottled(f'{platform} rate limit: next slot in 60s')
+        self.calls.append(('acquire', platform))
+        return 'lease', 0.0
+
+    def release(self, platform, lease, outcome=None):
+        self.calls.append(('release', platform, outcome))
+
+
+def test_each_fetch_goes_through_the_scheduler(store):
+    scheduler = RecordingScheduler()
+    scraper = FakeScraper()
+    crawler = MenuCrawler({'foodi': scraper}, store, concurrency=1, scheduler=scheduler,
+                          breakers={'foodi': CircuitBreaker()})
+
+    stats = crawler.crawl([('foodi', URL), ('foodi', URL + '-2')])
+
+    assert stats['changed'] == 2
+    assert all(0 < deadline.remaining() <= 60 for deadline in scraper.deadlines)
+    assert scheduler.calls == [('acquire', 'foodi'), ('release', 'foodi', 'ok')] * 2
+
+
+def test_open_circuit_and_rate_limit_skip_the_fetch(store):
+    breaker = CircuitBreaker(min_calls=1)
+    breaker.record(False, 1.0)
+    scraper = FakeScraper()
+    crawler = MenuCrawler({'foodi': scraper}, store, concurrency=1, scheduler=RecordingScheduler(),
+                          breakers={'foodi': breaker})
+    assert crawler.crawl([('foodi', URL)])['skipped'] == 1
+
+    crawler = MenuCrawler({'foodi': scraper}, store, concurrency=1,
+                          scheduler=RecordingScheduler(throttled=True), breakers={'foodi': CircuitBreaker()})
+    assert crawler.crawl([('foodi', URL)])['skipped'] == 1
+    assert scraper.fetched == []
@@ -0,0 +1,153 @@
+import sys
+import time
+
+import pytest
+
+from models.Restaurant import Restaurant
+from models.ScrapeRequest import ScrapeRequest
+from services import scraper_service as scraper_module
+from utils import PolitenessScheduler as politeness_module
+from utils.Deadline import current_deadline
+from utils.PolitenessScheduler import PolitenessScheduler, ScrapeThrottled
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the scheduler"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(politeness_module.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    monkeypatch.setenv('SCRAPE_RATE_PER_MINUTE_TEST', '60')
+    monkeypatch.setenv('SCRAPE_BURST_TEST', '2')
+    monkeypatch.setenv('SCRAPE_MAX_CONCURRENT_TEST', '5')
+    return PolitenessScheduler(str(tmp_path / 'politeness.db'))
+
+
+def test_bucket_refills_at_the_configured_rate(scheduler, clock):
+    for _ in range(2):
+        lease, wait = scheduler._try_acquire('test')
+        assert lease is not None
+        scheduler.release('test', lease)
+
+    lease, wait = scheduler._try_acquire('test')
+    assert lease is None and wait == pytest.approx(1.0)
+
+    clock[0] += 0.5
+    assert scheduler._try_acquire('test')[1] == pytest.approx(0.5)
+
+    clock[0] += 0.5
+    assert scheduler._try_acquire('test')[0] is not None
+    # Never refills past the burst
+    clock[0] += 3600
+    assert scheduler.status('test')['tokens'] == 2
+
+
+def test_concurrency_cap_and_backoff(scheduler, clock, monkeypatch):
+    monkeypatch.setenv('SCRAPE_MAX_CONCURRENT_TEST', '1')
+    lease, _ = scheduler._try_acquire('test')
+    assert scheduler._try_acquire('test')[0] is None
+
+    scheduler.release('test', lease, 'error')
+    status = scheduler.status('test')
+    assert status['consecutive_failures'] == 1
+    assert politeness_module.ERROR_BACKOFF_SECONDS / 2 <= status['backoff_seconds'] <= \
+        politeness_module.ERROR_BACKOFF_SECONDS
+    assert scheduler._try_acquire('test')[0] is None
+
+    clock[0] += politeness_module.ERROR_BACKOFF_SECONDS
+    lease, _ = scheduler._try_acquire('test')
+    scheduler.release('test', lease, 'blocked')
+    status = scheduler.status('test')
+    assert status['tokens'] == 0 and status['backoff_seconds'] >= politeness_module.BLOCK_BACKOFF_SECONDS
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.outcomes = []
+
+    def acquire(self, platform):
+        return 'lease', 0.0
+
+    def release(self, platform, lease, outcome=None):
+        self.outcomes.append(outcome)
+
+    def status(self, platform):
+        return {}
+
+
+class EmptyScraper:
+    def scrape(self, lat, lng, text, filters=None):
+        return []
+
+
+class OneCardScraper:
+    def scrape(self, lat, lng, text, filters=None):
+        return [Restaurant('Pizza Hut', 'Pizza', '4.2(10)', '20 min', 'Tk 30', 'foodi', url='https://f/1')]
+
+
+def service_with(monkeypatch, scraper, scheduler):
+    module = type(sys)('politeness_test_scrapers')
+    module.Scraper = scraper
+    monkeypatch.setitem(sys.modules, 'politeness_test_scrapers', module)
+    monkeypatch.setattr(scraper_module, 'SCRAPER_CLASSES', {'foodi': 'politeness_test_scrapers.Scraper'})
+    return scraper_module.ScraperService(scheduler=scheduler)
+
+
+@pytest.mark.parametrize('scraper, outcome', [(EmptyScraper, 'empty'), (OneCardScraper, 'ok')])
+def test_scrape_outcome_is_reported(monkeypatch, scraper, outcome):
+    scheduler = RecordingScheduler()
+    service = service_with(monkeypatch, scraper, scheduler)
+
+    service.scrape(ScrapeRequest(23.8, 90.4, '', {}, 10))
+
+    assert scheduler.outcomes == [outcome]
+
+
+def test_empty_scrape_does_not_back_off(scheduler, clock):
+    lease, _ = scheduler._try_acquire('test')
+    scheduler.release('test', lease, 'empty')
+
+    status = scheduler.status('test')
+    assert status['consecutive_failures'] == 0 and status['backoff_seconds'] == 0
+
+
+class ThrottledScheduler(RecordingScheduler):
+    def acquire(self, platform):
+        raise ScrapeThrottled(f'{platform} rate limit: next slot in 60s')
+
+
+def test_rate_limit_wait_is_not_a_platform_failure(monkeypatch):
+    service = service_with(monkeypatch, OneCardScraper, ThrottledScheduler())
+    breaker = service.breakers['foodi']
+
+    for _ in range(breaker.min_calls * 2):
+        results, status = service.scrape_with_status(ScrapeRequest(23.8, 90.4, '', {}, 10))
+
+    assert results['foodi'] == []
+    assert status['foodi']['truncated'] and 'rate limit' in status['foodi']['reason']
+    assert breaker.state == breaker.CLOSED and breaker.status()['recent_calls'] == 0
+
+
+class SlowScraper:
+    """Returns nothing once the request's deadline has passed, like a scraper swallowing its timeout"""
+
+    def scrape(self, lat, lng, text, filters=None):
+        deadline = current_deadline()
+        while not deadline.cancelled:
+            time.sleep(0.01)
+        return []
+
+
+def test_short_client_deadline_is_not_a_platform_failure(monkeypatch):
+    service = service_with(monkeypatch, SlowScraper, RecordingScheduler())
+    breaker = service.breakers['foodi']
+
+    for _ in range(breaker.min_calls * 2):
+        results, _ = service.scrape_with_status(ScrapeRequest(23.8, 90.4, '', {}, 0.02))
+
+    assert results['foodi'] == []
+    assert breaker.state == breaker.CLOSED and breaker.status()['recent_calls'] == 0
@@ -0,0 +1,49 @@
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def test_scrape_passes_failed_platform_through(client, monkeypatch):
+    results = {
+        'foodi': [{'name': 'Pizza Place', 'rating': '4.2(10)', 'url': 'https://foodibd.com/restaurant/a',
+                   'menu_items': []}],
+        'foodpanda': {'error': 'foodpanda is temporarily unavailable'},
+    }
+    status = {'foodi': {'circuit': 'closed', 'from_cache': False, 'truncated': False},
+              'foodpanda': {'circuit': 'open', 'from_cache': False}}
+    monkeypatch.setattr(app_module.scraper_service, 'scrape_with_status', lambda request: (results, status))
+
+    response = client.post('/scrape?fields=name,rating', json={'lat': 23.8, 'lng': 90.4})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['results']['foodi'] == [{'name': 'Pizza Place', 'rating': '4.2(10)'}]
+    assert body['results']['foodpanda'] == {'error': 'foodpanda is temporarily unavailable'}
+
+
+@pytest.mark.parametrize('deadline', ['soon', -1, 0, True, [60]])
+def test_scrape_rejects_bad_deadline(client, monkeypatch, deadline):
+    monkeypatch.setattr(app_module.scraper_service, 'scrape_with_status',
+                        lambda request: pytest.fail('should not scrape'))
+
+    response = client.post('/scrape', json={'lat': 23.8, 'lng': 90.4, 'deadline_seconds': deadline})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('deadline, expected', [
+    ('60', 60.0), (0.5, 0.5), (10 ** 9, app_module.DEFAULT_DEADLINE_SECONDS), (None, None)])
+def test_scrape_deadline_is_capped(client, monkeypatch, deadline, expected):
+    seen = []
+    monkeypatch.setattr(app_module.scraper_service, 'scrape_with_status',
+                        lambda request: seen.append(request.deadline_seconds) or ({}, {}))
+
+    response = client.post('/scrape', json={'lat': 23.8, 'lng': 90.4, 'deadline_seconds': deadline})
+
+    assert response.status_code == 200
+    assert seen == [expected]
@@ -0,0 +1,82 @@
+import sqlite3
+
+from services.data_collection_service import SCHEMA_VERSION, DatasetBuilder
+
+# restaurants as the original setup_database created it: one row per
+# (listing, service area), delivery info inline
+BASELINE_TABLE = '''
+    CREATE TABLE restaurants (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        cuisine_type TEXT,
+        image_url TEXT,
+        url TEXT,
+        platform TEXT NOT NULL,
+        rating TEXT,
+        restaurant_lat REAL,
+        restaurant_lng REAL,
+        delivery_time TEXT,
+        delivery_fee TEXT,
+        service_area_lat REAL,
+        service_area_lng REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(name, platform, service_area_lat, service_area_lng)
+    )
+'''
+
+
+def baseline_db(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute(BASELINE_TABLE)
+        conn.executemany('''
+            INSERT INTO restaurants (name, cuisine_type, image_url, url, platform, rating,
+                                     delivery_time, delivery_fee, service_area_lat, service_area_lng,
+                                     created_at, updated_at)
+            VALUES (?, 'Pizza', 'https://f/1.jpg', ?, 'foodi', ?, ?, 'Tk 30', ?, 90.4125, ?, ?)
+        ''', [
+            ('Pizza Hut', 'https://f/1', '4.0(10)', '20 min', 23.8103, '2024-01-01', '2024-01-01'),
+            ('Pizza Hut', 'https://f/1', '4.2(12)', '35 min', 23.7806, '2024-01-02', '2024-02-01'),
+            ('KFC', 'https://f/2', '4.5(80)', '25 min', 23.8103, '2024-01-01', '2024-01-01'),
+        ])
+    return path
+
+
+def test_baseline_database_is_split_and_versioned(tmp_path):
+    path = baseline_db(str(tmp_path / 'restaurants.db'))
+
+    builder = DatasetBuilder(path)
+    builder.ensure_database()
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+        restaurants = conn.execute('SELECT name, rating, created_at FROM restaurants ORDER BY name').fetchall()
+        listings = conn.execute('''
+            SELECT name, service_area_lat, delivery_time FROM restaurant_listings
+            ORDER BY name, service_area_lat
+        ''').fetchall()
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    # One identity per listing, with the latest row's values and the first created_at
+    assert restaurants == [('KFC', '4.5(80)', '2024-01-01'), ('Pizza Hut', '4.2(12)', '2024-01-01')]
+    assert listings == [('KFC', 23.8103, '25 min'), ('Pizza Hut', 23.7806, '35 min'),
+                        ('Pizza Hut', 23.8103, '20 min')]
+    assert 'restaurants_legacy' not in tables
+    assert {'dataset_meta', 'restaurant_search', 'restaurant_groups'} <= tables
+    assert [row['name'] for row in builder.search_index.search('hut')] == ['Pizza Hut']
+
+
+def test_setup_runs_once_per_schema_version(tmp_path, monkeypatch):
+    path = baseline_db(str(tmp_path / 'restaurants.db'))
+    DatasetBuilder(path).ensure_database()
+
+    calls = []
+    monkeypatch.setattr(DatasetBuilder, 'setup_database', lambda self: calls.append(self))
+    DatasetBuilder(path).ensure_database()
+    assert calls == []
+
+    # An older version stored in the file runs setup again
+    with sqlite3.connect(path) as conn:
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION - 1}')
+    DatasetBuilder(path).ensure_database()
+    assert len(calls) == 1
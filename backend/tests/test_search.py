@@ -0,0 +1,51 @@
+from services.data_collection_service import DatasetBuilder
+
+LAT, LNG = 23.8103, 90.4125
+
+
+def card(name, url):
+    return {'name': name, 'url': url, 'image_url': f'{url}/logo.jpg', 'cuisine_type': 'Pizza',
+            'rating': '4.2(10)', 'delivery_time': '20-35 min', 'delivery_fee': 'Tk 30',
+            'platform': 'Foodi', 'offers': []}
+
+
+def build(tmp_path):
+    builder = DatasetBuilder(str(tmp_path / 'restaurants.db'))
+    builder.ensure_database()
+    return builder
+
+
+def test_limit_counts_restaurants_not_areas(tmp_path):
+    builder = build(tmp_path)
+    # One chain listed in many nearby service areas, ranked above the rest
+    for step in range(20):
+        builder.ingest({'success': True, 'results': {'foodi': [card('Pizza Pizza Pizza', 'https://f/chain')]}},
+                       LAT + step * 0.001, LNG)
+    for index in range(5):
+        builder.ingest({'success': True, 'results': {'foodi': [card(f'Pizza Corner {index}', f'https://f/{index}')]}},
+                       LAT, LNG + index * 0.001)
+
+    results = builder.search_index.search('pizza', LAT, LNG, radius_km=5, limit=4)
+
+    assert len(results) == 4
+    assert len({result['id'] for result in results}) == 4
+
+
+def test_closest_service_area_is_returned(tmp_path):
+    builder = build(tmp_path)
+    for offset in (0.02, 0.005, 0.01):
+        builder.ingest({'success': True, 'results': {'foodi': [card('Pizza Hut', 'https://f/hut')]}},
+                       LAT + offset, LNG)
+
+    results = builder.search_index.search('pizza', LAT, LNG, radius_km=5)
+
+    assert len(results) == 1
+    assert results[0]['service_area_lat'] == round(LAT + 0.005, 4)
+
+
+def test_radius_filters_by_service_area(tmp_path):
+    builder = build(tmp_path)
+    builder.ingest({'success': True, 'results': {'foodi': [card('Pizza Hut', 'https://f/hut')]}}, LAT + 0.5, LNG)
+
+    assert builder.search_index.search('pizza', LAT, LNG, radius_km=5) == []
+    assert len(builder.search_index.search('pizza')) == 1
@@ -0,0 +1,55 @@
+import logging
+
+from utils.SelectorRegistry import SelectorRegistry
+
+SELECTORS = ['div.suggestion', 'li.location-item', '[data-testid=suggestion]']
+
+
+def registry(tmp_path, **options):
+    return SelectorRegistry(str(tmp_path / 'selector_stats.db'), **options)
+
+
+def test_unknown_slot_keeps_the_given_order(tmp_path):
+    assert registry(tmp_path).order('foodi', 'suggestions', SELECTORS) == SELECTORS
+
+
+def test_last_winner_first_then_by_hit_rate(tmp_path):
+    stats = registry(tmp_path)
+    for _ in range(3):
+        stats.record('foodi', 'suggestions', 'div.suggestion', False)
+    stats.record('foodi', 'suggestions', 'li.location-item', True)
+    stats.record('foodi', 'suggestions', 'li.location-item', False)
+    for _ in range(4):
+        stats.record('foodi', 'suggestions', '[data-testid=suggestion]', True)
+    stats.record('foodi', 'suggestions', 'li.location-item', True)
+
+    assert stats.order('foodi', 'suggestions', SELECTORS) == [
+        'li.location-item', '[data-testid=suggestion]', 'div.suggestion']
+    # Slots are independent
+    assert stats.order('foodpanda', 'suggestions', SELECTORS) == SELECTORS
+
+
+def test_counts_survive_a_restart(tmp_path):
+    stats = registry(tmp_path)
+    stats.record('foodi', 'suggestions', 'div.suggestion', False)
+    stats.record('foodi', 'suggestions', '[data-testid=suggestion]', True, seconds=0.5)
+    stats.flush()
+
+    restarted = registry(tmp_path)
+    assert restarted.order('foodi', 'suggestions', SELECTORS)[0] == '[data-testid=suggestion]'
+    restarted.record('foodi', 'suggestions', '[data-testid=suggestion]', True, seconds=1.5)
+    restarted.flush()
+
+    selector = registry(tmp_path).stats('foodi')['suggestions']['selectors']['[data-testid=suggestion]']
+    assert selector == {'tries': 2, 'hit_rate': 1.0, 'mean_seconds': 1.0}
+
+
+def test_repeated_misses_are_logged_as_errors(tmp_path, caplog):
+    stats = registry(tmp_path, alert_after=2)
+    with caplog.at_level(logging.WARNING):
+        stats.miss('foodi', 'suggestions')
+        stats.miss('foodi', 'suggestions')
+    assert [record.levelno for record in caplog.records] == [logging.WARNING, logging.ERROR]
+
+    stats.record('foodi', 'suggestions', 'div.suggestion', True)
+    assert stats.stats('foodi')['suggestions']['consecutive_misses'] == 0
@@ -0,0 +1,26 @@
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, 'set_verbose', lambda enabled: calls.append(enabled) or object())
+    monkeypatch.setattr(app_module, 'reset_verbose', lambda token: None)
+    return calls
+
+
+@pytest.mark.parametrize('key, header, enabled', [
+    ('', 'anything', False),
+    ('s3cret', 'wrong', False),
+    ('s3cret', None, False),
+    ('s3cret', 's3cret', True),
+])
+def test_header_needs_the_configured_key(calls, monkeypatch, key, header, enabled):
+    monkeypatch.setattr(app_module, 'VERBOSE_LOGS_KEY', key)
+    headers = {'X-Verbose-Logs': header} if header is not None else {}
+
+    app_module.app.test_client().get('/', headers=headers)
+
+    assert calls == ([True] if enabled else [])
@@ -1,18 +1,293 @@
+import os
+import re
+import time
 from abc import ABC, abstractmethod
 
+from bs4 import BeautifulSoup
+from selenium import webdriver
+from selenium.webdriver.support.ui import WebDriverWait
+from models.MenuItem import MenuItem
+from .BrowserProfile import LEAN_BROWSER, DEBUG_SCREENSHOTS, apply_lean_options, block_resources
+from .Deadline import ScrapeCancelled, current_deadline
+from .PolitenessScheduler import ScrapeBlocked
+from .log import get_logger
+
+logger = get_logger('scraper')
+
+DEBUG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "debug")
+
+# Harvest mode: keep scrolling/paging until no new cards show up or a limit is hit
+HARVEST_MAX_CARDS = int(os.environ.get('HARVEST_MAX_CARDS', '500'))
+HARVEST_MAX_STEPS = 60
+HARVEST_IDLE_STEPS = 2
+HARVEST_STEP_PAUSE = 1.5
+
+# Returns cards not seen in an earlier step and marks them, so each node is read once
+NEW_CARDS_SCRIPT = """
+const cards = Array.from(document.querySelectorAll(arguments[0]))
+    .filter(card => !card.hasAttribute('data-harvested'));
+cards.forEach(card => card.setAttribute('data-harvested', '1'));
+return arguments[1] ? cards.map(card => card.outerHTML) : cards;
+"""
+
+# Clicks a visible "load more"/next control if there is one, otherwise scrolls to the bottom
+ADVANCE_SCRIPT = """
+const next = arguments[0] && document.querySelector(arguments[0]);
+if (next && next.offsetParent !== null && !next.disabled) {
+    next.click();
+    return 'page';
+}
+window.scrollTo(0, document.body.scrollHeight);
+return 'scroll';
+"""
+
+# Captcha / bot-wall pages (PerimeterX, Cloudflare, plain 403s) instead of a listing
+BLOCK_PAGE_PATTERN = re.compile(
+    r'px-captcha|captcha-delivery|cf-chl-|attention required|just a moment\.\.\.|'
+    r'access denied|are you a robot|unusual traffic|request blocked|press (?:&amp; |& )?hold',
+    re.IGNORECASE)
+
+PRICE_PATTERN = re.compile(r'(?:৳|Tk\.?|BDT)\s*[\d০-৯][\d০-৯,.]*|[\d০-৯][\d০-৯,.]*\s*(?:৳|Tk|BDT)', re.IGNORECASE)
+
 
 class BaseScraper(ABC):
+    # Platform key, as in ScraperService and the dataset
+    platform = None
+    # CSS selectors for menu parsing, tried in order; set by each platform
+    menu_card_selectors = []
+    menu_name_selectors = ['h3', 'h4', 'h6', '[class*="name"]', '[class*="title"]']
+    menu_description_selectors = ['p', '[class*="description"]']
+    menu_price_selectors = ['[class*="price"]']
+    # find_parent() attributes of the section whose heading is the category
+    menu_section_attrs = None
+    # Headless, no images/fonts/trackers; see utils/BrowserProfile.py
+    lean_browser = LEAN_BROWSER
+    # Extra WebDriver capabilities, e.g. performance logging for benchmarks
+    browser_capabilities = {}
+    # Most cards one scrape returns outside harvest mode (None: no cap); a
+    # result this long is probably truncated
+    card_cap = None
+
     @abstractmethod
     def scrape(self, lat, lng, filters=None):
         """
         Scrape the website based on location coordinates and optional filters
-        
+
         Args:
             lat (float): Latitude coordinate
             lng (float): Longitude coordinate
             filters (dict, optional): Additional filtering parameters
-            
+
         Returns:
             list: List of Restaurant objects
         """
         pass
+
+    def _start_browser(self, options, service=None):
+        """Start Chrome with the platform's options, plus the lean profile when enabled"""
+        if self.lean_browser:
+            apply_lean_options(options)
+        for name, value in self.browser_capabilities.items():
+            options.set_capability(name, value)
+        if service is not None:
+            driver = webdriver.Chrome(service=service, options=options)
+        else:
+            driver = webdriver.Chrome(options=options)
+        if self.lean_browser:
+            block_resources(driver)
+        return driver
+
+    def _debug_screenshot(self, driver, name, requested=False):
+        """Save a screenshot to debug/ when requested, on failure, or with DEBUG_SCREENSHOTS=1"""
+        if driver is None or not (requested or DEBUG_SCREENSHOTS):
+            return None
+        try:
+            os.makedirs(DEBUG_DIR, exist_ok=True)
+            screenshot_path = os.path.join(DEBUG_DIR, f"{name}.png")
+            driver.save_screenshot(screenshot_path)
+            logger.debug("Screenshot saved to %s", screenshot_path)
+            return screenshot_path
+        except Exception as e:
+            logger.debug("Could not save screenshot: %s", e)
+            return None
+
+    @staticmethod
+    def _harvest_limit(filters):
+        """Card limit when filters ask for harvest mode, else None"""
+        filters = filters or {}
+        if not filters.get("harvest"):
+            return None
+        try:
+            return max(1, int(filters.get("max_restaurants") or HARVEST_MAX_CARDS))
+        except (TypeError, ValueError):
+            return HARVEST_MAX_CARDS
+
+    def _harvest_cards(self, driver, selector, limit, as_html=False, next_selector=None, partial=None):
+        """
+        Yield restaurant cards as they appear while scrolling or paging.
+
+        Each step only returns nodes added since the previous one (as
+        WebElements, or outerHTML strings with as_html), so parsing cost is
+        linear in the number of cards. Stops after `limit` cards,
+        HARVEST_IDLE_STEPS steps without new cards, or HARVEST_MAX_STEPS.
+        `partial` is the caller's result list, attached if the deadline hits.
+        """
+        harvested = 0
+        idle_steps = 0
+        for step in range(HARVEST_MAX_STEPS):
+            self._checkpoint(partial)
+            cards = driver.execute_script(NEW_CARDS_SCRIPT, selector, as_html) or []
+            logger.debug("Harvest step %s: %s new cards", step + 1, len(cards))
+
+            if cards:
+                idle_steps = 0
+                for card in cards:
+                    yield card
+                    harvested += 1
+                    if harvested >= limit:
+                        return
+            else:
+                idle_steps += 1
+                if idle_steps >= HARVEST_IDLE_STEPS:
+                    return
+
+            driver.execute_script(ADVANCE_SCRIPT, next_selector)
+            try:
+                self._sleep(HARVEST_STEP_PAUSE)
+            except ScrapeCancelled as e:
+                raise ScrapeCancelled(e.reason, partial)
+
+    # Deadline helpers: no-ops outside a request with a deadline
+
+    def _checkpoint(self, partial=None):
+        """Raise ScrapeCancelled, carrying partial results, once the deadline is up"""
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check(partial)
+
+    def _check_blocked(self, driver):
+        """Raise ScrapeBlocked if the browser is showing a captcha or access-denied page"""
+        if driver is None:
+            return
+        try:
+            page = f"{driver.title}\n{driver.page_source[:20000]}"
+        except Exception:
+            return
+        match = BLOCK_PAGE_PATTERN.search(page)
+        if match:
+            self._debug_screenshot(driver, f"{self.platform}_blocked", requested=True)
+            raise ScrapeBlocked(self.platform, match.group(0))
+
+    def _sleep(self, seconds):
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+    def _wait(self, driver, seconds):
+        """WebDriverWait that never outlives the deadline"""
+        deadline = current_deadline()
+        if deadline is not None:
+            seconds = min(seconds, deadline.remaining())
+        return WebDriverWait(driver, seconds)
+
+    def _track_driver(self, driver):
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.register(driver)
+        return driver
+
+    def _release_driver(self, driver):
+        """Quit a driver that may already have been quit by a cancelled deadline"""
+        if driver is None:
+            return
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.unregister(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug("Driver already closed: %s", e)
+
+    def scrape_menu(self, driver, url):
+        """
+        Load a restaurant page in an existing driver and parse its menu
+
+        Returns:
+            list: List of MenuItem objects
+        """
+        return []
+
+    def parse_menu(self, page_source):
+        """Parse menu items out of a rendered restaurant page"""
+        soup = BeautifulSoup(page_source, 'html.parser')
+
+        cards = []
+        for selector in self.menu_card_selectors:
+            cards = soup.select(selector)
+            if cards:
+                logger.debug("Found %s menu cards using selector: %s", len(cards), selector)
+                break
+
+        items = []
+        seen = set()
+        for card in cards:
+            name = self._select_text(card, self.menu_name_selectors)
+            if not name:
+                continue
+
+            price = self._select_text(card, self.menu_price_selectors)
+            if not price:
+                price_match = PRICE_PATTERN.search(card.get_text(' ', strip=True))
+                price = price_match.group(0) if price_match else ''
+
+            key = (name, price)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            description = self._select_text(card, self.menu_description_selectors)
+            if description in (name, price):
+                description = ''
+
+            items.append(MenuItem(
+                name=name,
+                description=description,
+                price=price,
+                image_url=self._image_url(card),
+                category=self._category_of(card)
+            ))
+
+        return items
+
+    @staticmethod
+    def _select_text(element, selectors):
+        for selector in selectors:
+            found = element.select_one(selector)
+            if found:
+                text = found.get_text(' ', strip=True)
+                if text:
+                    return text
+        return ''
+
+    @staticmethod
+    def _image_url(card):
+        img = card.find('img')
+        if img:
+            return img.get('src') or img.get('data-src')
+
+        # Some menus paint the dish photo as a background image
+        styled = card.find(style=re.compile(r'background-image'))
+        if styled:
+            match = re.search(r'url\(["\']?([^"\')]+)', styled['style'])
+            if match:
+                return match.group(1)
+        return None
+
+    def _category_of(self, card):
+        if not self.menu_section_attrs:
+            return None
+        section = card.find_parent(attrs=self.menu_section_attrs)
+        heading = section.find(['h2', 'h3']) if section else None
+        return heading.get_text(strip=True) if heading else None
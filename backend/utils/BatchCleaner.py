@@ -0,0 +1,192 @@
+from typing import List, Dict, Any, Tuple
+
+# pandas is optional and slow to import, so it is only loaded for use_pandas=True
+pd = None
+
+
+def load_pandas():
+    """Import pandas on first use; None when it is not installed"""
+    global pd
+    if pd is None:
+        try:
+            import pandas
+        except ImportError:  # pandas is optional, the columnar fallback is pure Python
+            return None
+        pd = pandas
+    return pd
+
+
+# Fields copied out of every scraped card
+TEXT_COLUMNS = ('name', 'url', 'image_url', 'cuisine_type',
+                'rating', 'delivery_time', 'delivery_fee')
+
+# Rejection reasons, in the order they are checked
+REJECT_REASONS = ('unknown_name', 'missing_url',
+                  'missing_image', 'missing_cuisine')
+
+MISSING_URL_VALUES = ['null', 'none', '', 'not available']
+MISSING_CUISINE_VALUES = ['not specified', 'unknown', '', 'null']
+MISSING_RATING_VALUES = ['no rating', '0', 'unknown', '', 'null']
+MISSING_DELIVERY_VALUES = ['unknown', 'not specified', '', 'null']
+
+
+class BatchCleaner:
+    """
+    Clean a whole scrape result at once instead of one dict at a time.
+
+    Applies the dataset's quality rules column by column; the per-record
+    reference they are checked against lives in benchmarks/batch_cleaning.py.
+    The default path works on plain lists; pass use_pandas=True to run the
+    same rules as pandas string ops (only faster when pandas has
+    arrow-backed strings, see benchmarks/batch_cleaning.py).
+    """
+
+    def __init__(self, use_pandas=False):
+        self.use_pandas = bool(use_pandas) and load_pandas() is not None
+
+    @staticmethod
+    def to_columns(results: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Turn {platform: [restaurant dicts]} into one list per field"""
+        columns = {column: [] for column in TEXT_COLUMNS + ('platform', 'offers')}
+
+        for platform, restaurants in results.items():
+            # Failed platforms come back as {"error": ...} instead of a list
+            if not restaurants or not isinstance(restaurants, list):
+                continue
+
+            # Fields are usually strings, but may be None or numbers
+            for column in TEXT_COLUMNS:
+                columns[column].extend(
+                    [str(restaurant.get(column) or '') for restaurant in restaurants])
+            columns['platform'].extend([platform.lower()] * len(restaurants))
+            columns['offers'].extend(
+                [list(restaurant.get('offers') or []) for restaurant in restaurants])
+
+        return columns
+
+    def clean(self, results: Dict[str, Any], lat: float, lng: float) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        Validate and normalize every restaurant of a scrape result.
+
+        Returns:
+            tuple: (cleaned restaurant dicts ready for insertion,
+                    {reason: number of rejected restaurants})
+        """
+        columns = self.to_columns(results)
+        if not columns['name']:
+            return [], {reason: 0 for reason in REJECT_REASONS}
+
+        if self.use_pandas:
+            rows, rejected = self._clean_pandas(columns)
+        else:
+            rows, rejected = self._clean_columns(columns)
+
+        location = {
+            # Restaurant's location (same as service area for now)
+            'restaurant_lat': round(lat, 6),
+            'restaurant_lng': round(lng, 6),
+            # Area where this delivery info applies
+            'service_area_lat': round(lat, 4),
+            'service_area_lng': round(lng, 4)
+        }
+        for row in rows:
+            row.update(location)
+
+        return rows, rejected
+
+    def _clean_pandas(self, columns: Dict[str, List[str]]):
+        """Vectorized cleaning with pandas string methods"""
+        df = pd.DataFrame(columns)
+        for column in TEXT_COLUMNS:
+            df[column] = df[column].str.strip()
+
+        name_lower = df['name'].str.lower()
+        url_lower = df['url'].str.lower()
+        image_lower = df['image_url'].str.lower()
+        cuisine_lower = df['cuisine_type'].str.lower()
+
+        # "Unknown Restaurant" is covered by the substring check
+        bad_name = (df['name'] == '') | name_lower.str.contains(
+            'unknown', regex=False)
+        bad_url = url_lower.isin(MISSING_URL_VALUES)
+        bad_image = (image_lower.isin(MISSING_URL_VALUES) |
+                     image_lower.str.contains('placeholder', regex=False) |
+                     (df['image_url'] == 'https://'))
+        bad_cuisine = cuisine_lower.isin(MISSING_CUISINE_VALUES)
+
+        # Count each rejected row once, under the first rule it failed
+        rejected = {}
+        already_rejected = pd.Series(False, index=df.index)
+        for reason, mask in zip(REJECT_REASONS, (bad_name, bad_url, bad_image, bad_cuisine)):
+            rejected[reason] = int((mask & ~already_rejected).sum())
+            already_rejected |= mask
+
+        df = df[~already_rejected]
+
+        df['cuisine_type'] = df['cuisine_type'].str.title()
+        df.loc[df['rating'].str.lower().isin(
+            MISSING_RATING_VALUES), 'rating'] = 'Not Reviewed'
+        for column in ('delivery_time', 'delivery_fee'):
+            df.loc[df[column].str.lower().isin(
+                MISSING_DELIVERY_VALUES), column] = ''
+
+        # Building the dicts from plain lists is much cheaper than to_dict()
+        names = list(df.columns)
+        rows = [dict(zip(names, values)) for values in zip(
+            *(df[column].tolist() for column in names))]
+        return rows, rejected
+
+    def _clean_columns(self, columns: Dict[str, List[str]]):
+        """Columnar cleaning without pandas"""
+        names = [value.strip() for value in columns['name']]
+        urls = [value.strip() for value in columns['url']]
+        images = [value.strip() for value in columns['image_url']]
+        cuisines = [value.strip() for value in columns['cuisine_type']]
+
+        missing_urls = set(MISSING_URL_VALUES)
+        missing_cuisines = set(MISSING_CUISINE_VALUES)
+
+        bad_name = [not name or 'unknown' in name.lower() for name in names]
+        bad_url = [url.lower() in missing_urls for url in urls]
+        bad_image = [image.lower() in missing_urls or 'placeholder' in image.lower() or image == 'https://'
+                     for image in images]
+        bad_cuisine = [cuisine.lower() in missing_cuisines for cuisine in cuisines]
+
+        # Count each rejected row once, under the first rule it failed
+        rejected = dict.fromkeys(REJECT_REASONS, 0)
+        already_rejected = [False] * len(names)
+        for reason, mask in zip(REJECT_REASONS, (bad_name, bad_url, bad_image, bad_cuisine)):
+            rejected[reason] = sum(
+                [failed and not seen for failed, seen in zip(mask, already_rejected)])
+            already_rejected = [
+                failed or seen for failed, seen in zip(mask, already_rejected)]
+
+        keep = [index for index, seen in enumerate(already_rejected) if not seen]
+
+        missing_ratings = set(MISSING_RATING_VALUES)
+        missing_delivery = set(MISSING_DELIVERY_VALUES)
+        ratings = columns['rating']
+        times = columns['delivery_time']
+        fees = columns['delivery_fee']
+        platforms = columns['platform']
+        offers = columns['offers']
+
+        rows = []
+        for index in keep:
+            rating = ratings[index].strip()
+            delivery_time = times[index].strip()
+            delivery_fee = fees[index].strip()
+            rows.append({
+                'name': names[index],
+                'cuisine_type': cuisines[index].title(),
+                'image_url': images[index],
+                'url': urls[index],
+                'platform': platforms[index],
+                'rating': 'Not Reviewed' if rating.lower() in missing_ratings else rating,
+                'delivery_time': '' if delivery_time.lower() in missing_delivery else delivery_time,
+                'delivery_fee': '' if delivery_fee.lower() in missing_delivery else delivery_fee,
+                'offers': offers[index]
+            })
+
+        return rows, rejected
+
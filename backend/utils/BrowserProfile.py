@@ -0,0 +1,64 @@
+import os
+
+# Lean profile for scraping sessions; LEAN_BROWSER=0 restores full page loads
+LEAN_BROWSER = os.environ.get('LEAN_BROWSER', '1') != '0'
+# Screenshots are taken on failure only, unless explicitly enabled
+DEBUG_SCREENSHOTS = os.environ.get('DEBUG_SCREENSHOTS', '0') == '1'
+
+LEAN_WINDOW_SIZE = (1024, 768)
+
+# Chrome switches of the lean profile
+LEAN_ARGUMENTS = [
+    '--headless=new',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-component-extensions-with-background-pages',
+    '--disable-background-networking',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--mute-audio',
+    '--no-first-run',
+    '--blink-settings=imagesEnabled=false',
+]
+
+LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.media_stream': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.geolocation': 2,
+}
+
+# Network.setBlockedURLs patterns: images, media, fonts and third-party trackers.
+# Image URLs are still read from the DOM, only their download is skipped.
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.ico', '*.svg',
+    '*image-resize*',
+    '*.mp4', '*.webm', '*.mp3', '*.m3u8',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*facebook.net*', '*facebook.com/tr*',
+    '*connect.facebook*', '*hotjar.com*', '*clarity.ms*', '*segment.io*',
+    '*segment.com*', '*mixpanel.com*', '*amplitude.com*', '*sentry.io*',
+    '*newrelic.com*', '*nr-data.net*', '*datadoghq*', '*braze.com*',
+    '*appsflyer.com*', '*adjust.com*', '*branch.io*', '*tiktok.com*',
+    '*snapchat.com*', '*criteo*', '*optimizely.com*', '*intercom.io*',
+]
+
+
+def apply_lean_options(options):
+    """Add the lean profile to a ChromeOptions instance"""
+    for argument in LEAN_ARGUMENTS:
+        options.add_argument(argument)
+    options.add_argument('--window-size=%d,%d' % LEAN_WINDOW_SIZE)
+
+    # Keep prefs a platform may already have set
+    prefs = dict(options.experimental_options.get('prefs', {}))
+    prefs.update(LEAN_PREFS)
+    options.add_experimental_option('prefs', prefs)
+    return options
+
+
+def block_resources(driver):
+    """Block heavy and third-party requests for the lifetime of the driver"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
@@ -0,0 +1,159 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple, Iterable
+
+# Card fields that make up its content hash; the rest of a card (menu_items)
+# is stored elsewhere
+HASHED_FIELDS = ('name', 'url', 'image_url', 'cuisine_type', 'rating', 'delivery_time', 'delivery_fee')
+
+
+def _normalize(value) -> str:
+    return ' '.join(str(value or '').split())
+
+
+def card_key(restaurant: Dict[str, Any]) -> str:
+    """Identity of a card within a tile: name and url, as the restaurants table keys it"""
+    return f"{_normalize(restaurant.get('name'))}\x1f{_normalize(restaurant.get('url'))}"
+
+
+def card_hash(restaurant: Dict[str, Any]) -> bytes:
+    """Hash over the whitespace-normalized card fields and its (sorted) offers"""
+    parts = [_normalize(restaurant.get(field)) for field in HASHED_FIELDS]
+    parts.extend(sorted(_normalize(offer) for offer in restaurant.get('offers') or []))
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).digest()
+
+
+def tile_hash(hashes: Dict[str, bytes]) -> bytes:
+    """Hash over a whole listing, independent of card order"""
+    digest = hashlib.blake2b(digest_size=8)
+    for key in sorted(hashes):
+        digest.update(key.encode('utf-8'))
+        digest.update(hashes[key])
+    return digest.digest()
+
+
+class ChangeDetector:
+    """
+    Remembers what was last ingested per (platform, service area) so a
+    re-scrape only sends new or changed cards on to cleaning and the DB.
+
+    Each tile keeps a hash per card plus one over the whole listing; an
+    identical listing is dropped without looking at its cards. State is in
+    memory (8-byte hashes, LRU-bounded by tile) and per process, so a miss
+    only means the rows go through the normal path where the database
+    decides. Hashes are recorded via commit() once the write succeeded.
+
+    Rows of unchanged cards are not touched at all; when a tile was last
+    scraped is tracked once per (platform, area) instead, see seen_due().
+    """
+
+    def __init__(self, max_tiles: int = 20000, seen_interval: float = 600.0):
+        self.max_tiles = max_tiles
+        self.seen_interval = seen_interval
+        self.lock = threading.Lock()
+        # (platform, area) -> (tile hash, {card key: card hash})
+        self.tiles = OrderedDict()
+        # (platform, area) -> monotonic time its last-seen mark was written
+        self.seen_marks = OrderedDict()
+
+    @staticmethod
+    def area(lat: float, lng: float) -> Tuple[float, float]:
+        # Same rounding as the service_area_lat/lng columns
+        return round(lat, 4), round(lng, 4)
+
+    def diff(self, results: Dict[str, Any], lat: float, lng: float) -> Tuple[Dict[str, List], Dict, List]:
+        """
+        Split a scrape result into what still needs ingesting.
+
+        Returns ({platform: changed cards}, pending state for commit(),
+        [(platform, card)] of the unchanged cards skipped).
+        """
+        area = self.area(lat, lng)
+        changed = {}
+        pending = {}
+        unchanged = []
+
+        for platform, restaurants in results.items():
+            # Failed platforms come back as {"error": ...} instead of a list
+            if not restaurants or not isinstance(restaurants, list):
+                continue
+
+            hashes = {card_key(restaurant): card_hash(restaurant) for restaurant in restaurants}
+            listing_hash = tile_hash(hashes)
+            key = (platform.lower(), area)
+            with self.lock:
+                known = self.tiles.get(key)
+                if known is not None:
+                    self.tiles.move_to_end(key)
+
+            if known is not None and known[0] == listing_hash:
+                unchanged.extend((platform, restaurant) for restaurant in restaurants)
+                continue
+
+            known_cards = known[1] if known is not None else {}
+            rows = []
+            for restaurant in restaurants:
+                key_of_card = card_key(restaurant)
+                if known_cards.get(key_of_card) == hashes[key_of_card]:
+                    unchanged.append((platform, restaurant))
+                else:
+                    rows.append(restaurant)
+            changed[platform] = rows
+            # Cards that dropped out of this listing are forgotten with it;
+            # the stored rows for them are left alone, as before
+            pending[key] = (listing_hash, hashes)
+
+        return changed, pending, unchanged
+
+    def commit(self, pending: Dict, failed: Iterable[Tuple[str, str]] = ()):
+        """
+        Record listings from diff() once they have been written, leaving out
+        the (platform, card key) pairs whose write failed so they are sent
+        again next time.
+        """
+        failed_by_platform = {}
+        for platform, key_of_card in failed:
+            failed_by_platform.setdefault(platform.lower(), set()).add(key_of_card)
+
+        with self.lock:
+            for key, state in pending.items():
+                failed_cards = failed_by_platform.get(key[0])
+                if failed_cards:
+                    hashes = {card: digest for card, digest in state[1].items() if card not in failed_cards}
+                    # No longer the hash of the full listing, so it is diffed card by card
+                    state = (tile_hash(hashes), hashes)
+                self.tiles[key] = state
+                self.tiles.move_to_end(key)
+            while len(self.tiles) > self.max_tiles:
+                self.tiles.popitem(last=False)
+
+    def seen_due(self, results: Dict[str, Any], lat: float, lng: float) -> List[Tuple[str, Tuple[float, float]]]:
+        """
+        (platform, area) pairs of a scrape whose last-seen mark is older than
+        `seen_interval`, claimed as written now. Keeps a crawl of unchanged
+        tiles to at most one small write per tile and interval.
+        """
+        area = self.area(lat, lng)
+        now = time.monotonic()
+        due = []
+        with self.lock:
+            for platform, restaurants in results.items():
+                if not isinstance(restaurants, list):
+                    continue
+                key = (platform.lower(), area)
+                marked_at = self.seen_marks.get(key)
+                if marked_at is not None and now - marked_at < self.seen_interval:
+                    continue
+                self.seen_marks[key] = now
+                self.seen_marks.move_to_end(key)
+                due.append(key)
+            while len(self.seen_marks) > self.max_tiles:
+                self.seen_marks.popitem(last=False)
+        return due
+
+    def clear(self):
+        """Forget everything, e.g. after rows were deleted from the database"""
+        with self.lock:
+            self.tiles.clear()
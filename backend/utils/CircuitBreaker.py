@@ -0,0 +1,124 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for one platform.
+
+    Keeps the outcome and duration of the last `window` scrapes. When at
+    least `min_calls` are recorded and the failure rate reaches
+    `failure_threshold` the circuit opens: calls are refused for
+    `open_seconds` (doubling on each failed probe, up to `max_open_seconds`),
+    then one probe call is let through (half-open) to decide whether to
+    close again. Calls slower than `slow_call_seconds` count as failures.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window: int = 20, min_calls: int = 4, failure_threshold: float = 0.5,
+                 open_seconds: float = 60, max_open_seconds: float = 900,
+                 slow_call_seconds: float = 120, min_timeout: float = 30,
+                 max_timeout: float = 180, timeout_headroom: float = 1.5):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_headroom = timeout_headroom
+
+        self.lock = threading.Lock()
+        self.outcomes = deque(maxlen=window)
+        self.durations = deque(maxlen=window)
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.current_open_seconds = open_seconds
+        self.probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; a True in half-open state is the probe"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.current_open_seconds:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record(self, success: bool, duration: float):
+        success = success and duration < self.slow_call_seconds
+        with self.lock:
+            self.outcomes.append(success)
+            if success:
+                self.durations.append(duration)
+
+            if self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+                if success:
+                    self.state = self.CLOSED
+                    self.current_open_seconds = self.open_seconds
+                    self.outcomes.clear()
+                    self.outcomes.append(True)
+                else:
+                    self._open(min(self.current_open_seconds * 2, self.max_open_seconds))
+            elif self.state == self.CLOSED and len(self.outcomes) >= self.min_calls:
+                failures = self.outcomes.count(False)
+                if failures / len(self.outcomes) >= self.failure_threshold:
+                    self._open(self.open_seconds)
+
+    def skip(self):
+        """A call allow() let through did not run after all: free the probe, count nothing"""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def _open(self, seconds: float):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.current_open_seconds = seconds
+
+    def p95(self) -> Optional[float]:
+        """p95 duration of recent successful calls (None until there are some)"""
+        with self.lock:
+            durations = sorted(self.durations)
+        if not durations:
+            return None
+        return durations[min(len(durations) - 1, math.ceil(0.95 * len(durations)) - 1)]
+
+    def timeout(self) -> float:
+        """Time budget for the next call: p95 plus headroom, within bounds"""
+        p95 = self.p95()
+        if p95 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p95 * self.timeout_headroom))
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through"""
+        with self.lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.current_open_seconds - (time.monotonic() - self.opened_at))
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            outcomes = list(self.outcomes)
+            state = self.state
+        p95 = self.p95()
+        return {
+            'state': state,
+            'recent_calls': len(outcomes),
+            'failure_rate': round(outcomes.count(False) / len(outcomes), 3) if outcomes else 0.0,
+            'p95_seconds': round(p95, 2) if p95 is not None else None,
+            'timeout_seconds': round(self.timeout(), 2),
+            'retry_in_seconds': round(self.retry_in(), 1)
+        }
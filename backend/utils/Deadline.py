@@ -0,0 +1,106 @@
+import contextvars
+import threading
+import time
+from typing import List, Optional
+
+_current_deadline = contextvars.ContextVar('scrape_deadline', default=None)
+
+
+class ScrapeCancelled(Exception):
+    """Raised inside a scraper once its deadline passed or it was cancelled"""
+
+    def __init__(self, reason: str, partial: Optional[List] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.partial = partial or []
+
+
+class Deadline:
+    """
+    Time budget and cancellation flag shared by a request and its scrapers.
+
+    Scrapers check it between phases and sleep on it, so cancelling wakes
+    them immediately; browsers registered with it are quit on cancel, which
+    also aborts any WebDriver call in flight. Cancelling a deadline cancels
+    its children.
+    """
+
+    def __init__(self, seconds: float, parent: Optional['Deadline'] = None):
+        self.expires_at = time.monotonic() + seconds
+        if parent is not None:
+            self.expires_at = min(self.expires_at, parent.expires_at)
+        self.reason = None
+        self.lock = threading.Lock()
+        self._event = threading.Event()
+        self._drivers = []
+        self._children = []
+        if parent is not None:
+            parent._add_child(self)
+
+    def child(self, seconds: float) -> 'Deadline':
+        return Deadline(seconds, parent=self)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or self.remaining() <= 0
+
+    def cancel(self, reason: str = 'cancelled'):
+        with self.lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            drivers, self._drivers = self._drivers, []
+            children = list(self._children)
+
+        for child in children:
+            child.cancel(reason)
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def check(self, partial: Optional[List] = None):
+        """Raise ScrapeCancelled (carrying partial results) if time is up"""
+        if self.cancelled:
+            raise ScrapeCancelled(self.reason or 'deadline exceeded', partial)
+
+    def sleep(self, seconds: float):
+        """time.sleep that wakes up and raises as soon as the deadline is cancelled or passes"""
+        self.check()
+        if self._event.wait(min(seconds, self.remaining())) or seconds >= self.remaining():
+            self.check()
+
+    def register(self, driver):
+        """Quit this driver when the deadline is cancelled"""
+        with self.lock:
+            cancelled = self._event.is_set()
+            if not cancelled:
+                self._drivers.append(driver)
+        if cancelled:
+            driver.quit()
+
+    def unregister(self, driver):
+        with self.lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+
+    def _add_child(self, child: 'Deadline'):
+        with self.lock:
+            cancelled = self._event.is_set()
+            if not cancelled:
+                self._children.append(child)
+        if cancelled:
+            child.cancel(self.reason)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def set_current_deadline(deadline: Optional[Deadline]):
+    return _current_deadline.set(deadline)
@@ -0,0 +1,63 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from . import fastjson
+
+# Top-level keys stamped with the build time; they would change the hash of
+# otherwise identical content
+VOLATILE_KEYS = frozenset(('generated_at', 'last_updated'))
+
+
+def content_etag(payload) -> str:
+    """Stable hash of a response payload, independent of the worker that built it"""
+    if isinstance(payload, dict):
+        payload = {key: value for key, value in payload.items() if key not in VOLATILE_KEYS}
+    return hashlib.blake2b(fastjson.dumps(payload), digest_size=16).hexdigest()
+
+
+class ETagCache:
+    """
+    Last ETag handed out per representation, so conditional requests can be
+    answered without rebuilding the response.
+
+    An entry is valid while the dataset version it was computed at is
+    current and its TTL has not run out; the TTL is the same one the
+    response cache behind it uses, and is what Cache-Control max-age is
+    derived from.
+    """
+
+    def __init__(self, capacity: int = 2048):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def lookup(self, key: Hashable, version) -> Optional[Tuple[str, float]]:
+        """(etag, seconds left) for a still valid entry, else None"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            etag, entry_version, expires_at = entry
+            if entry_version != version or expires_at <= now:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        return etag, expires_at - now
+
+    def store(self, key: Hashable, version, etag: str, ttl_seconds: float):
+        with self.lock:
+            self.entries[key] = (etag, version, time.time() + ttl_seconds)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+etag_cache = ETagCache()
@@ -7,77 +7,170 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import os
 from .BaseScraper import BaseScraper  
+from .tracing import tracer
+from .Deadline import ScrapeCancelled
+from .PolitenessScheduler import ScrapeBlocked
+from .SelectorRegistry import selector_registry
 from models.Restaurant import Restaurant
+from .log import get_logger
+
+logger = get_logger('foodpanda')
 
 class FoodPandaScraper(BaseScraper):
+    menu_card_selectors = [
+        'li[data-testid="menu-product"]',
+        'div[data-testid="menu-product"]',
+        'li.dish-card',
+        'div[class*="dish-card"]',
+        'article[class*="product-tile"]'
+    ]
+    menu_name_selectors = [
+        '[data-testid="menu-product-name"]',
+        '[class*="dish-name"]',
+        'h3'
+    ]
+    menu_description_selectors = [
+        '[data-testid="menu-product-description"]',
+        '[class*="dish-description"]',
+        'p'
+    ]
+    menu_price_selectors = [
+        '[data-testid="menu-product-price"]',
+        '[class*="price"]'
+    ]
+    menu_section_attrs = {'data-testid': 'menu-category-section'}
+    platform = "foodpanda"
+
     def __init__(self):
         self.base_url = "https://www.foodpanda.com.bd/restaurants/new"
 
+    def _create_driver(self):
+        options = webdriver.ChromeOptions()
+        # options.add_argument("--headless")  
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        options.add_argument("--user-agent=Mozilla/5.0...")
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option("useAutomationExtension", False)
+        return self._start_browser(options)
+
+    def scrape_menu(self, driver, url):
+        """Load a FoodPanda restaurant page and parse its menu"""
+        self._checkpoint()
+        driver.get(url)
+        self._check_blocked(driver)
+        try:
+            self._wait(driver, 15).until(
+                EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, ", ".join(self.menu_card_selectors)))
+            )
+        except Exception:
+            self._checkpoint()
+            logger.warning("No menu cards appeared for %s", url)
+            return []
+
+        # Menu sections below the fold render lazily
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        self._sleep(2)
+        return self.parse_menu(driver.page_source)
+
     def scrape(self, lat, lng, text, filters=None):
         """Scrape FoodPanda for restaurants near the given coordinates"""
         url = f"{self.base_url}?lng={lng}&lat={lat}&vertical=restaurants"
-        print(f"[DEBUG] Starting to scrape URL: {url}")
+        logger.debug("Starting to scrape URL: %s", url)
+        phases = tracer.phases(platform="foodpanda")
+        driver = None
 
         try:
-            options = webdriver.ChromeOptions()
-            # options.add_argument("--headless")  
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--user-agent=Mozilla/5.0...")
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option("useAutomationExtension", False)
-
-            print("[DEBUG] Starting Chrome browser...")
-            driver = webdriver.Chrome(options=options)
+            logger.debug("Starting Chrome browser...")
+            phases.start("browser_launch")
+            driver = self._track_driver(self._create_driver())
             
-            print(f"[DEBUG] Loading URL: {url}")
+            logger.debug("Loading URL: %s", url)
+            phases.start("navigation")
+            self._checkpoint()
             driver.get(url)
+            self._check_blocked(driver)
             
             # Wait for the main container to load
-            print("[DEBUG] Waiting for restaurant list to load...")
-            wait = WebDriverWait(driver, 20)
+            logger.debug("Waiting for restaurant list to load...")
+            phases.start("wait")
+            self._checkpoint()
+            wait = self._wait(driver, 20)
             vendor_list = wait.until(
                 EC.presence_of_element_located((By.CLASS_NAME, "vendor-list-revamp"))
             )
             
             # Let the dynamic content load fully
-            time.sleep(5)
-            
-            # Save screenshot for debugging
-            debug_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "debug")
-            os.makedirs(debug_dir, exist_ok=True)
-            screenshot_path = os.path.join(debug_dir, "foodpanda_screenshot.png")
-            driver.save_screenshot(screenshot_path)
-            print(f"[DEBUG] Screenshot saved to {screenshot_path}")
-
-            # Get page source after content is loaded
-            page_source = driver.page_source
-            driver.quit()
-
-            soup = BeautifulSoup(page_source, 'html.parser')
+            self._sleep(5)
             
-            # Try multiple selector patterns to find restaurant elements
+            # Screenshot only when asked for; failures take their own below
+            if (filters or {}).get("debug_screenshot"):
+                phases.start("screenshot")
+                self._debug_screenshot(driver, "foodpanda_screenshot", requested=True)
+
+            # Try multiple selector patterns to find restaurant elements, the
+            # one that matched last time first
             restaurant_elements = []
-            selectors = [
+            selectors = selector_registry.order("foodpanda", "cards", [
                 'ul.vendor-list-revamp > li',
                 'li.vendor-tile-new-1',
                 'div[data-testid="vendor-tile-new"]',
                 'div[class*="vendor-tile"]'
-            ]
-            
-            for selector in selectors:
-                restaurant_elements = soup.select(selector)
-                if restaurant_elements:
-                    print(f"[DEBUG] Found {len(restaurant_elements)} restaurants using selector: {selector}")
-                    break
-                    
-            if not restaurant_elements:
-                print("[DEBUG] No restaurant elements found with any selector")
-                return []
+            ])
 
+            phases.start("extraction")
             restaurants = []
+            seen_urls = set()
+            harvest_limit = self._harvest_limit(filters)
+
+            if harvest_limit:
+                # Harvest mode: parse each newly loaded tile while scrolling
+                selector = None
+                for candidate in selectors:
+                    started = time.monotonic()
+                    matched = bool(driver.find_elements(By.CSS_SELECTOR, candidate))
+                    selector_registry.record("foodpanda", "cards", candidate, matched,
+                                             time.monotonic() - started)
+                    if matched:
+                        selector = candidate
+                        break
+                if selector is None:
+                    selector_registry.miss("foodpanda", "cards")
+                    selector = selectors[0]
+                logger.debug("Harvesting up to %s restaurants with selector: %s", harvest_limit, selector)
+                restaurant_elements = (
+                    BeautifulSoup(html, 'html.parser').find()
+                    for html in self._harvest_cards(
+                        driver, selector, harvest_limit, as_html=True, partial=restaurants)
+                )
+            else:
+                # Get page source after content is loaded
+                page_source = driver.page_source
+                self._release_driver(driver)
+                driver = None
+
+                soup = BeautifulSoup(page_source, 'html.parser')
+
+                for selector in selectors:
+                    started = time.monotonic()
+                    restaurant_elements = soup.select(selector)
+                    selector_registry.record("foodpanda", "cards", selector, bool(restaurant_elements),
+                                             time.monotonic() - started)
+                    if restaurant_elements:
+                        logger.debug(
+                            "Found %s restaurants using selector: %s", len(restaurant_elements), selector)
+                        break
+
+                if not restaurant_elements:
+                    logger.debug("No restaurant elements found with any selector")
+                    selector_registry.miss("foodpanda", "cards")
+                    phases.end()
+                    return []
+
             for idx, restaurant_elem in enumerate(restaurant_elements):
+                # Out of time: keep what has been extracted so far
+                self._checkpoint(restaurants)
                 try:
                     # Link and URL
                     link = restaurant_elem.find('a', {'data-testid': lambda x: x and x.startswith('vendor-tile')}) or \
@@ -86,6 +179,12 @@ class FoodPandaScraper(BaseScraper):
                     if restaurant_url and not restaurant_url.startswith('http'):
                         restaurant_url = f"https://www.foodpanda.com.bd{restaurant_url}"
 
+                    # The same vendor can be listed twice (e.g. promoted and regular tiles)
+                    if restaurant_url:
+                        if restaurant_url in seen_urls:
+                            continue
+                        seen_urls.add(restaurant_url)
+
                     # Name
                     name_elem = restaurant_elem.select_one('[class*="vendor-name"], [class*="name"]') or \
                             restaurant_elem.find('h2')
@@ -119,7 +218,7 @@ class FoodPandaScraper(BaseScraper):
                                     any(keyword in offer_text.lower() for keyword in ['off', '%', 'tk', 'free', 'discount', 'buy', 'get', 'deal']) and
                                         offer_text not in offers):
                                     offers.append(offer_text)
-                                    print(f"[DEBUG] Found offer: {offer_text}")
+                                    logger.debug("Found offer: %s", offer_text)
                         
                         data_offers = restaurant_elem.find_all(
                             attrs={"data-testid": lambda x: x and "tag" in x.lower()})
@@ -130,7 +229,7 @@ class FoodPandaScraper(BaseScraper):
                                     offer_text not in offers):
                                 offers.append(offer_text)
                     except Exception as e:
-                        print(f"[DEBUG] Error extracting offers: {str(e)}")
+                        logger.debug("Error extracting offers: %s", e)
 
                     # Rating and review count
                     try:
@@ -146,13 +245,13 @@ class FoodPandaScraper(BaseScraper):
                             '[class*="bds-c-rating__label-secondary"]')
                         if reviews_elem and reviews_elem.text:
                             reviews_text = reviews_elem.text.strip()
-                            print(f"[DEBUG] Found reviews element text: '{reviews_text}'")
+                            logger.debug("Found reviews element text: '%s'", reviews_text)
 
                             # Extract number from parentheses like "(500+)" or "(50)"
                             reviews_match = re.search(r'\((\d+\+?)\)', reviews_text)
                             if reviews_match:
                                 reviews_count = reviews_match.group(1)
-                                print(f"[DEBUG] Extracted reviews count: {reviews_count}")
+                                logger.debug("Extracted reviews count: %s", reviews_count)
                             
                         # Format the rating with reviews count
                         if rating and rating != "0":
@@ -163,9 +262,9 @@ class FoodPandaScraper(BaseScraper):
                         else:
                             final_rating = "No rating"
 
-                        print(f"[DEBUG] Final rating: {final_rating}")
+                        logger.debug("Final rating: %s", final_rating)
                     except Exception as e:
-                        print(f"[DEBUG] Error extracting rating: {str(e)}")
+                        logger.debug("Error extracting rating: %s", e)
                         rating = "No rating"
 
 
@@ -182,8 +281,8 @@ class FoodPandaScraper(BaseScraper):
                                 vendor_info_elements = restaurant_elem.find_all(
                                     "div", class_="vendor-info-row")
 
-                            print(
-                                f"[DEBUG] Found {len(vendor_info_elements)} vendor-info-row elements")
+                            logger.debug(
+                                "Found %s vendor-info-row elements", len(vendor_info_elements))
 
                             import re
                             for info_elem in vendor_info_elements:
@@ -198,24 +297,22 @@ class FoodPandaScraper(BaseScraper):
                                     if not child_text or len(child_text) < 2:
                                         continue
 
-                                    print(
-                                        f"[DEBUG] Processing child text: '{child_text}'")
+                                    logger.debug("Processing child text: '%s'", child_text)
 
                                     if any(keyword in child_text.lower() for keyword in ['min']) and delivery_time == "Unknown":
                                         time_match = re.search(
                                             r'(\d+(?:-\d+)?\s*min)', child_text, re.IGNORECASE)
                                         if time_match:
                                             delivery_time = time_match.group(1)
-                                            print(
-                                                f"[DEBUG] Extracted delivery time: {delivery_time}")
+                                            logger.debug(
+                                                "Extracted delivery time: %s", delivery_time)
 
                                     elif any(keyword in child_text for keyword in ['Tk', '৳']) and delivery_fee == "Unknown":
                                         fee_match = re.search(
                                             r'((?:Tk|৳)\s*\d+)', child_text)
                                         if fee_match:
                                             delivery_fee = fee_match.group(1)
-                                            print(
-                                                f"[DEBUG] Extracted delivery fee: {delivery_fee}")
+                                            logger.debug("Extracted delivery fee: %s", delivery_fee)
 
                                     elif any(keyword in child_text for keyword in ['Cuisines', 'cuisine']) and cuisine_type == "Not specified":
                                         # Extract cuisine type from text
@@ -223,18 +320,14 @@ class FoodPandaScraper(BaseScraper):
                                             # Remove the keyword part and strip whitespace
                                             cuisine_type = child_text.replace(
                                                 'Cuisines', '').replace('cuisine', '').strip()
-                                            print(
-                                                f"[DEBUG] Extracted cuisine type: {cuisine_type}")
+                                            logger.debug("Extracted cuisine type: %s", cuisine_type)
 
 
-                            print(
-                                f"[DEBUG] Final extracted - Time: '{delivery_time}', Fee: '{delivery_fee}', Cuisine: '{cuisine_type}'")
+                            logger.debug(
+                                "Final extracted - Time: '%s', Fee: '%s', Cuisine: '%s'", delivery_time, delivery_fee, cuisine_type)
 
                     except Exception as e:
-                            print(
-                                f"[DEBUG] Error extracting vendor info: {str(e)}")
-                            import traceback
-                            traceback.print_exc()
+                            logger.debug("Error extracting vendor info: %s", e)
 
                     # Image
                     try:
@@ -258,9 +351,9 @@ class FoodPandaScraper(BaseScraper):
                         if not image_url or image_url == "":
                             image_url = img_elem.get('data-src') if img_elem else "https://micro-assets.foodora.com/img/logo-placeholder-fp.svg"
                             
-                        print(f"[DEBUG] Found image URL: {image_url}")
+                        logger.debug("Found image URL: %s", image_url)
                     except Exception as e:
-                        print(f"[DEBUG] Error extracting image: {str(e)}")
+                        logger.debug("Error extracting image: %s", e)
                         image_url = "https://micro-assets.foodora.com/img/logo-placeholder-fp.svg"
 
                     restaurant = Restaurant(
@@ -278,13 +371,25 @@ class FoodPandaScraper(BaseScraper):
                     restaurants.append(restaurant)
                     
                 except Exception as e:
-                    print(f"[DEBUG] Error extracting restaurant #{idx+1} data: {str(e)}")
+                    logger.debug("Error extracting restaurant #%s data: %s", idx+1, e)
 
-            print(f"[DEBUG] Successfully extracted {len(restaurants)} restaurants")
+            logger.info("Successfully extracted %s restaurants", len(restaurants))
+            phases.end()
             return restaurants
 
+        except (ScrapeCancelled, ScrapeBlocked) as e:
+            phases.end(e)
+            raise
+
         except Exception as e:
-            print(f"[DEBUG] Error scraping FoodPanda: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            return []
\ No newline at end of file
+            phases.end(e)
+            # A cancelled deadline quits the browser, which surfaces here as a WebDriver error
+            self._checkpoint()
+            # A vendor list that never loaded may be a bot wall in its place
+            self._check_blocked(driver)
+            logger.exception("Error scraping FoodPanda: %s", e)
+            self._debug_screenshot(driver, "foodpanda_error", requested=True)
+            return []
+
+        finally:
+            self._release_driver(driver)
\ No newline at end of file
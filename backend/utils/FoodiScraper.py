@@ -1,4 +1,3 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -7,20 +6,37 @@ from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 import time
-import requests
 import re
 from .BaseScraper import BaseScraper
+from .tracing import tracer
+from .Deadline import ScrapeCancelled
+from .PolitenessScheduler import ScrapeBlocked
+from .SelectorRegistry import selector_registry
+from .LocationCache import location_cache
+from .Geocoder import geocoder
 from models.Restaurant import Restaurant
+from .log import get_logger
+
+logger = get_logger('foodi')
 
 
 class FoodiScraper(BaseScraper):
+    menu_card_selectors = [
+        'div[class*="food-item-card"]',
+        'div[class*="menu-item"]',
+        'div[class*="item-card"]',
+        'div[class*="food-card"]'
+    ]
+    menu_name_selectors = ['h6', '[class*="item-name"]', '[class*="title"]']
+    menu_description_selectors = ['p', '[class*="description"]']
+    menu_price_selectors = ['[class*="price"]', 'span[class*="font-semibold"]']
+    card_cap = 20
+    platform = "foodi"
+
     def __init__(self):
         self.base_url = "https://foodibd.com"
 
-    def scrape(self, lat, lng, text, filters=None):
-        """
-        Scrape restaurants from foodi.bd using Selenium
-        """
+    def _create_driver(self):
         chrome_options = Options()
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
@@ -29,374 +45,99 @@ class FoodiScraper(BaseScraper):
         # chrome_options.add_argument("headless")  
 
         service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        return self._start_browser(chrome_options, service)
 
+    def scrape_menu(self, driver, url):
+        """Load a Foodi restaurant page and parse its menu"""
+        self._checkpoint()
+        driver.get(url)
+        self._check_blocked(driver)
         try:
-            # Start with homepage to set location first
-            print("[DEBUG] Opening foodi.bd homepage...")
-            driver.get("https://foodibd.com")
-
-            # Wait for page to load
-            wait = WebDriverWait(driver, 20)
-            time.sleep(3)
-
-            # Find the location input field on homepage
-            print("[DEBUG] Looking for location input field...")
-            location_input = wait.until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "input.p-inputtext"))
+            self._wait(driver, 15).until(
+                EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, ", ".join(self.menu_card_selectors)))
             )
+        except TimeoutException:
+            self._checkpoint()
+            logger.warning("No menu cards appeared for %s", url)
+            return []
 
-            # Clear the existing value and set new location
-            location_input.clear()
-            time.sleep(1)
-
-            location_text = text
-            print(f"[DEBUG] Setting location: {location_text}")
-            location_input.send_keys(location_text)
-            time.sleep(2)
-
-            # Find and click the "Find Food" button
-            print("[DEBUG] Looking for Find Food button...")
-            find_food_button = wait.until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//button[contains(text(), 'Find Food')]"))
-            )
-
-            print("[DEBUG] Clicking Find Food button...")
-            find_food_button.click()
-
-            # Now handle the modal that opens
-            print("[DEBUG] Waiting for modal to appear...")
-            time.sleep(3)
-
-            # Look for the modal and handle it
-            try:
-                # Wait for modal to be visible
-                modal = wait.until(
-                    EC.visibility_of_element_located(
-                        (By.CSS_SELECTOR, "[role='dialog']"))
-                )
-                print("[DEBUG] Modal found and visible")
-
-                # Find the location input in the modal
-                print("[DEBUG] Looking for location input in modal...")
-                modal_location_input = wait.until(
-                    EC.element_to_be_clickable(
-                        (By.CSS_SELECTOR, "[role='dialog'] input"))
-                )
-
-                # Clear the modal input and set our location
-                modal_location_input.clear()
-                time.sleep(1)
-                modal_location_input.send_keys(location_text)
-                print("[DEBUG] Set location in modal input")
-                time.sleep(3)  # Wait for dropdown suggestions to appear
-
-                
-                # Wait for and select from dropdown suggestions
-                print("[DEBUG] Looking for location dropdown suggestions...")
-
-
-                suggestion_selected = False
-
-                try:
-                    import re
-                    location_parts = location_text.split(',')
-
-                    # Get all location parts and clean them
-                    all_location_parts = []
-                    for part in location_parts:
-                        clean_part = part.strip()
-                        if clean_part:
-                            all_location_parts.append(clean_part)
-                            # Also add cleaned version (remove common words)
-                            cleaned = re.sub(
-                                r'\b(road|rd|street)\b', '', clean_part, flags=re.IGNORECASE).strip()
-                            if cleaned and cleaned != clean_part:
-                                all_location_parts.append(cleaned)
-
-                    print(f"[DEBUG] All location parts to search: {all_location_parts}")
-
-                    # Wait for suggestions to appear
-                    time.sleep(5)
-
-                    # Build specific selectors based on the actual Foodi structure
-                    suggestion_selectors = [
-                        # Primary selector based on your provided XPath
-                        "//*[@id='pr_id_1_content']/div/div[1]/div[2]/ul/li",
-
-                        # Variations of the primary selector
-                        "//div[@id='pr_id_1_content']//ul//li",
-                        "//div[contains(@id, 'pr_id_')]//ul//li",
-
-                        # Generic PrimeNG autocomplete patterns (Foodi uses PrimeNG)
-                        "//div[contains(@class, 'p-autocomplete-panel')]//ul//li",
-                        "//ul[contains(@class, 'p-autocomplete-items')]//li",
-                        "//div[contains(@class, 'p-autocomplete-items')]//li",
-
-                        # More specific patterns
-                        "//div[contains(@id, 'content')]//ul//li",
-                        "//li[contains(@class, 'p-autocomplete-item')]",
-
-                        # Fallback patterns
-                        "//li[contains(text(), 'ঢাকা') or contains(text(), 'Dhaka')]",
-                        "//div[contains(text(), 'ঢাকা') or contains(text(), 'Dhaka')]",
-                    ]
-
-                    # Add dynamic selectors for each location part
-                    for part in all_location_parts:
-                        if len(part) > 2:  # Only add meaningful parts
-                            escaped_part = part.replace("'", "\\'")
-                            suggestion_selectors.append(
-                                f"//li[contains(text(), '{escaped_part}')]")
-
-                    for selector in suggestion_selectors:
-                        try:
-                            print(f"[DEBUG] Trying selector: {selector}")
-                            suggestions = WebDriverWait(driver, 3).until(
-                                EC.presence_of_all_elements_located((By.XPATH, selector))
-                            )
-
-                            if suggestions:
-                                print(
-                                    f"[DEBUG] Found {len(suggestions)} suggestions with selector: {selector}")
-
-                                # Log all suggestions for debugging
-                                for i, suggestion in enumerate(suggestions[:10]):
-                                    try:
-                                        suggestion_text = suggestion.text.strip()
-                                        print(f"[DEBUG] Suggestion {i+1}: '{suggestion_text}'")
-                                    except:
-                                        print(f"[DEBUG] Suggestion {i+1}: Could not get text")
-
-                                # Enhanced matching logic using all location parts
-                                for i, suggestion in enumerate(suggestions[:10]):
-                                    try:
-                                        suggestion_text = suggestion.text.strip()
-                                        suggestion_lower = suggestion_text.lower()
-
-                                        # Skip empty suggestions
-                                        if not suggestion_text:
-                                            continue
-
-                                        # Check how many of our location parts match this suggestion
-                                        part_matches = 0
-                                        matched_parts = []
-
-                                        for part in all_location_parts:
-                                            part_lower = part.lower()
-                                            if part_lower in suggestion_lower:
-                                                part_matches += 1
-                                                matched_parts.append(part)
-                                                print(
-                                                    f"[DEBUG] Matched part: '{part}' in suggestion")
-
-                                        # Check for location indicators
-                                        location_indicators = [
-                                            'ঢাকা', 'dhaka', 'bangladesh', 'বাংলাদেশ',
-                                            '১২১২', '1212'
-                                        ]
-
-                                        indicator_matches = sum(1 for indicator in location_indicators
-                                                                if indicator in suggestion_lower)
-
-                                        # Enhanced matching criteria
-                                        is_good_match = False
-
-                                        # Priority matching logic:
-                                        if part_matches >= 2:
-                                            # If 2 or more parts of our address match
-                                            is_good_match = True
-                                            print(
-                                                f"[DEBUG] Good match - {part_matches} parts matched: {matched_parts}")
-                                        elif part_matches >= 1 and indicator_matches >= 1:
-                                            # If at least 1 part matches and has location indicators
-                                            is_good_match = True
-                                            print(
-                                                f"[DEBUG] Good match - 1 part + indicators: {matched_parts}")
-                                        elif indicator_matches >= 2:
-                                            # If multiple location indicators match
-                                            is_good_match = True
-                                            print(f"[DEBUG] Good match - multiple indicators")
-                                        elif (('ঢাকা' in suggestion_lower or 'dhaka' in suggestion_lower) and
-                                            len(suggestion_text) > 15):
-                                            # Fallback for long Dhaka addresses
-                                            is_good_match = True
-                                            print(f"[DEBUG] Good match - long Dhaka address")
-                                        elif ('bangladesh' in suggestion_lower or 'বাংলাদেশ' in suggestion_lower):
-                                            # Any Bangladesh address
-                                            is_good_match = True
-                                            print(f"[DEBUG] Good match - Bangladesh address")
-
-                                        if is_good_match:
-                                            print(
-                                                f"[DEBUG] Selecting good match: {suggestion_text}")
-                                            print(
-                                                f"[DEBUG] Match details - Parts: {part_matches}, Indicators: {indicator_matches}")
-                                            try:
-                                                # Scroll the suggestion into view
-                                                driver.execute_script(
-                                                    "arguments[0].scrollIntoView(true);", suggestion)
-                                                time.sleep(1)
-
-                                                # Try multiple click methods for better reliability
-                                                try:
-                                                    # Method 1: JavaScript click
-                                                    driver.execute_script(
-                                                        "arguments[0].click();", suggestion)
-                                                    print("[DEBUG] JavaScript click successful")
-                                                except Exception as js_error:
-                                                    print(
-                                                        f"[DEBUG] JavaScript click failed: {js_error}")
-                                                    try:
-                                                        # Method 2: Regular click
-                                                        suggestion.click()
-                                                        print(
-                                                            "[DEBUG] Regular click successful")
-                                                    except Exception as regular_error:
-                                                        print(
-                                                            f"[DEBUG] Regular click failed: {regular_error}")
-                                                        try:
-                                                            # Method 3: Action chains
-                                                            from selenium.webdriver.common.action_chains import ActionChains
-                                                            ActionChains(driver).move_to_element(
-                                                                suggestion).click().perform()
-                                                            print(
-                                                                "[DEBUG] ActionChains click successful")
-                                                        except Exception as action_error:
-                                                            print(
-                                                                f"[DEBUG] ActionChains click failed: {action_error}")
-                                                            continue
-
-                                                suggestion_selected = True
-                                                time.sleep(3)
-                                                break
-                                            except Exception as click_error:
-                                                print(
-                                                    f"[DEBUG] All click methods failed: {click_error}")
-
-                                    except Exception as suggestion_error:
-                                        print(
-                                            f"[DEBUG] Error processing suggestion {i+1}: {suggestion_error}")
-                                        continue
-
-                                # Enhanced fallback - try suggestions with any location part match
-                                if not suggestion_selected and suggestions:
-                                    print("[DEBUG] Trying fallback with any part match...")
-                                    for suggestion in suggestions[:5]:
-                                        try:
-                                            suggestion_text = suggestion.text.strip()
-                                            suggestion_lower = suggestion_text.lower()
-
-                                            # Check if any of our location parts are in this suggestion
-                                            has_part_match = any(part.lower() in suggestion_lower
-                                                                for part in all_location_parts
-                                                                if len(part) > 3)
-
-                                            if has_part_match and len(suggestion_text) > 10:
-                                                print(
-                                                    f"[DEBUG] Fallback match: {suggestion_text}")
-                                                try:
-                                                    driver.execute_script(
-                                                        "arguments[0].scrollIntoView(true);", suggestion)
-                                                    time.sleep(1)
-                                                    driver.execute_script(
-                                                        "arguments[0].click();", suggestion)
-                                                    suggestion_selected = True
-                                                    time.sleep(3)
-                                                    break
-                                                except Exception as fallback_error:
-                                                    print(
-                                                        f"[DEBUG] Fallback click failed: {fallback_error}")
-                                                    continue
-                                        except Exception as fallback_error:
-                                            print(
-                                                f"[DEBUG] Fallback processing failed: {fallback_error}")
-                                            continue
-
-                                if suggestion_selected:
-                                    break
-
-                        except TimeoutException:
-                            print(f"[DEBUG] No suggestions found with selector: {selector}")
-                            continue
-                        except Exception as selector_error:
-                            print(f"[DEBUG] Error with selector {selector}: {selector_error}")
-                            continue
-
-                    # Final specific fallback using the exact XPath pattern you provided
-                    if not suggestion_selected:
-                        print("[DEBUG] Trying final fallback with specific Foodi XPath...")
-                        try:
-                            # Use the exact XPath structure you provided
-                            specific_suggestions = driver.find_elements(
-                                By.XPATH,
-                                "//*[@id='pr_id_1_content']/div/div[1]/div[2]/ul/li | //div[contains(@id, 'pr_id_')]/div/div[1]/div[2]/ul/li"
-                            )
-
-                            print(
-                                f"[DEBUG] Found {len(specific_suggestions)} suggestions with specific XPath")
-
-                            for suggestion in specific_suggestions[:5]:
-                                try:
-                                    suggestion_text = suggestion.text.strip()
-                                    if (suggestion_text and
-                                        len(suggestion_text) > 10 and
-                                            ('ঢাকা' in suggestion_text.lower() or 'dhaka' in suggestion_text.lower())):
-
-                                        print(
-                                            f"[DEBUG] Final attempt - selecting: {suggestion_text}")
-                                        driver.execute_script(
-                                            "arguments[0].scrollIntoView(true);", suggestion)
-                                        time.sleep(1)
-                                        driver.execute_script(
-                                            "arguments[0].click();", suggestion)
-                                        suggestion_selected = True
-                                        time.sleep(3)
-                                        break
-                                except Exception as final_error:
-                                    print(f"[DEBUG] Final attempt failed: {final_error}")
-                                    continue
-
-                        except Exception as specific_error:
-                            print(f"[DEBUG] Specific XPath fallback failed: {specific_error}")
-
-                    if suggestion_selected:
-                        print("[DEBUG] Successfully selected a location suggestion!")
-                    else:
-                        print("[DEBUG] Could not select any location suggestion - will proceed anyway")
-
-                except Exception as e:
-                    print(f"[DEBUG] Error in suggestion selection process: {e}")
-
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        self._sleep(2)
+        return self.parse_menu(driver.page_source)
 
-            except TimeoutException:
-                print("[DEBUG] Could not find or interact with modal")
+    def scrape(self, lat, lng, text, filters=None):
+        """
+        Scrape restaurants from foodi.bd using Selenium
+        """
+        phases = tracer.phases(platform="foodi")
+        # A location resolved before is restored without the modal flow; a
+        # tile hit needs no address, so only geocode on a miss
+        cached_state = location_cache.get("foodi", text, lat, lng)
+        if cached_state is None:
+            text = self._address_for(lat, lng, text)
 
-            # Wait additional time for navigation
-            time.sleep(5)
+        phases.start("browser_launch")
+        driver = self._track_driver(self._create_driver())
 
-            # Check current URL after modal interaction
-            current_url = driver.current_url
-            print(f"[DEBUG] Current URL after modal interaction: {current_url}")
+        try:
+            # Start with homepage to set location first
+            logger.debug("Opening foodi.bd homepage...")
+            phases.start("navigation")
+            self._checkpoint()
+            driver.get("https://foodibd.com")
 
-            # Check if we navigated to restaurants page
-            if "restaurants" in current_url or "delivery" in current_url or current_url != "https://foodibd.com/":
-                print("[DEBUG] Successfully navigated from homepage!")
-            else:
-                print("[DEBUG] Still on homepage, trying direct navigation...")
-                # If still on homepage, try direct navigation
-                driver.get("https://foodibd.com/restaurants?type=delivery")
-                time.sleep(5)
+            # Wait for page to load
+            wait = self._wait(driver, 20)
+            self._sleep(3)
+            self._check_blocked(driver)
+
+            resolved_state = None
+            if cached_state is not None:
+                phases.start("location_restore")
+                self._checkpoint()
+                if not self._restore_location(driver, cached_state):
+                    logger.debug("Cached location state did not restore, using the modal")
+                    location_cache.invalidate(location_cache.text_key("foodi", text))
+                    location_cache.invalidate(location_cache.tile_key("foodi", lat, lng))
+                    cached_state = None
+                    text = self._address_for(lat, lng, text)
+                    driver.get("https://foodibd.com")
+                    self._sleep(3)
+
+            if cached_state is None:
+                phases.start("location_modal")
+                self._checkpoint()
+                selected_text = self._select_location_via_modal(driver, wait, text)
+
+                # Wait additional time for navigation
+                phases.start("wait")
+                self._checkpoint()
+                self._sleep(5)
+
+                # Check current URL after modal interaction
                 current_url = driver.current_url
-                print(f"[DEBUG] URL after direct navigation: {current_url}")
+                logger.debug("Current URL after modal interaction: %s", current_url)
 
+                # Check if we navigated to restaurants page
+                if "restaurants" in current_url or "delivery" in current_url or current_url != "https://foodibd.com/":
+                    logger.debug("Successfully navigated from homepage!")
+                else:
+                    logger.debug("Still on homepage, trying direct navigation...")
+                    # If still on homepage, try direct navigation
+                    driver.get("https://foodibd.com/restaurants?type=delivery")
+                    self._sleep(5)
+                    current_url = driver.current_url
+                    logger.debug("URL after direct navigation: %s", current_url)
 
-            print("[DEBUG] Looking for restaurant content...")
-            time.sleep(5)
+                if selected_text:
+                    resolved_state = self._capture_location(driver, selected_text)
 
+                logger.debug("Looking for restaurant content...")
+                self._sleep(5)
 
             restaurant_elements = []
+            phases.start("extraction")
 
             # Target only actual restaurant cards, not filter elements
             restaurant_xpaths = [
@@ -404,28 +145,53 @@ class FoodiScraper(BaseScraper):
                 "//div[contains(@class, 'restaurant-item-card')]//a[contains(@href, '/restaurant/')]",
                 "//div[contains(@class, 'grid')]//a[contains(@href, '/restaurant/')]",
             ]
+            # CSS equivalents of the XPaths above, used by harvest mode
+            restaurant_css = [
+                'div[class~="col-12"][class~="sm:col-6"][class~="md:col-6"][class~="lg:col-4"] a[href*="/restaurant/"]',
+                'div[class*="restaurant-item-card"] a[href*="/restaurant/"]',
+                'div[class*="grid"] a[href*="/restaurant/"]',
+            ]
+            card_css = restaurant_css[0]
+            css_for_xpath = dict(zip(restaurant_xpaths, restaurant_css))
 
-            for xpath in restaurant_xpaths:
+            for xpath in selector_registry.order("foodi", "restaurant_links", restaurant_xpaths):
+                css = css_for_xpath[xpath]
+                started = time.monotonic()
                 elements = driver.find_elements(By.XPATH, xpath)
+                selector_registry.record("foodi", "restaurant_links", xpath, bool(elements),
+                                         time.monotonic() - started)
                 if elements:
-                    print(
-                        f"[DEBUG] Found {len(elements)} restaurant links using XPath: {xpath}")
+                    logger.debug("Found %s restaurant links using XPath: %s", len(elements), xpath)
                     restaurant_elements = elements
+                    card_css = css
                     break
 
             if not restaurant_elements:
-                print("[DEBUG] No restaurant links found, trying restaurant card containers...")
+                logger.debug("No restaurant links found, trying restaurant card containers...")
                 # Target the actual restaurant card containers
                 card_xpath = "//div[contains(@class, 'col-12') and contains(@class, 'sm:col-6') and contains(@class, 'md:col-6') and contains(@class, 'lg:col-4')]//div[contains(@class, 'restaurant-item-card')]"
                 restaurant_elements = driver.find_elements(By.XPATH, card_xpath)
-                print(f"[DEBUG] Found {len(restaurant_elements)} restaurant cards")
+                logger.debug("Found %s restaurant cards", len(restaurant_elements))
+                if not restaurant_elements:
+                    selector_registry.miss("foodi", "restaurant_links")
 
             # Extract restaurant data with better parsing
             restaurants = []
+            seen_urls = set()
+            harvest_limit = self._harvest_limit(filters)
+            if harvest_limit:
+                # Harvest mode: no card cap, cards are parsed as scrolling loads them
+                logger.debug("Harvesting up to %s restaurants with selector: %s", harvest_limit, card_css)
+                restaurant_elements = self._harvest_cards(
+                    driver, card_css, harvest_limit, partial=restaurants)
+            else:
+                restaurant_elements = restaurant_elements[:self.card_cap]
 
-            for i, element in enumerate(restaurant_elements[:20]):
+            for i, element in enumerate(restaurant_elements):
+                # Out of time: keep what has been extracted so far
+                self._checkpoint(restaurants)
                 try:
-                    print(f"[DEBUG] Processing restaurant {i+1}...")
+                    logger.debug("Processing restaurant %s...", i+1)
 
                     # Extract restaurant name - look for h6 within the card
                     name = "Unknown Restaurant"
@@ -434,15 +200,15 @@ class FoodiScraper(BaseScraper):
                         name_elem = element.find_element(By.XPATH, ".//h6")
                         if name_elem and name_elem.text.strip():
                             name = name_elem.text.strip()
-                            print(f"[DEBUG] Found name: {name}")
+                            logger.debug("Found name: %s", name)
 
                         # Skip if this is a filter element
                         if name.lower() in ['filters', 'sort by', 'price range', 'delivery time'] or 'filter' in name.lower():
-                            print(f"[DEBUG] Skipping filter element: {name}")
+                            logger.debug("Skipping filter element: %s", name)
                             continue
 
                     except:
-                        print("[DEBUG] Could not find restaurant name")
+                        logger.debug("Could not find restaurant name")
                         continue
 
                     # Extract restaurant URL - look for the main link
@@ -462,6 +228,11 @@ class FoodiScraper(BaseScraper):
                     except:
                         pass
 
+                    if url != "https://foodibd.com":
+                        if url in seen_urls:
+                            continue
+                        seen_urls.add(url)
+
                     # Extract image URL - look for img within the card
                     image_url = "https://via.placeholder.com/300x200?text=No+Image"
                     try:
@@ -490,17 +261,17 @@ class FoodiScraper(BaseScraper):
                                 if len(rating_spans) >= 1:
                                     # First span should be the rating value (4.2)
                                     rating = rating_spans[0].text.strip()
-                                    print(f"[DEBUG] Found rating in first span: {rating}")
+                                    logger.debug("Found rating in first span: %s", rating)
                                 
                                 if len(rating_spans) >= 2:
                                     # Second span should be the reviews count in parentheses
                                     reviews_text = rating_spans[1].text.strip()
-                                    print(f"[DEBUG] Found reviews text: {reviews_text}")
+                                    logger.debug("Found reviews text: %s", reviews_text)
                                     
                                     # Extract the number from parentheses
                                     if '(' in reviews_text and ')' in reviews_text:
                                         reviews_count = reviews_text.strip('()')
-                                        print(f"[DEBUG] Extracted review count: {reviews_count}")
+                                        logger.debug("Extracted review count: %s", reviews_count)
                                     else:
                                         # Direct number extraction if no parentheses
                                         digit_match = re.search(r'\d+', reviews_text)
@@ -508,12 +279,13 @@ class FoodiScraper(BaseScraper):
                                             reviews_count = digit_match.group(0)
                                 
                                 # Debug the found spans
-                                print(f"[DEBUG] Found {len(rating_spans)} spans in rating container")
+                                logger.debug(
+                                    "Found %s spans in rating container", len(rating_spans))
                                 for i, span in enumerate(rating_spans):
-                                    print(f"[DEBUG] Span {i+1} text: '{span.text}'")
+                                    logger.debug("Span %s text: '%s'", i+1, span.text)
                         
                         except Exception as precise_error:
-                            print(f"[DEBUG] Error in precise rating extraction: {precise_error}")
+                            logger.debug("Error in precise rating extraction: %s", precise_error)
                             
                             # Fall back to direct XPath for the specific elements we see in screenshots
                             try:
@@ -530,7 +302,7 @@ class FoodiScraper(BaseScraper):
                                         reviews_count = reviews_text.strip('()')
                             
                             except Exception as xpath_error:
-                                print(f"[DEBUG] Error in direct XPath approach: {xpath_error}")
+                                logger.debug("Error in direct XPath approach: %s", xpath_error)
                         
                         # Format the final rating
                         if rating and rating != "No rating":
@@ -541,15 +313,16 @@ class FoodiScraper(BaseScraper):
                         else:
                             final_rating = "No rating"
                             
-                        print(f"[DEBUG] Enhanced final rating: {final_rating}")
+                        logger.debug("Enhanced final rating: %s", final_rating)
                         
                     except Exception as general_error:
-                        print(f"[DEBUG] General error in enhanced rating extraction: {general_error}")
+                        logger.debug(
+                            "General error in enhanced rating extraction: %s", general_error)
                         final_rating = "No rating"
 
                     delivery_time = "Unknown"
                     try:
-                        time_xpaths = [
+                        time_xpaths = selector_registry.order("foodi", "delivery_time", [
                             ".//div[1]/div[3]/div/span",
                             ".//div/div[1]/div[3]/div/span",
                             ".//div[contains(@class, 'div-3')]//span",
@@ -558,31 +331,36 @@ class FoodiScraper(BaseScraper):
                             ".//div[contains(text(), 'min')]//span",
                             ".//span[contains(text(), '-') and contains(text(), 'min')]",
                             ".//span[text()[contains(., 'min')]]"
-                        ]
+                        ])
                         
                         for xpath in time_xpaths:
                             try:
+                                started = time.monotonic()
                                 time_elements = element.find_elements(By.XPATH, xpath)
                                 for time_elem in time_elements:
                                     time_text = time_elem.text.strip()
-                                    print(f"[DEBUG] Found time element text: '{time_text}'")
+                                    logger.debug("Found time element text: '%s'", time_text)
                                     
                                     if time_text and 'min' in time_text.lower():
                                         time_match = re.search(r'(\d+(?:\s*-\s*\d+)?\s*min)', time_text, re.IGNORECASE)
                                         if time_match:
                                             delivery_time = time_match.group(1)
-                                            print(f"[DEBUG] Extracted delivery time: {delivery_time}")
+                                            logger.debug(
+                                                "Extracted delivery time: %s", delivery_time)
                                             break
                                         else:
                                             delivery_time = time_text
-                                            print(f"[DEBUG] Used full time text: {delivery_time}")
+                                            logger.debug("Used full time text: %s", delivery_time)
                                             break
                                 
+                                selector_registry.record("foodi", "delivery_time", xpath,
+                                                         delivery_time != "Unknown",
+                                                         time.monotonic() - started)
                                 if delivery_time != "Unknown":
                                     break
                                     
                             except Exception as xpath_error:
-                                print(f"[DEBUG] Error with time xpath {xpath}: {xpath_error}")
+                                logger.debug("Error with time xpath %s: %s", xpath, xpath_error)
                                 continue
                         
                         if delivery_time == "Unknown":
@@ -599,11 +377,12 @@ class FoodiScraper(BaseScraper):
                                         time_match = re.search(r'(\d+(?:\s*-\s*\d+)?\s*min)', span_text, re.IGNORECASE)
                                         if time_match:
                                             delivery_time = time_match.group(1)
-                                            print(f"[DEBUG] Found delivery time via general search: {delivery_time}")
+                                            logger.debug(
+                                                "Found delivery time via general search: %s", delivery_time)
                                             break
                                             
                             except Exception as general_error:
-                                print(f"[DEBUG] Error in general time search: {general_error}")
+                                logger.debug("Error in general time search: %s", general_error)
                         
                         # Final fallback using regex on entire element text
                         if delivery_time == "Unknown":
@@ -619,14 +398,15 @@ class FoodiScraper(BaseScraper):
                                     time_match = re.search(pattern, element_text, re.IGNORECASE)
                                     if time_match:
                                         delivery_time = time_match.group(1)
-                                        print(f"[DEBUG] Found delivery time via regex fallback: {delivery_time}")
+                                        logger.debug(
+                                            "Found delivery time via regex fallback: %s", delivery_time)
                                         break
                                         
                             except Exception as regex_error:
-                                print(f"[DEBUG] Error in regex time extraction: {regex_error}")
+                                logger.debug("Error in regex time extraction: %s", regex_error)
                         
                     except Exception as e:
-                        print(f"[DEBUG] Error extracting delivery time: {e}")
+                        logger.debug("Error extracting delivery time: %s", e)
 
                     delivery_fee = "Unknown"
                     try:
@@ -651,7 +431,7 @@ class FoodiScraper(BaseScraper):
                             cuisine_elem = element.find_element(By.XPATH, cuisine_xpath)
                             if cuisine_elem:
                                 cuisine_text = cuisine_elem.text.strip()
-                                print(f"[DEBUG] Raw cuisine text: '{cuisine_text}'")
+                                logger.debug("Raw cuisine text: '%s'", cuisine_text)
 
                                 if cuisine_text and len(cuisine_text) > 1:
                                     # Method 1: Split by newline - the format is often "৳৳\nSweets"
@@ -659,8 +439,8 @@ class FoodiScraper(BaseScraper):
                                     if len(cuisine_parts) > 1:
                                         # Get the second part which is usually the cuisine type
                                         cuisine_type = cuisine_parts[-1].strip()
-                                        print(
-                                            f"[DEBUG] Found cuisine type after newline: {cuisine_type}")
+                                        logger.debug(
+                                            "Found cuisine type after newline: %s", cuisine_type)
                                     else:
                                         # Method 2: Remove price indicators (৳) from the text
                                         clean_text = re.sub(r'[৳₹$€£¥]+', '', cuisine_text).strip()
@@ -668,12 +448,12 @@ class FoodiScraper(BaseScraper):
                                         # If we have text after removing price symbols, use that
                                         if clean_text:
                                             cuisine_type = clean_text
-                                            print(
-                                                f"[DEBUG] Found cuisine type after removing price symbols: {cuisine_type}")
+                                            logger.debug(
+                                                "Found cuisine type after removing price symbols: %s", cuisine_type)
                                         else:
                                             cuisine_type = cuisine_text.strip()
                         except Exception as e:
-                            print(f"[DEBUG] Error getting cuisine from specific XPath: {e}")
+                            logger.debug("Error getting cuisine from specific XPath: %s", e)
                     except:
                         pass
 
@@ -695,10 +475,15 @@ class FoodiScraper(BaseScraper):
                             ".//span[contains(text(), 'promo')]"
                         ]
 
+                        # Every pattern is collected, so order does not matter here;
+                        # the stats show which ones still match anything
                         for xpath in offer_xpaths:
                             try:
+                                started = time.monotonic()
                                 offer_elements = element.find_elements(
                                     By.XPATH, xpath)
+                                selector_registry.record("foodi", "offers", xpath, bool(offer_elements),
+                                                         time.monotonic() - started)
                                 for offer_elem in offer_elements:
                                     offer_text = offer_elem.text.strip()
 
@@ -710,8 +495,7 @@ class FoodiScraper(BaseScraper):
                                             offer_text not in offers):
 
                                         offers.append(offer_text)
-                                        print(
-                                            f"[DEBUG] Found Foodi offer: {offer_text}")
+                                        logger.debug("Found Foodi offer: %s", offer_text)
                             except:
                                 continue
                         try:
@@ -735,9 +519,9 @@ class FoodiScraper(BaseScraper):
                             if re.search(r'free\s+delivery', card_text, re.IGNORECASE) and "Free delivery" not in offers:
                                 offers.append("Free delivery")
                         except Exception as regex_error:
-                            print(f"[DEBUG] Regex extraction error: {regex_error}")
+                            logger.debug("Regex extraction error: %s", regex_error)
                     except Exception as e:
-                        print(f"[DEBUG] Error extracting Foodi offers: {e}")
+                        logger.debug("Error extracting Foodi offers: %s", e)
                     
 
                     restaurant = Restaurant(
@@ -753,27 +537,28 @@ class FoodiScraper(BaseScraper):
                     )
 
                     restaurants.append(restaurant)
-                    print(
-                        f"[DEBUG] Successfully extracted: {name} | {rating} | {delivery_fee} | {url}")
+                    logger.debug(
+                        "Successfully extracted: %s | %s | %s | %s", name, rating, delivery_fee, url)
 
                 except Exception as e:
-                    print(f"[DEBUG] Error extracting restaurant {i+1}: {e}")
+                    logger.debug("Error extracting restaurant %s: %s", i+1, e)
                     continue
 
             if len(restaurants) < 5:
-                print("[DEBUG] Got very few restaurants, trying alternative extraction...")
+                logger.debug("Got very few restaurants, trying alternative extraction...")
 
                 h6_elements = driver.find_elements(
                     By.XPATH, "//h6[string-length(text()) > 5]")
 
                 for i, h6_elem in enumerate(h6_elements[:15]):
+                    self._checkpoint(restaurants)
                     try:
                         name = h6_elem.text.strip()
 
                         if name.lower() in ['filters', 'sort by'] or 'price range' in name.lower() or 'delivery time' in name.lower():
                             continue
 
-                        print(f"[DEBUG] Alternative extraction {i+1}: {name}")
+                        logger.debug("Alternative extraction %s: %s", i+1, name)
 
                         try:
                             card_container = h6_elem.find_element(
@@ -811,43 +596,451 @@ class FoodiScraper(BaseScraper):
 
                             if not any(r.name == name for r in restaurants):
                                 restaurants.append(restaurant)
-                                print(
-                                    f"[DEBUG] Added alternative restaurant: {name} | {url}")
+                                logger.debug("Added alternative restaurant: %s | %s", name, url)
 
                         except Exception as container_error:
-                            print(
-                                f"[DEBUG] Could not get container for {name}: {container_error}")
+                            logger.debug(
+                                "Could not get container for %s: %s", name, container_error)
 
                     except Exception as h6_error:
-                        print(f"[DEBUG] Error processing h6 element {i+1}: {h6_error}")
+                        logger.debug("Error processing h6 element %s: %s", i+1, h6_error)
                         continue
 
-            print(
-                f"[DEBUG] Successfully extracted {len(restaurants)} restaurants from foodi")
+            logger.info("Successfully extracted %s restaurants from foodi", len(restaurants))
+            if resolved_state is not None and restaurants:
+                location_cache.put("foodi", text, lat, lng, resolved_state)
+            elif cached_state is not None and not restaurants:
+                location_cache.invalidate(cached_state["key"])
+            phases.end()
             return restaurants
 
+        except (ScrapeCancelled, ScrapeBlocked) as e:
+            phases.end(e)
+            raise
+
         except Exception as e:
-            print(f"[DEBUG] Error in foodi scraping: {e}")
-            import traceback
-            print(traceback.format_exc())
+            phases.end(e)
+            # A cancelled deadline quits the browser, which surfaces here as a WebDriver error
+            self._checkpoint()
+            # Elements that never showed up may be a bot wall in their place
+            self._check_blocked(driver)
+            logger.exception("Error in foodi scraping: %s", e)
+            self._debug_screenshot(driver, "foodi_error", requested=True)
             return []
 
         finally:
-            driver.quit()
+            phases.end()
+            self._release_driver(driver)
 
-    def reverse_geocode_address(self, lat, lng):
+    def _capture_location(self, driver, selected_text):
+        """Snapshot the browser state that encodes the chosen delivery location"""
+        try:
+            return {
+                "url": driver.current_url,
+                "suggestion": selected_text,
+                "cookies": [
+                    {key: cookie[key] for key in ("name", "value", "path", "secure", "httpOnly", "expiry")
+                     if key in cookie}
+                    for cookie in driver.get_cookies()
+                ],
+                "local_storage": driver.execute_script(
+                    "return Object.assign({}, window.localStorage);") or {},
+            }
+        except Exception as e:
+            logger.debug("Could not capture location state: %s", e)
+            return None
+
+    def _restore_location(self, driver, state):
         """
-        Convert coordinates to address using OpenStreetMap Nominatim API
+        Re-apply a captured location state on the homepage and open its
+        restaurant listing. Returns False if no restaurant cards show up.
         """
         try:
-            url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lng}&zoom=18&addressdetails=1"
-            response = requests.get(url, headers={'User-Agent': 'KhaboKi App'})
-            data = response.json()
+            for cookie in state.get("cookies", []):
+                driver.add_cookie(cookie)
+            driver.execute_script(
+                "for (const [key, value] of Object.entries(arguments[0])) {"
+                " window.localStorage.setItem(key, value); }",
+                state.get("local_storage", {}))
+            driver.get(state["url"])
+            self._wait(driver, 10).until(
+                EC.presence_of_element_located((By.XPATH, "//a[contains(@href, '/restaurant/')]"))
+            )
+            logger.debug("Restored location '%s' from cache", state.get("suggestion"))
+            self._sleep(2)
+            return True
+        except ScrapeCancelled:
+            raise
+        except Exception as e:
+            self._checkpoint()
+            logger.debug("Restoring cached location failed: %s", e)
+            return False
 
-            if 'display_name' in data:
-                return data['display_name']
+    def _select_location_via_modal(self, driver, wait, location_text):
+        """
+        Type the address into the homepage input and the location modal, then click
+        the best matching autocomplete suggestion. Returns its text, or None.
+        """
+        selected_text = None
 
-        except Exception as e:
-            print(f"[DEBUG] Geocoding error: {e}")
+        # Find the location input field on homepage
+        logger.debug("Looking for location input field...")
+        location_input = wait.until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "input.p-inputtext"))
+        )
+
+        # Clear the existing value and set new location
+        location_input.clear()
+        self._sleep(1)
+
+        logger.debug("Setting location: %s", location_text)
+        location_input.send_keys(location_text)
+        self._sleep(2)
+
+        # Find and click the "Find Food" button
+        logger.debug("Looking for Find Food button...")
+        find_food_button = wait.until(
+            EC.element_to_be_clickable(
+                (By.XPATH, "//button[contains(text(), 'Find Food')]"))
+        )
+
+        logger.debug("Clicking Find Food button...")
+        find_food_button.click()
+
+        # Now handle the modal that opens
+        logger.debug("Waiting for modal to appear...")
+        self._sleep(3)
+
+        # Look for the modal and handle it
+        try:
+            # Wait for modal to be visible
+            modal = wait.until(
+                EC.visibility_of_element_located(
+                    (By.CSS_SELECTOR, "[role='dialog']"))
+            )
+            logger.debug("Modal found and visible")
+
+            # Find the location input in the modal
+            logger.debug("Looking for location input in modal...")
+            modal_location_input = wait.until(
+                EC.element_to_be_clickable(
+                    (By.CSS_SELECTOR, "[role='dialog'] input"))
+            )
+
+            # Clear the modal input and set our location
+            modal_location_input.clear()
+            self._sleep(1)
+            modal_location_input.send_keys(location_text)
+            logger.debug("Set location in modal input")
+            self._sleep(3)  # Wait for dropdown suggestions to appear
+
+
+            # Wait for and select from dropdown suggestions
+            logger.debug("Looking for location dropdown suggestions...")
+
+
+            suggestion_selected = False
+
+            try:
+                import re
+                location_parts = location_text.split(',')
+
+                # Get all location parts and clean them
+                all_location_parts = []
+                for part in location_parts:
+                    clean_part = part.strip()
+                    if clean_part:
+                        all_location_parts.append(clean_part)
+                        # Also add cleaned version (remove common words)
+                        cleaned = re.sub(
+                            r'\b(road|rd|street)\b', '', clean_part, flags=re.IGNORECASE).strip()
+                        if cleaned and cleaned != clean_part:
+                            all_location_parts.append(cleaned)
+
+                logger.debug("All location parts to search: %s", all_location_parts)
+
+                # Wait for suggestions to appear
+                self._sleep(5)
+
+                # Build specific selectors based on the actual Foodi structure;
+                # each miss waits up to 3s, so the one that matched last goes first
+                suggestion_selectors = selector_registry.order("foodi", "location_suggestions", [
+                    # Primary selector based on your provided XPath
+                    "//*[@id='pr_id_1_content']/div/div[1]/div[2]/ul/li",
+
+                    # Variations of the primary selector
+                    "//div[@id='pr_id_1_content']//ul//li",
+                    "//div[contains(@id, 'pr_id_')]//ul//li",
+
+                    # Generic PrimeNG autocomplete patterns (Foodi uses PrimeNG)
+                    "//div[contains(@class, 'p-autocomplete-panel')]//ul//li",
+                    "//ul[contains(@class, 'p-autocomplete-items')]//li",
+                    "//div[contains(@class, 'p-autocomplete-items')]//li",
+
+                    # More specific patterns
+                    "//div[contains(@id, 'content')]//ul//li",
+                    "//li[contains(@class, 'p-autocomplete-item')]",
+
+                    # Fallback patterns
+                    "//li[contains(text(), 'ঢাকা') or contains(text(), 'Dhaka')]",
+                    "//div[contains(text(), 'ঢাকা') or contains(text(), 'Dhaka')]",
+                ])
+                static_selectors = set(suggestion_selectors)
+
+                # Add dynamic selectors for each location part
+                for part in all_location_parts:
+                    if len(part) > 2:  # Only add meaningful parts
+                        escaped_part = part.replace("'", "\\'")
+                        suggestion_selectors.append(
+                            f"//li[contains(text(), '{escaped_part}')]")
+
+                for selector in suggestion_selectors:
+                    # Address-specific selectors are not worth remembering
+                    tracked = selector in static_selectors
+                    started = time.monotonic()
+                    try:
+                        logger.debug("Trying selector: %s", selector)
+                        suggestions = self._wait(driver, 3).until(
+                            EC.presence_of_all_elements_located((By.XPATH, selector))
+                        )
+                        if tracked:
+                            selector_registry.record("foodi", "location_suggestions", selector,
+                                                     bool(suggestions), time.monotonic() - started)
+
+                        if suggestions:
+                            logger.debug(
+                                "Found %s suggestions with selector: %s", len(suggestions), selector)
+
+                            # Log all suggestions for debugging
+                            for i, suggestion in enumerate(suggestions[:10]):
+                                try:
+                                    suggestion_text = suggestion.text.strip()
+                                    logger.debug("Suggestion %s: '%s'", i+1, suggestion_text)
+                                except:
+                                    logger.debug("Suggestion %s: Could not get text", i+1)
+
+                            # Enhanced matching logic using all location parts
+                            for i, suggestion in enumerate(suggestions[:10]):
+                                try:
+                                    suggestion_text = suggestion.text.strip()
+                                    suggestion_lower = suggestion_text.lower()
+
+                                    # Skip empty suggestions
+                                    if not suggestion_text:
+                                        continue
+
+                                    # Check how many of our location parts match this suggestion
+                                    part_matches = 0
+                                    matched_parts = []
+
+                                    for part in all_location_parts:
+                                        part_lower = part.lower()
+                                        if part_lower in suggestion_lower:
+                                            part_matches += 1
+                                            matched_parts.append(part)
+                                            logger.debug(
+                                                "Matched part: '%s' in suggestion", part)
+
+                                    # Check for location indicators
+                                    location_indicators = [
+                                        'ঢাকা', 'dhaka', 'bangladesh', 'বাংলাদেশ',
+                                        '১২১২', '1212'
+                                    ]
+
+                                    indicator_matches = sum(1 for indicator in location_indicators
+                                                            if indicator in suggestion_lower)
+
+                                    # Enhanced matching criteria
+                                    is_good_match = False
+
+                                    # Priority matching logic:
+                                    if part_matches >= 2:
+                                        # If 2 or more parts of our address match
+                                        is_good_match = True
+                                        logger.debug(
+                                            "Good match - %s parts matched: %s", part_matches, matched_parts)
+                                    elif part_matches >= 1 and indicator_matches >= 1:
+                                        # If at least 1 part matches and has location indicators
+                                        is_good_match = True
+                                        logger.debug(
+                                            "Good match - 1 part + indicators: %s", matched_parts)
+                                    elif indicator_matches >= 2:
+                                        # If multiple location indicators match
+                                        is_good_match = True
+                                        logger.debug("Good match - multiple indicators")
+                                    elif (('ঢাকা' in suggestion_lower or 'dhaka' in suggestion_lower) and
+                                        len(suggestion_text) > 15):
+                                        # Fallback for long Dhaka addresses
+                                        is_good_match = True
+                                        logger.debug("Good match - long Dhaka address")
+                                    elif ('bangladesh' in suggestion_lower or 'বাংলাদেশ' in suggestion_lower):
+                                        # Any Bangladesh address
+                                        is_good_match = True
+                                        logger.debug("Good match - Bangladesh address")
+
+                                    if is_good_match:
+                                        logger.debug(
+                                            "Selecting good match: %s", suggestion_text)
+                                        logger.debug(
+                                            "Match details - Parts: %s, Indicators: %s", part_matches, indicator_matches)
+                                        try:
+                                            # Scroll the suggestion into view
+                                            driver.execute_script(
+                                                "arguments[0].scrollIntoView(true);", suggestion)
+                                            self._sleep(1)
+
+                                            # Try multiple click methods for better reliability
+                                            try:
+                                                # Method 1: JavaScript click
+                                                driver.execute_script(
+                                                    "arguments[0].click();", suggestion)
+                                                logger.debug("JavaScript click successful")
+                                            except Exception as js_error:
+                                                logger.debug(
+                                                    "JavaScript click failed: %s", js_error)
+                                                try:
+                                                    # Method 2: Regular click
+                                                    suggestion.click()
+                                                    logger.debug("Regular click successful")
+                                                except Exception as regular_error:
+                                                    logger.debug(
+                                                        "Regular click failed: %s", regular_error)
+                                                    try:
+                                                        # Method 3: Action chains
+                                                        from selenium.webdriver.common.action_chains import ActionChains
+                                                        ActionChains(driver).move_to_element(
+                                                            suggestion).click().perform()
+                                                        logger.debug(
+                                                            "ActionChains click successful")
+                                                    except Exception as action_error:
+                                                        logger.debug(
+                                                            "ActionChains click failed: %s", action_error)
+                                                        continue
+
+                                            suggestion_selected = True
+                                            selected_text = suggestion_text
+                                            self._sleep(3)
+                                            break
+                                        except Exception as click_error:
+                                            logger.debug(
+                                                "All click methods failed: %s", click_error)
+
+                                except Exception as suggestion_error:
+                                    logger.debug(
+                                        "Error processing suggestion %s: %s", i+1, suggestion_error)
+                                    continue
+
+                            # Enhanced fallback - try suggestions with any location part match
+                            if not suggestion_selected and suggestions:
+                                logger.debug("Trying fallback with any part match...")
+                                for suggestion in suggestions[:5]:
+                                    try:
+                                        suggestion_text = suggestion.text.strip()
+                                        suggestion_lower = suggestion_text.lower()
+
+                                        # Check if any of our location parts are in this suggestion
+                                        has_part_match = any(part.lower() in suggestion_lower
+                                                            for part in all_location_parts
+                                                            if len(part) > 3)
+
+                                        if has_part_match and len(suggestion_text) > 10:
+                                            logger.debug("Fallback match: %s", suggestion_text)
+                                            try:
+                                                driver.execute_script(
+                                                    "arguments[0].scrollIntoView(true);", suggestion)
+                                                self._sleep(1)
+                                                driver.execute_script(
+                                                    "arguments[0].click();", suggestion)
+                                                suggestion_selected = True
+                                                selected_text = suggestion_text
+                                                self._sleep(3)
+                                                break
+                                            except Exception as fallback_error:
+                                                logger.debug(
+                                                    "Fallback click failed: %s", fallback_error)
+                                                continue
+                                    except Exception as fallback_error:
+                                        logger.debug(
+                                            "Fallback processing failed: %s", fallback_error)
+                                        continue
+
+                            if suggestion_selected:
+                                break
 
-        return ""
+                    except TimeoutException:
+                        logger.debug("No suggestions found with selector: %s", selector)
+                        if tracked:
+                            selector_registry.record("foodi", "location_suggestions", selector, False,
+                                                     time.monotonic() - started)
+                        continue
+                    except Exception as selector_error:
+                        logger.debug("Error with selector %s: %s", selector, selector_error)
+                        continue
+
+                # Final specific fallback using the exact XPath pattern you provided
+                if not suggestion_selected:
+                    logger.debug("Trying final fallback with specific Foodi XPath...")
+                    try:
+                        # Use the exact XPath structure you provided
+                        specific_suggestions = driver.find_elements(
+                            By.XPATH,
+                            "//*[@id='pr_id_1_content']/div/div[1]/div[2]/ul/li | //div[contains(@id, 'pr_id_')]/div/div[1]/div[2]/ul/li"
+                        )
+
+                        logger.debug(
+                            "Found %s suggestions with specific XPath", len(specific_suggestions))
+
+                        for suggestion in specific_suggestions[:5]:
+                            try:
+                                suggestion_text = suggestion.text.strip()
+                                if (suggestion_text and
+                                    len(suggestion_text) > 10 and
+                                        ('ঢাকা' in suggestion_text.lower() or 'dhaka' in suggestion_text.lower())):
+
+                                    logger.debug(
+                                        "Final attempt - selecting: %s", suggestion_text)
+                                    driver.execute_script(
+                                        "arguments[0].scrollIntoView(true);", suggestion)
+                                    self._sleep(1)
+                                    driver.execute_script(
+                                        "arguments[0].click();", suggestion)
+                                    suggestion_selected = True
+                                    selected_text = suggestion_text
+                                    self._sleep(3)
+                                    break
+                            except Exception as final_error:
+                                logger.debug("Final attempt failed: %s", final_error)
+                                continue
+
+                    except Exception as specific_error:
+                        logger.debug("Specific XPath fallback failed: %s", specific_error)
+
+                if suggestion_selected:
+                    logger.debug("Successfully selected a location suggestion!")
+                else:
+                    logger.debug(
+                        "Could not select any location suggestion - will proceed anyway")
+                    selector_registry.miss("foodi", "location_suggestions")
+
+            except Exception as e:
+                logger.debug("Error in suggestion selection process: %s", e)
+
+
+        except TimeoutException:
+            logger.debug("Could not find or interact with modal")
+
+        return selected_text
+
+    def _address_for(self, lat, lng, text):
+        """The request's address text; Foodi only takes an address, so derive one when it has none"""
+        if (text or "").strip():
+            return text
+        text = self.reverse_geocode_address(lat, lng)
+        logger.debug("Reverse geocoded location: %s", text)
+        return text
+
+    def reverse_geocode_address(self, lat, lng):
+        """
+        Convert coordinates to an address (cached Nominatim, or the offline gazetteer)
+        """
+        return geocoder.reverse(lat, lng)
@@ -0,0 +1,315 @@
+import csv
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .Deadline import Deadline, current_deadline
+from .log import get_logger
+
+logger = get_logger('geocode')
+
+NOMINATIM_URL = os.environ.get('NOMINATIM_URL', 'https://nominatim.openstreetmap.org')
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dataset', 'gazetteer.csv')
+KM_PER_DEGREE = 111.32
+# Responses worth another try, after `backoff` * 2**attempt seconds
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class KDTree:
+    """2-d tree over (x, y) points for nearest-neighbour lookup"""
+
+    def __init__(self, points: List[Tuple[float, float]]):
+        self.points = points
+        self.root = self._build(list(range(len(points))), 0)
+
+    def _build(self, indexes, depth):
+        if not indexes:
+            return None
+        axis = depth % 2
+        indexes.sort(key=lambda index: self.points[index][axis])
+        middle = len(indexes) // 2
+        return (indexes[middle], axis,
+                self._build(indexes[:middle], depth + 1),
+                self._build(indexes[middle + 1:], depth + 1))
+
+    def nearest(self, x: float, y: float) -> Tuple[Optional[int], float]:
+        """Index of the closest point and its squared distance"""
+        best = [None, float('inf')]
+        target = (x, y)
+
+        def visit(node):
+            if node is None:
+                return
+            index, axis, left, right = node
+            px, py = self.points[index]
+            distance = (px - x) ** 2 + (py - y) ** 2
+            if distance < best[1]:
+                best[0], best[1] = index, distance
+
+            delta = target[axis] - self.points[index][axis]
+            near, far = (left, right) if delta < 0 else (right, left)
+            visit(near)
+            # Only cross the splitting line if it is closer than the best match
+            if delta ** 2 < best[1]:
+                visit(far)
+
+        visit(self.root)
+        return best[0], best[1]
+
+
+class Gazetteer:
+    """Bundled list of areas (dataset/gazetteer.csv) for offline reverse geocoding"""
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        self.path = path
+        self.areas = []
+        self.tree = None
+        self.lock = threading.Lock()
+
+    def _load(self):
+        with self.lock:
+            if self.tree is not None:
+                return
+            with open(self.path, encoding='utf-8') as handle:
+                self.areas = [
+                    {'name': row['name'], 'city': row['city'],
+                     'lat': float(row['lat']), 'lng': float(row['lng'])}
+                    for row in csv.DictReader(handle)
+                ]
+            self.tree = KDTree([self._project(area['lat'], area['lng']) for area in self.areas])
+
+    @staticmethod
+    def _project(lat: float, lng: float) -> Tuple[float, float]:
+        # Equirectangular: good enough at city scale, keeps the tree 2-d
+        return lat, lng * math.cos(math.radians(lat))
+
+    def nearest(self, lat: float, lng: float) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Closest area and its distance in km"""
+        self._load()
+        index, distance = self.tree.nearest(*self._project(lat, lng))
+        if index is None:
+            return None, float('inf')
+        return self.areas[index], math.sqrt(distance) * KM_PER_DEGREE
+
+    def address(self, lat: float, lng: float, max_distance_km: float = 10) -> str:
+        area, distance = self.nearest(lat, lng)
+        if area is None or distance > max_distance_km:
+            return ""
+        return f"{area['name']}, {area['city']}, Bangladesh"
+
+
+class RateLimiter:
+    """
+    Spaces calls at least `min_interval` seconds apart across every thread
+    and process sharing `db_path`.
+
+    The next free slot is kept in SQLite, like the politeness buckets, so
+    gunicorn workers and crawler processes share one budget. A caller
+    reserves a slot in a transaction, then sleeps until it.
+    """
+
+    def __init__(self, min_interval: float, db_path: str):
+        self.min_interval = min_interval
+        self.db_path = db_path
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit; the reservation is made under BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        if not self._ready:
+            with self._ready_lock:
+                if not self._ready:
+                    directory = os.path.dirname(self.db_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS geocode_rate_limit (
+                            id INTEGER PRIMARY KEY CHECK (id = 1),
+                            next_at REAL NOT NULL
+                        )
+                    ''')
+                    conn.execute('INSERT OR IGNORE INTO geocode_rate_limit (id, next_at) VALUES (1, 0)')
+                    self._ready = True
+        return conn
+
+    def _reserve(self, max_wait: Optional[float]) -> Optional[float]:
+        """Seconds until the reserved slot, or None if it is further away than max_wait"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            next_at = conn.execute('SELECT next_at FROM geocode_rate_limit WHERE id = 1').fetchone()[0]
+            slot = max(now, next_at)
+            if max_wait is not None and slot - now > max_wait:
+                conn.execute('COMMIT')
+                return None
+            conn.execute('UPDATE geocode_rate_limit SET next_at = ? WHERE id = 1',
+                         (slot + self.min_interval,))
+            conn.execute('COMMIT')
+            return slot - now
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def wait(self, deadline: Optional[Deadline] = None) -> bool:
+        """
+        Sleep until a call may be made. With a deadline, returns False
+        without taking a slot when the next one is further away than the
+        time left.
+        """
+        if self.min_interval <= 0:
+            return True
+        delay = self._reserve(deadline.remaining() if deadline is not None else None)
+        if delay is None:
+            return False
+        if delay > 0:
+            if deadline is not None:
+                deadline.sleep(delay)
+            else:
+                time.sleep(delay)
+        return True
+
+
+class Geocoder:
+    """
+    Reverse geocoder with a SQLite cache in front of Nominatim.
+
+    Coordinates are rounded to `precision` decimals (3 is ~110 m) to form
+    the cache key. Nominatim is called through one pooled session at most
+    once per `min_interval` seconds across all processes sharing the cache,
+    as its usage policy asks, and retried on 429/5xx. Inside a scrape every
+    attempt's rate-limit wait, timeout and backoff is bounded by the
+    scrape's deadline. In offline mode, or when Nominatim fails, the
+    nearest gazetteer area is used instead; those fallbacks are not cached.
+    """
+
+    def __init__(self, cache_path: str, base_url: str = NOMINATIM_URL, offline: bool = False,
+                 precision: int = 3, min_interval: float = 1.0, timeout: float = 10,
+                 retries: int = 2, backoff: float = 1.0,
+                 user_agent: str = 'KhaboKi App', gazetteer: Optional[Gazetteer] = None):
+        self.cache_path = cache_path
+        self.base_url = base_url.rstrip('/')
+        self.offline = offline
+        self.precision = precision
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.user_agent = user_agent
+        self.rate_limiter = RateLimiter(min_interval, cache_path)
+        self.gazetteer = gazetteer or Gazetteer()
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._ready = False
+
+    @property
+    def session(self) -> requests.Session:
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                # Retries are done in _fetch, where they can respect the deadline
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({'User-Agent': self.user_agent})
+                self._session = session
+            return self._session
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.cache_path)
+        if not self._ready:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS reverse_geocode_cache (
+                    key TEXT PRIMARY KEY,
+                    address TEXT NOT NULL,
+                    cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self._ready = True
+        return conn
+
+    def cache_key(self, lat: float, lng: float) -> str:
+        return f"{float(lat):.{self.precision}f},{float(lng):.{self.precision}f}"
+
+    def reverse(self, lat, lng) -> str:
+        """Address text for a coordinate, or "" if none could be found"""
+        lat, lng = float(lat), float(lng)
+        if self.offline:
+            return self.gazetteer.address(lat, lng)
+
+        key = self.cache_key(lat, lng)
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT address FROM reverse_geocode_cache WHERE key = ?', (key,)).fetchone()
+            if row:
+                return row[0]
+        except sqlite3.Error as e:
+            logger.warning("Geocode cache read failed: %s", e)
+
+        address = self._fetch(lat, lng)
+        if not address:
+            return self.gazetteer.address(lat, lng)
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO reverse_geocode_cache (key, address) VALUES (?, ?)',
+                    (key, address))
+        except sqlite3.Error as e:
+            logger.warning("Geocode cache write failed: %s", e)
+        return address
+
+    def _fetch(self, lat: float, lng: float) -> str:
+        deadline = current_deadline()
+        for attempt in range(self.retries + 1):
+            if not self.rate_limiter.wait(deadline):
+                logger.debug("Geocoding skipped: no Nominatim slot before the scrape deadline")
+                return ""
+            timeout = self.timeout
+            if deadline is not None:
+                timeout = min(timeout, deadline.remaining())
+                if timeout <= 0:
+                    logger.debug("Geocoding skipped: scrape deadline reached")
+                    return ""
+
+            try:
+                response = self.session.get(
+                    f"{self.base_url}/reverse",
+                    params={'format': 'json', 'lat': lat, 'lon': lng, 'zoom': 18, 'addressdetails': 1},
+                    timeout=timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json().get('display_name', '')
+                logger.debug("Geocoding got HTTP %s", response.status_code)
+            except requests.RequestException as e:
+                logger.debug("Geocoding error: %s", e)
+            except ValueError as e:
+                logger.debug("Geocoding returned invalid JSON: %s", e)
+                return ""
+
+            if attempt < self.retries:
+                delay = self.backoff * 2 ** attempt
+                if deadline is not None and delay >= deadline.remaining():
+                    return ""
+                time.sleep(delay)
+        return ""
+
+
+geocoder = Geocoder(
+    os.environ.get('GEOCODE_CACHE_DB', 'dataset/geocode_cache.db'),
+    offline=os.environ.get('GEOCODER_OFFLINE', '0') == '1'
+)
@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from .tracing import tile_tag
+from .log import get_logger
+
+logger = get_logger('location')
+
+
+class LocationCache:
+    """
+    Remembers how a location was resolved on a platform's site.
+
+    After the location modal succeeds, the resulting page URL, cookies,
+    localStorage and the suggestion that was clicked are stored under both
+    the normalized address text and the coordinate tile. Later scrapes for
+    the same text or tile restore that state directly instead of driving the
+    modal again. An in-memory LRU sits in front of a SQLite table; both are
+    bounded, and entries older than `max_age_seconds` are ignored.
+    """
+
+    def __init__(self, db_path: str, capacity: int = 256, max_rows: int = 5000,
+                 max_age_seconds: float = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.capacity = capacity
+        self.max_rows = max_rows
+        self.max_age_seconds = max_age_seconds
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self._ready = False
+
+    @staticmethod
+    def text_key(platform: str, text: str) -> str:
+        return f"{platform}:text:{' '.join((text or '').lower().split())}"
+
+    @staticmethod
+    def tile_key(platform: str, lat, lng) -> str:
+        return f"{platform}:tile:{tile_tag(lat, lng)}"
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        if not self._ready:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS location_states (
+                    key TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    saved_at REAL NOT NULL,
+                    used_at REAL NOT NULL,
+                    hits INTEGER DEFAULT 0
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_location_used ON location_states(used_at)')
+            self._ready = True
+        return conn
+
+    def _keys(self, platform: str, text: str, lat, lng):
+        # No text key for a request without address text
+        keys = [self.text_key(platform, text)] if (text or '').strip() else []
+        return keys + [self.tile_key(platform, lat, lng)]
+
+    def get(self, platform: str, text: str, lat, lng) -> Optional[Dict[str, Any]]:
+        """Stored state for this address text, else for this tile"""
+        for key in self._keys(platform, text, lat, lng):
+            state = self._get(key)
+            if state is not None:
+                logger.debug("Location cache hit for %s", key)
+                return state
+        return None
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+
+        if entry is None:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        'SELECT state, saved_at FROM location_states WHERE key = ?', (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Location cache read failed: %s", e)
+                return None
+            if row is None:
+                return None
+            entry = (json.loads(row[0]), row[1])
+            self._remember(key, entry)
+
+        state, saved_at = entry
+        if now - saved_at > self.max_age_seconds:
+            self.invalidate(key)
+            return None
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'UPDATE location_states SET used_at = ?, hits = hits + 1 WHERE key = ?',
+                    (now, key))
+        except sqlite3.Error:
+            pass
+        return dict(state, key=key)
+
+    def put(self, platform: str, text: str, lat, lng, state: Dict[str, Any]):
+        """Store a resolved state under the address text and the tile"""
+        now = time.time()
+        keys = self._keys(platform, text, lat, lng)
+        payload = json.dumps(state, ensure_ascii=False)
+        for key in keys:
+            self._remember(key, (state, now))
+
+        try:
+            with self._connect() as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO location_states (key, state, saved_at, used_at, hits)
+                    VALUES (?, ?, ?, ?, 0)
+                ''', [(key, payload, now, now) for key in keys])
+                # Evict least recently used rows beyond max_rows
+                conn.execute('''
+                    DELETE FROM location_states WHERE key IN (
+                        SELECT key FROM location_states ORDER BY used_at DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_rows,))
+        except sqlite3.Error as e:
+            logger.warning("Location cache write failed: %s", e)
+
+    def invalidate(self, key: str):
+        """Drop a state that no longer restores (expired cookies, site change)"""
+        with self.lock:
+            self.entries.pop(key, None)
+        try:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM location_states WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            logger.warning("Location cache delete failed: %s", e)
+
+    def _remember(self, key: str, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+
+location_cache = LocationCache(os.environ.get('LOCATION_CACHE_DB', 'dataset/location_cache.db'))
@@ -0,0 +1,253 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional, Tuple
+
+from .Deadline import ScrapeCancelled, current_deadline
+from .log import get_logger
+
+logger = get_logger('politeness')
+
+# Requests per minute, burst size and concurrent scrapes per platform, shared
+# by every thread and process using the same POLITENESS_DB. Override one
+# platform with e.g. SCRAPE_RATE_PER_MINUTE_FOODI=4
+DEFAULT_LIMITS = {
+    'foodi': (6.0, 2, 2),
+    'foodpanda': (10.0, 3, 3),
+}
+FALLBACK_LIMITS = (6.0, 2, 2)
+# Extra random spacing, as a fraction of the wait, so requests never tick
+JITTER = 0.3
+# Backoff after a failed scrape and after a block page: base, doubled per
+# consecutive failure up to BACKOFF_MAX_SECONDS
+ERROR_BACKOFF_SECONDS = 5.0
+BLOCK_BACKOFF_SECONDS = 60.0
+BACKOFF_MAX_SECONDS = 900.0
+# A slot held longer than this is assumed to belong to a dead process
+LEASE_SECONDS = 600.0
+# How often a waiter rechecks a platform that is at max concurrency
+POLL_SECONDS = 0.5
+
+
+class ScrapeBlocked(Exception):
+    """Raised by a scraper that landed on a captcha or access-denied page"""
+
+    def __init__(self, platform: str, reason: str):
+        super().__init__(f"{platform} blocked the scrape: {reason}")
+        self.platform = platform
+        self.reason = reason
+
+
+class ScrapeThrottled(ScrapeCancelled):
+    """
+    Raised by acquire() when the platform's next slot is further away than
+    the deadline allows. No scrape ran, so it says nothing about the
+    platform's health.
+    """
+
+
+def platform_limits(platform: str) -> Tuple[float, int, int]:
+    """(requests per minute, burst, max concurrent) for a platform"""
+    rate, burst, concurrent = DEFAULT_LIMITS.get(platform, FALLBACK_LIMITS)
+    suffix = platform.upper()
+    return (float(os.environ.get(f'SCRAPE_RATE_PER_MINUTE_{suffix}', rate)),
+            int(os.environ.get(f'SCRAPE_BURST_{suffix}', burst)),
+            int(os.environ.get(f'SCRAPE_MAX_CONCURRENT_{suffix}', concurrent)))
+
+
+class PolitenessScheduler:
+    """
+    Per-platform request pacing shared across threads and worker processes.
+
+    Each platform has a token bucket (rate per minute, burst) and a cap on
+    scrapes in flight, both kept in SQLite so gunicorn workers and crawler
+    processes draw from one budget. A scrape takes a token and a lease
+    before it starts and returns the lease when it ends; leases expire, so
+    a process that dies mid-scrape does not hold its slot forever. Failed
+    scrapes and block pages push the platform's next start back by an
+    exponential, randomized backoff, and a block page also empties the
+    bucket. Waits get random jitter on top so requests do not tick.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit; transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        if not self._ready:
+            with self._ready_lock:
+                if not self._ready:
+                    directory = os.path.dirname(self.db_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS politeness_buckets (
+                            platform TEXT PRIMARY KEY,
+                            tokens REAL NOT NULL,
+                            refilled_at REAL NOT NULL,
+                            backoff_until REAL NOT NULL DEFAULT 0,
+                            failures INTEGER NOT NULL DEFAULT 0,
+                            blocked_at REAL
+                        )
+                    ''')
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS politeness_leases (
+                            lease TEXT PRIMARY KEY,
+                            platform TEXT NOT NULL,
+                            expires_at REAL NOT NULL
+                        )
+                    ''')
+                    conn.execute('CREATE INDEX IF NOT EXISTS idx_leases_platform '
+                                 'ON politeness_leases(platform, expires_at)')
+                    self._ready = True
+        return conn
+
+    def _bucket(self, conn, platform: str, now: float):
+        """(tokens, backoff_until, failures) after refilling; inside a transaction"""
+        rate, burst, _ = platform_limits(platform)
+        row = conn.execute('''
+            SELECT tokens, refilled_at, backoff_until, failures FROM politeness_buckets
+            WHERE platform = ?
+        ''', (platform,)).fetchone()
+        if row is None:
+            conn.execute('INSERT INTO politeness_buckets (platform, tokens, refilled_at) VALUES (?, ?, ?)',
+                         (platform, float(burst), now))
+            return float(burst), 0.0, 0
+        tokens, refilled_at, backoff_until, failures = row
+        tokens = min(float(burst), tokens + max(0.0, now - refilled_at) * rate / 60)
+        return tokens, backoff_until, failures
+
+    def _try_acquire(self, platform: str) -> Tuple[Optional[str], float]:
+        """(lease, 0) when a scrape may start now, else (None, seconds to wait)"""
+        rate, _, max_concurrent = platform_limits(platform)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            tokens, backoff_until, _ = self._bucket(conn, platform, now)
+            conn.execute('DELETE FROM politeness_leases WHERE platform = ? AND expires_at < ?',
+                         (platform, now))
+            in_flight = conn.execute('SELECT COUNT(*) FROM politeness_leases WHERE platform = ?',
+                                     (platform,)).fetchone()[0]
+
+            if backoff_until > now:
+                wait = backoff_until - now
+            elif tokens < 1:
+                wait = (1 - tokens) * 60 / rate if rate > 0 else POLL_SECONDS
+            elif in_flight >= max_concurrent:
+                wait = POLL_SECONDS
+            else:
+                lease = uuid.uuid4().hex
+                conn.execute('''
+                    UPDATE politeness_buckets SET tokens = ?, refilled_at = ? WHERE platform = ?
+                ''', (tokens - 1, now, platform))
+                conn.execute('INSERT INTO politeness_leases (lease, platform, expires_at) VALUES (?, ?, ?)',
+                             (lease, platform, now + LEASE_SECONDS))
+                conn.execute('COMMIT')
+                return lease, 0.0
+
+            conn.execute('COMMIT')
+            return None, wait
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def acquire(self, platform: str) -> Tuple[str, float]:
+        """
+        Block until `platform` may be scraped; returns (lease, seconds waited).
+
+        Inside a request the wait is bounded by its deadline: when the next
+        slot is further away than the time left, ScrapeThrottled is raised
+        right away instead of sleeping for nothing.
+        """
+        started = time.monotonic()
+        deadline = current_deadline()
+        while True:
+            lease, wait = self._try_acquire(platform)
+            if lease is not None:
+                return lease, time.monotonic() - started
+            wait *= 1 + random.uniform(0, JITTER)
+            if deadline is not None:
+                if wait > deadline.remaining():
+                    raise ScrapeThrottled(f'{platform} rate limit: next slot in {wait:.0f}s')
+                deadline.sleep(wait)
+            else:
+                time.sleep(wait)
+
+    def release(self, platform: str, lease: str, outcome: Optional[str] = None):
+        """
+        Return a slot. outcome 'ok' clears the backoff, 'error' and 'blocked'
+        extend it; 'empty' (a scrape that found nothing, e.g. a sparse tile)
+        and None (e.g. a cancelled scrape) leave it as it is.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM politeness_leases WHERE lease = ?', (lease,))
+            if outcome not in (None, 'empty'):
+                tokens, backoff_until, failures = self._bucket(conn, platform, now)
+                if outcome == 'ok':
+                    failures = 0
+                else:
+                    failures += 1
+                    base = BLOCK_BACKOFF_SECONDS if outcome == 'blocked' else ERROR_BACKOFF_SECONDS
+                    delay = min(BACKOFF_MAX_SECONDS, base * 2 ** (failures - 1))
+                    # Equal jitter: at least half the delay, the rest random
+                    backoff_until = max(backoff_until, now + delay / 2 + random.uniform(0, delay / 2))
+                    if outcome == 'blocked':
+                        tokens = 0.0
+                        logger.warning("%s served a block page; backing off %.0fs",
+                                       platform, backoff_until - now)
+                conn.execute('''
+                    UPDATE politeness_buckets
+                    SET tokens = ?, refilled_at = ?, backoff_until = ?, failures = ?,
+                        blocked_at = CASE WHEN ? THEN ? ELSE blocked_at END
+                    WHERE platform = ?
+                ''', (tokens, now, backoff_until, failures, outcome == 'blocked', now, platform))
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def status(self, platform: str) -> Dict[str, Any]:
+        rate, burst, max_concurrent = platform_limits(platform)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            tokens, backoff_until, failures = self._bucket(conn, platform, now)
+            in_flight = conn.execute('''
+                SELECT COUNT(*) FROM politeness_leases WHERE platform = ? AND expires_at >= ?
+            ''', (platform, now)).fetchone()[0]
+            blocked_at = conn.execute('SELECT blocked_at FROM politeness_buckets WHERE platform = ?',
+                                      (platform,)).fetchone()[0]
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return {
+            'rate_per_minute': rate,
+            'burst': burst,
+            'max_concurrent': max_concurrent,
+            'tokens': round(tokens, 2),
+            'in_flight': in_flight,
+            'consecutive_failures': failures,
+            'backoff_seconds': round(max(0.0, backoff_until - now), 1),
+            'last_blocked_at': blocked_at
+        }
+
+
+politeness = PolitenessScheduler(os.environ.get('POLITENESS_DB', 'dataset/politeness.db'))
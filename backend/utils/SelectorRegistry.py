@@ -0,0 +1,202 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from .metrics import metrics
+from .log import get_logger
+
+logger = get_logger('selectors')
+
+# Consecutive scrapes where nothing matched before a miss is logged as an error
+ALERT_AFTER_MISSES = int(os.environ.get('SELECTOR_ALERT_AFTER', '3'))
+
+
+class SelectorRegistry:
+    """
+    Success rate and latency of the fallback selectors scrapers try in order.
+
+    Selectors are grouped by platform and slot (e.g. foodi's location
+    suggestions). order() returns a slot's selectors with the one that
+    matched last first and the rest by hit rate, so a scrape stops paying
+    for the waits of selectors that no longer match. Counts are kept in
+    memory and added to a SQLite table every `flush_interval` seconds and at
+    exit, so the ordering survives restarts. A slot where no selector
+    matched is logged, and logged as an error after `alert_after` misses in
+    a row: the site's markup probably changed.
+    """
+
+    def __init__(self, db_path: str, flush_interval: float = 60.0, alert_after: int = ALERT_AFTER_MISSES):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.alert_after = alert_after
+        self.lock = threading.Lock()
+        # (platform, slot) -> {'winner', 'misses', 'selectors': {selector: [tries, hits, seconds]}}
+        self.slots: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Counts not yet written, same shape as 'selectors'
+        self.pending: Dict[Tuple[str, str, str], List[float]] = {}
+        self.dirty = set()
+        self.flushed_at = time.monotonic()
+        self._loaded = False
+        atexit.register(self.flush)
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS selector_stats (
+                platform TEXT NOT NULL,
+                slot TEXT NOT NULL,
+                selector TEXT NOT NULL,
+                tries INTEGER NOT NULL DEFAULT 0,
+                hits INTEGER NOT NULL DEFAULT 0,
+                seconds REAL NOT NULL DEFAULT 0,
+                last_hit_at REAL,
+                PRIMARY KEY (platform, slot, selector)
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS selector_slots (
+                platform TEXT NOT NULL,
+                slot TEXT NOT NULL,
+                winner TEXT,
+                misses INTEGER NOT NULL DEFAULT 0,
+                last_miss_at REAL,
+                PRIMARY KEY (platform, slot)
+            )
+        ''')
+        return conn
+
+    def _slot(self, platform: str, slot: str) -> Dict[str, Any]:
+        return self.slots.setdefault((platform, slot), {'winner': None, 'misses': 0, 'selectors': {}})
+
+    def _load(self):
+        """Read the persisted stats once; call with the lock held"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with self._connect() as conn:
+                for platform, slot, selector, tries, hits, seconds in conn.execute(
+                        'SELECT platform, slot, selector, tries, hits, seconds FROM selector_stats'):
+                    self._slot(platform, slot)['selectors'][selector] = [tries, hits, seconds]
+                for platform, slot, winner, misses in conn.execute(
+                        'SELECT platform, slot, winner, misses FROM selector_slots'):
+                    entry = self._slot(platform, slot)
+                    entry['winner'], entry['misses'] = winner, misses
+        except sqlite3.Error as e:
+            logger.warning("Could not load selector stats: %s", e)
+
+    def order(self, platform: str, slot: str, selectors: List[str]) -> List[str]:
+        """`selectors` with the last winner first, then by hit rate (ties keep their order)"""
+        with self.lock:
+            self._load()
+            entry = self.slots.get((platform, slot))
+            if entry is None:
+                return list(selectors)
+            winner = entry['winner']
+            counts = dict(entry['selectors'])
+
+        def hit_rate(selector):
+            tries, hits, _ = counts.get(selector, (0, 0, 0))
+            # Smoothed, so an untried selector ranks as a coin flip
+            return (hits + 1) / (tries + 2)
+
+        return sorted(selectors, key=lambda selector: (selector != winner, -hit_rate(selector)))
+
+    def record(self, platform: str, slot: str, selector: str, matched: bool, seconds: float = 0.0):
+        """Count one attempt of `selector`; a match makes it the slot's winner"""
+        with self.lock:
+            self._load()
+            entry = self._slot(platform, slot)
+            for counts in (entry['selectors'].setdefault(selector, [0, 0, 0.0]),
+                           self.pending.setdefault((platform, slot, selector), [0, 0, 0.0])):
+                counts[0] += 1
+                counts[1] += bool(matched)
+                counts[2] += seconds
+            if matched and (entry['winner'] != selector or entry['misses']):
+                entry['winner'] = selector
+                entry['misses'] = 0
+                self.dirty.add((platform, slot))
+            due = time.monotonic() - self.flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def miss(self, platform: str, slot: str):
+        """No selector of the slot matched"""
+        with self.lock:
+            self._load()
+            entry = self._slot(platform, slot)
+            entry['misses'] += 1
+            misses = entry['misses']
+            self.dirty.add((platform, slot))
+        metrics.inc('selector_misses_total', platform=platform, slot=slot)
+        if misses >= self.alert_after:
+            logger.error("No %s %s selector matched in %s scrapes in a row; the page markup may have changed",
+                         platform, slot, misses)
+        else:
+            logger.warning("No %s %s selector matched", platform, slot)
+
+    def flush(self):
+        """Add the counts gathered since the last flush to the database"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            slots = {key: (self.slots[key]['winner'], self.slots[key]['misses']) for key in self.dirty}
+            self.dirty = set()
+            self.flushed_at = time.monotonic()
+        if not pending and not slots:
+            return
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.executemany('''
+                    INSERT INTO selector_stats (platform, slot, selector, tries, hits, seconds, last_hit_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (platform, slot, selector) DO UPDATE SET
+                        tries = tries + excluded.tries,
+                        hits = hits + excluded.hits,
+                        seconds = seconds + excluded.seconds,
+                        last_hit_at = coalesce(excluded.last_hit_at, last_hit_at)
+                ''', [(platform, slot, selector, tries, hits, seconds, now if hits else None)
+                      for (platform, slot, selector), (tries, hits, seconds) in pending.items()])
+                conn.executemany('''
+                    INSERT INTO selector_slots (platform, slot, winner, misses, last_miss_at)
+                    VALUES (?, ?, ?, ?, CASE WHEN ? > 0 THEN ? END)
+                    ON CONFLICT (platform, slot) DO UPDATE SET
+                        winner = coalesce(excluded.winner, winner),
+                        misses = excluded.misses,
+                        last_miss_at = coalesce(excluded.last_miss_at, last_miss_at)
+                ''', [(platform, slot, winner, misses, misses, now)
+                      for (platform, slot), (winner, misses) in slots.items()])
+        except sqlite3.Error as e:
+            logger.warning("Could not save selector stats: %s", e)
+
+    def stats(self, platform: Optional[str] = None) -> Dict[str, Any]:
+        """Per slot: winner, consecutive misses and each selector's hit rate and mean latency"""
+        with self.lock:
+            self._load()
+            slots = {key: (entry['winner'], entry['misses'], dict(entry['selectors']))
+                     for key, entry in self.slots.items() if platform in (None, key[0])}
+        result = {}
+        for (slot_platform, slot), (winner, misses, selectors) in sorted(slots.items()):
+            name = slot if platform else f"{slot_platform}.{slot}"
+            result[name] = {
+                'winner': winner,
+                'consecutive_misses': misses,
+                'selectors': {
+                    selector: {
+                        'tries': tries,
+                        'hit_rate': round(hits / tries, 3) if tries else None,
+                        'mean_seconds': round(seconds / tries, 3) if tries else None
+                    }
+                    for selector, (tries, hits, seconds) in selectors.items()
+                }
+            }
+        return result
+
+
+selector_registry = SelectorRegistry(os.environ.get('SELECTOR_STATS_DB', 'dataset/selector_stats.db'))
@@ -0,0 +1,38 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_default(obj):
+    """Models and batches serialize themselves; everything else is an error"""
+    to_dict = getattr(obj, 'to_dict', None)
+    if to_dict is not None:
+        return to_dict()
+    to_dicts = getattr(obj, 'to_dicts', None)
+    if to_dicts is not None:
+        return to_dicts()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """
+    Serialize to UTF-8 JSON bytes, with orjson when it is installed.
+
+    orjson encodes the slotted Restaurant/MenuItem dataclasses natively, so
+    lists of models can be passed without calling to_dict() first.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=encode_default, option=option)
+    if indent:
+        return json.dumps(obj, default=encode_default, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, default=encode_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dump(obj, path: str, indent: bool = False):
+    with open(path, 'wb') as f:
+        f.write(dumps(obj, indent=indent))
+
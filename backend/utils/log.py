@@ -0,0 +1,178 @@
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+# Per-message-template budget for DEBUG records outside verbose requests
+DEBUG_RATE_LIMIT = int(os.environ.get('LOG_DEBUG_RATE_LIMIT', 20))
+DEBUG_RATE_WINDOW = float(os.environ.get('LOG_DEBUG_RATE_WINDOW', 10))
+
+_verbose = contextvars.ContextVar('verbose_logging', default=False)
+_setup_lock = threading.Lock()
+_queue_handler = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `limit` DEBUG records per message template through per
+    window; the next record let through reports how many were dropped.
+    """
+
+    def __init__(self, limit: int = DEBUG_RATE_LIMIT, window: float = DEBUG_RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.lock = threading.Lock()
+        self.windows = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or getattr(record, 'verbose', False):
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            started, count, suppressed = self.windows.get(key, (now, 0, 0))
+            if now - started >= self.window:
+                started, count = now, 0
+            if count >= self.limit:
+                self.windows[key] = (started, count, suppressed + 1)
+                return False
+            self.windows[key] = (started, count + 1, 0)
+            if len(self.windows) > 10000:
+                self.windows.clear()
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class Formatter(logging.Formatter):
+    def format(self, record):
+        message = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            message += f" ({suppressed} similar messages suppressed)"
+        return message
+
+
+class Logger:
+    """
+    Thin wrapper over logging.Logger whose debug() is a level check when
+    disabled, and always emits inside a request that asked for verbose logs.
+    Pass arguments %-style so disabled messages are never formatted.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+
+    def debug(self, msg, *args, **kwargs):
+        if _verbose.get():
+            # Bypass the logger level, but still honour handler filters
+            fn, lno, func, sinfo = self._logger.findCaller(stacklevel=2)
+            record = self._logger.makeRecord(
+                self._logger.name, logging.DEBUG, fn, lno, msg, args,
+                kwargs.get('exc_info') and sys.exc_info(), func, {'verbose': True}, sinfo)
+            self._logger.handle(record)
+        elif self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(msg, *args, stacklevel=2, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self._logger.info(msg, *args, stacklevel=2, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self._logger.warning(msg, *args, stacklevel=2, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        self._logger.error(msg, *args, stacklevel=2, **kwargs)
+
+    def exception(self, msg, *args, **kwargs):
+        self._logger.exception(msg, *args, stacklevel=2, **kwargs)
+
+    def is_verbose(self) -> bool:
+        return _verbose.get() or self._logger.isEnabledFor(logging.DEBUG)
+
+
+class ForkSafeQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler whose listener thread is restarted in a forked worker,
+    since threads do not survive fork (e.g. gunicorn --preload).
+    """
+
+    def __init__(self, *handlers):
+        super().__init__(queue.SimpleQueue())
+        self.handlers = handlers
+        self.pid = None
+        self.listener = None
+        self._start_listener()
+
+    def _start_listener(self):
+        self.pid = os.getpid()
+        self.listener = logging.handlers.QueueListener(self.queue, *self.handlers)
+        self.listener.start()
+
+    def emit(self, record):
+        if self.pid != os.getpid():
+            with _setup_lock:
+                if self.pid != os.getpid():
+                    # Records still queued at fork time belong to the parent
+                    self.queue = queue.SimpleQueue()
+                    self._start_listener()
+        super().emit(record)
+
+    def close(self):
+        # Flush queued records; only the process that started the listener can stop it
+        if self.listener is not None and self.pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+def setup_logging(level=None):
+    """
+    Route every khaboki.* logger through a queue so callers never block
+    on stdout; a listener thread does the writing.
+    """
+    global _queue_handler
+
+    with _setup_lock:
+        if _queue_handler is not None:
+            return
+
+        root = logging.getLogger('khaboki')
+        root.setLevel(level or os.environ.get('LOG_LEVEL', 'INFO').upper())
+        root.propagate = False
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(Formatter(LOG_FORMAT))
+
+        _queue_handler = ForkSafeQueueHandler(stream_handler)
+        _queue_handler.addFilter(RateLimitFilter())
+        root.addHandler(_queue_handler)
+
+
+@atexit.register
+def _flush_logs():
+    if _queue_handler is not None:
+        _queue_handler.close()
+
+
+def get_logger(name: str) -> Logger:
+    setup_logging()
+    return Logger(logging.getLogger(f'khaboki.{name}'))
+
+
+def set_verbose(enabled: bool):
+    """Enable DEBUG output for the current request (context) only"""
+    return _verbose.set(enabled)
+
+
+def reset_verbose(token):
+    _verbose.reset(token)
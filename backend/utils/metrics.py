@@ -0,0 +1,222 @@
+import glob
+import json
+import os
+import threading
+import time
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from .tracing import Histogram
+from .log import get_logger
+
+logger = get_logger('metrics')
+
+# Seconds; covers fast API reads up to full browser scrapes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status', None),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint', LATENCY_BUCKETS),
+    'scrapes_in_flight': ('gauge', 'Platform scrapes currently running', None),
+    'scraper_results_total': ('counter', 'Platform scrapes by outcome', None),
+    'scraper_restaurants_total': ('counter', 'Restaurants returned by platform scrapes', None),
+    'scrape_duration_seconds': ('histogram', 'Platform scrape latency', LATENCY_BUCKETS),
+    'scrape_queue_seconds': ('histogram', 'Wait for a platform rate limit slot', LATENCY_BUCKETS),
+    'scraper_blocked_total': ('counter', 'Scrapes that landed on a captcha or block page', None),
+    'selector_misses_total': ('counter', "Scrapes where none of a slot's fallback selectors matched", None),
+    'db_write_duration_seconds': ('histogram', 'Dataset batch write latency', LATENCY_BUCKETS),
+    'db_rows_written_total': ('counter', 'Restaurant rows passed to the dataset writer', None),
+    'dataset_rows_unchanged_total': ('counter', 'Restaurant rows skipped as unchanged', None),
+    'dataset_queue_depth': ('gauge', 'Scrape results waiting for the dataset writer', None),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    """
+    Process-local counters, gauges and histograms with Prometheus text output.
+
+    Updates are a dict operation under a lock. When METRICS_DIR is set each
+    process (e.g. gunicorn worker) snapshots its values into its own file
+    every few seconds and /metrics sums the files of all workers; gauges of
+    workers that are no longer running are dropped.
+    """
+
+    def __init__(self, metrics_dir: Optional[str] = None, flush_interval: float = 5.0):
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.gauge_callbacks: Dict[str, Callable[[], float]] = {}
+        self._reset()
+
+    def _reset(self):
+        # Called again in a forked child so it never reports its parent's values
+        self.pid = os.getpid()
+        self.values: Dict[Tuple[str, LabelKey], float] = {}
+        self.histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._flusher = None
+
+    def _check_fork(self):
+        if os.getpid() != self.pid:
+            self._reset()
+            self.lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self._check_fork()
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self._ensure_flusher()
+
+    def set(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self._check_fork()
+        with self.lock:
+            self.values[key] = value
+        self._ensure_flusher()
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self._check_fork()
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(METRICS[name][2])
+            histogram.observe(value)
+        self._ensure_flusher()
+
+    def gauge_callback(self, name: str, callback: Callable[[], float]):
+        """Gauge read when metrics are snapshotted instead of on every change"""
+        self.gauge_callbacks[name] = callback
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._check_fork()
+        for name, callback in self.gauge_callbacks.items():
+            try:
+                self.set(name, callback())
+            except Exception as e:
+                logger.warning("Gauge %s failed: %s", name, e)
+
+        with self.lock:
+            return {
+                'pid': self.pid,
+                'values': [[name, dict(labels), value]
+                           for (name, labels), value in self.values.items()],
+                'histograms': [[name, dict(labels), list(h.counts), h.sum, h.count]
+                               for (name, labels), h in self.histograms.items()]
+            }
+
+    def flush(self):
+        """Write this process's snapshot for the other workers to read"""
+        if not self.metrics_dir:
+            return
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        path = os.path.join(self.metrics_dir, f"metrics_{self.pid}.json")
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temp_path, path)
+
+    def _ensure_flusher(self):
+        if not self.metrics_dir or self._flusher is not None:
+            return
+        with self.lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        pid = self.pid
+        while os.getpid() == pid:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning("Could not write snapshot: %s", e)
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        """Snapshots of every worker, this process's taken live"""
+        own = self.snapshot()
+        snapshots = [own]
+        if not self.metrics_dir:
+            return snapshots
+
+        for path in glob.glob(os.path.join(self.metrics_dir, 'metrics_*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot['pid'] == own['pid']:
+                continue
+            snapshot['alive'] = _pid_alive(snapshot['pid'])
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self) -> str:
+        """All workers' metrics in the Prometheus text exposition format"""
+        values: Dict[Tuple[str, LabelKey], float] = {}
+        histograms: Dict[Tuple[str, LabelKey], Dict[str, Any]] = {}
+
+        for snapshot in self._collect():
+            alive = snapshot.get('alive', True)
+            for name, labels, value in snapshot['values']:
+                if name not in METRICS or (METRICS[name][0] == 'gauge' and not alive):
+                    continue
+                key = (name, tuple(sorted(labels.items())))
+                values[key] = values.get(key, 0) + value
+            for name, labels, counts, total, count in snapshot['histograms']:
+                if name not in METRICS:
+                    continue
+                key = (name, tuple(sorted(labels.items())))
+                merged = histograms.setdefault(
+                    key, {'counts': [0] * len(counts), 'sum': 0.0, 'count': 0})
+                merged['counts'] = [a + b for a, b in zip(merged['counts'], counts)]
+                merged['sum'] += total
+                merged['count'] += count
+
+        lines = []
+        for name, (metric_type, help_text, buckets) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+            if metric_type == 'histogram':
+                for (metric, labels), merged in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), merged['counts']):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {merged['sum']}")
+                    lines.append(f"{name}_count{_labels(labels)} {merged['count']}")
+            else:
+                for (metric, labels), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_labels(labels)} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels: LabelKey, **extra) -> str:
+    pairs = list(labels) + [(key, str(value)) for key, value in extra.items()]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+metrics = Metrics(os.environ.get('METRICS_DIR'))
@@ -0,0 +1,31 @@
+import re
+from typing import Optional, Tuple
+
+BANGLA_DIGITS = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
+NUMBER = re.compile(r'\d+(?:[.,]\d+)*')
+RATING = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(?:\((\d+\+?)\))?')
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """'Tk78', '37 tk', '৳ 1,250' -> 78.0, 37.0, 1250.0"""
+    match = NUMBER.search((text or '').translate(BANGLA_DIGITS))
+    if not match:
+        return None
+    return float(match.group().replace(',', ''))
+
+
+def parse_eta(text: str) -> Tuple[Optional[int], Optional[int]]:
+    """'30-45 min' -> (30, 45), '20 min' -> (20, 20)"""
+    numbers = [int(float(number.replace(',', ''))) for number in NUMBER.findall(
+        (text or '').translate(BANGLA_DIGITS))]
+    if not numbers:
+        return None, None
+    return numbers[0], numbers[1] if len(numbers) > 1 else numbers[0]
+
+
+def parse_rating(text: str) -> Tuple[Optional[float], Optional[str]]:
+    """'4.2(96)' -> (4.2, '96'), 'Not Reviewed' -> (None, None)"""
+    match = RATING.match(text or '')
+    if not match:
+        return None, None
+    return float(match.group(1)), match.group(2)
@@ -0,0 +1,145 @@
+import gzip
+import math
+from typing import List, Dict, Any, Callable, Hashable, Iterable, Optional, Set
+
+from flask import Response, request
+
+from . import fastjson
+from .ETagCache import content_etag, etag_cache
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is only offered when installed
+    msgpack = None
+
+# Smaller bodies are not worth the compression CPU or the extra header
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Keys left out of a row when they hold an empty list
+DROP_WHEN_EMPTY = ('menu_items',)
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+
+def requested_fields() -> Optional[Set[str]]:
+    """The ?fields=a,b,c projection of this request, or None for every field"""
+    fields = request.args.get('fields', '')
+    fields = {field.strip() for field in fields.split(',') if field.strip()}
+    return fields or None
+
+
+def shape_rows(rows: Iterable[Dict[str, Any]], fields: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """Project rows to `fields` and drop always-empty keys such as menu_items"""
+    shaped = []
+    for row in rows:
+        shaped.append({
+            key: value for key, value in row.items()
+            if (fields is None or key in fields) and not (key in DROP_WHEN_EMPTY and value == [])
+        })
+    return shaped
+
+
+def shape_dict(payload: Dict[str, Any], fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Top-level projection for object-shaped responses like /dataset/stats"""
+    if fields is None:
+        return payload
+    return {key: value for key, value in payload.items() if key in fields or key == 'success'}
+
+
+def _wants_msgpack() -> bool:
+    if msgpack is None:
+        return False
+    if request.args.get('format') == 'msgpack':
+        return True
+    return request.accept_mimetypes.best_match(
+        [JSON_MIMETYPE, MSGPACK_MIMETYPE], default=JSON_MIMETYPE) == MSGPACK_MIMETYPE
+
+
+def _content_encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def api_response(payload, status: int = 200) -> Response:
+    """
+    Encode a response the way the client asked for it.
+
+    JSON through fastjson by default, MessagePack for `Accept:
+    application/msgpack` or ?format=msgpack (when msgpack is installed),
+    compressed with brotli or gzip per Accept-Encoding once the body is
+    larger than MIN_COMPRESS_BYTES.
+    """
+    if _wants_msgpack():
+        body = msgpack.packb(payload, default=fastjson.encode_default, use_bin_type=True)
+        mimetype = MSGPACK_MIMETYPE
+    else:
+        body = fastjson.dumps(payload)
+        mimetype = JSON_MIMETYPE
+
+    response = Response(status=status, mimetype=mimetype)
+    response.vary.update(('Accept', 'Accept-Encoding'))
+
+    encoding = _content_encoding() if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding == 'br':
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+
+    response.set_data(body)
+    return response
+
+
+def _not_modified() -> Response:
+    response = Response(status=304)
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+
+def _set_validators(response: Response, etag: str, max_age: float) -> Response:
+    # Weak: the same content is served gzip, brotli or plain, JSON or MessagePack
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = max(0, math.floor(max_age))
+    return response
+
+
+def conditional_response(key: Hashable, version, ttl_seconds: float,
+                         build: Callable[[], Dict[str, Any]]) -> Response:
+    """
+    api_response() with an ETag and Cache-Control: public, max-age.
+
+    `key` names the resource (e.g. a tile) and `version` the data it was
+    built from; it should be cheap to get (DatasetBuilder.data_version is a
+    stat() of a small file). While the ETag remembered for that pair is
+    valid, a request whose If-None-Match carries it gets a 304 without
+    `build` being called, so nothing is read from SQLite or scraped.
+    max-age is the time left until the server-side copy expires.
+    """
+    representation = (key, request.args.get('fields', ''), _wants_msgpack())
+    cached = etag_cache.lookup(representation, version)
+    if cached is not None and request.if_none_match.contains_weak(cached[0]):
+        etag, remaining = cached
+        return _set_validators(_not_modified(), etag, remaining)
+
+    payload = build()
+    etag = content_etag(payload)
+    etag_cache.store(representation, version, etag, ttl_seconds)
+    if request.if_none_match.contains_weak(etag):
+        # Rebuilt (new worker or expired entry) but the content did not change
+        response = _not_modified()
+    else:
+        response = api_response(payload)
+    return _set_validators(response, etag, ttl_seconds)
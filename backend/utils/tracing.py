@@ -0,0 +1,254 @@
+import bisect
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+from .log import get_logger
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+logger = get_logger('trace')
+
+# Upper bounds in seconds; a Foodi scrape spends 40+ seconds in a few phases
+PHASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+
+# Attributes a span copies from its parent unless it sets them itself
+INHERITED_ATTRIBUTES = ('platform', 'tile')
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus layout); callers hold the lock"""
+
+    def __init__(self, buckets=PHASE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-quantile (None when empty)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 4),
+            'avg': round(self.sum / self.count, 4) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': buckets
+        }
+
+
+class Span:
+    def __init__(self, tracer, name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = {key: parent.attributes[key] for key in INHERITED_ATTRIBUTES
+                           if parent and key in parent.attributes}
+        self.attributes.update(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self.children: List['Span'] = []
+        self._perf_start = time.perf_counter()
+        self._otel_span = tracer._start_otel_span(self)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9 if self.end_ns else 0.0
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+        if self._otel_span is not None:
+            self._otel_span.set_attribute(key, value)
+
+    def end(self, error: Optional[BaseException] = None):
+        """Finish the span; ending twice is a no-op"""
+        if self.end_ns is not None:
+            return
+        elapsed_ns = int((time.perf_counter() - self._perf_start) * 1e9)
+        self.end_ns = self.start_ns + elapsed_ns
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.tracer._finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OTLP-style JSON representation"""
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent.span_id if self.parent else None,
+            'name': self.name,
+            'startTimeUnixNano': self.start_ns,
+            'endTimeUnixNano': self.end_ns,
+            'durationSeconds': round(self.duration, 4),
+            'attributes': self.attributes,
+            'status': {'code': 'ERROR', 'message': self.error} if self.error else {'code': 'OK'}
+        }
+
+
+class Phases:
+    """
+    Sequential phases of a long function without re-indenting it:
+    starting a phase ends the previous one.
+    """
+
+    def __init__(self, tracer, **attributes):
+        self.tracer = tracer
+        self.attributes = attributes
+        self.current: Optional[Span] = None
+
+    def start(self, name: str, **attributes):
+        self.end()
+        self.current = self.tracer.start_span(name, **dict(self.attributes, **attributes))
+        return self.current
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.current is not None:
+            self.current.end(error)
+            self.current = None
+
+
+class Tracer:
+    """
+    Lightweight tracing for scrapes.
+
+    Every finished span feeds a per-(platform, phase) histogram. Finished
+    traces are appended to a JSON lines file when TRACE_FILE is set, and
+    spans are mirrored to OpenTelemetry when its API is installed.
+    """
+
+    def __init__(self, export_path: Optional[str] = None, max_histograms: int = 256):
+        self.export_path = export_path
+        self.max_histograms = max_histograms
+        self.lock = threading.Lock()
+        self.histograms: Dict[tuple, Histogram] = {}
+        self._otel_tracer = otel_trace.get_tracer('khaboki') if otel_trace else None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Span around a block, the current span for anything started inside it"""
+        span = self.start_span(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def start_span(self, name: str, **attributes) -> Span:
+        """Child of the current span; the caller must end() it"""
+        parent = _current_span.get()
+        span = Span(self, name, parent, attributes)
+        if parent is not None:
+            parent.children.append(span)
+        return span
+
+    @staticmethod
+    def context_for(span: Span) -> contextvars.Context:
+        """Copy of the current context with span current, to run work in another thread"""
+        context = contextvars.copy_context()
+        context.run(_current_span.set, span)
+        return context
+
+    def phases(self, **attributes) -> Phases:
+        return Phases(self, **attributes)
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    def phase_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Histograms keyed by platform, then phase"""
+        summary: Dict[str, Dict[str, Any]] = {}
+        with self.lock:
+            for (platform, phase), histogram in sorted(self.histograms.items()):
+                summary.setdefault(platform, {})[phase] = histogram.to_dict()
+        return summary
+
+    def _finish(self, span: Span):
+        key = (str(span.attributes.get('platform', 'all')), span.name)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None and len(self.histograms) < self.max_histograms:
+                histogram = self.histograms[key] = Histogram()
+            if histogram is not None:
+                histogram.observe(span.duration)
+
+        if span._otel_span is not None:
+            if span.error:
+                span._otel_span.set_status(
+                    otel_trace.Status(otel_trace.StatusCode.ERROR, span.error))
+            span._otel_span.end(end_time=span.end_ns)
+
+        # One write per finished trace, when its root span ends
+        if span.parent is None and self.export_path:
+            self._export(span)
+
+    def _export(self, root: Span):
+        spans = []
+        pending = [root]
+        while pending:
+            span = pending.pop()
+            spans.append(span.to_dict())
+            pending.extend(span.children)
+
+        try:
+            os.makedirs(os.path.dirname(self.export_path) or '.', exist_ok=True)
+            line = json.dumps({'traceId': root.trace_id, 'spans': spans},
+                              ensure_ascii=False, default=str)
+            with self.lock, open(self.export_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            logger.warning("Could not export trace: %s", e)
+
+    def _start_otel_span(self, span: Span):
+        if self._otel_tracer is None:
+            return None
+        parent = span.parent._otel_span if span.parent else None
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        return self._otel_tracer.start_span(
+            span.name, context=context, attributes=span.attributes, start_time=span.start_ns)
+
+
+def tile_tag(lat: float, lng: float) -> str:
+    """Tile label used to tag spans, matching the 0.01 degree blocking grid"""
+    return f"{math.floor(float(lat) * 100) / 100:.2f},{math.floor(float(lng) * 100) / 100:.2f}"
+
+
+tracer = Tracer(os.environ.get('TRACE_FILE'))
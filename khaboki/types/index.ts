@@ -7,7 +7,7 @@ export interface Restaurant {
   platform: string;
   image_url: string;
   url: string;
-  menu_items: unknown[];
+  menu_items?: unknown[];
   offers?: string[];
 }
 